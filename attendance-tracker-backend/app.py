@@ -10,6 +10,11 @@ from routes.tasks import tasks_bp
 from routes.reminders import reminders_bp
 from routes.analytics import analytics_bp
 from routes.calendar import calendar_bp
+from routes.admin import admin_bp
+from routes.sync import sync_bp
+from commands import register_commands
+from services.dashboard import init_snapshot_tracking
+from services.sync import init_tombstone_tracking
 
 app = Flask(__name__)
 app.config.from_object(Config)
@@ -17,6 +22,9 @@ app.config.from_object(Config)
 CORS(app)
 db.init_app(app)
 jwt = JWTManager(app)
+register_commands(app)
+init_snapshot_tracking()
+init_tombstone_tracking()
 
 @jwt.unauthorized_loader
 def unauthorized_response(callback):
@@ -39,6 +47,8 @@ app.register_blueprint(tasks_bp, url_prefix="/api/tasks")
 app.register_blueprint(reminders_bp, url_prefix="/api/reminders")
 app.register_blueprint(analytics_bp, url_prefix="/api/analytics")
 app.register_blueprint(calendar_bp, url_prefix="/api/calendar")
+app.register_blueprint(admin_bp, url_prefix="/api/admin")
+app.register_blueprint(sync_bp, url_prefix="/api/sync")
 
 # Initialize Database
 with app.app_context():
@@ -56,7 +66,9 @@ def index():
             "tasks": "/api/tasks/",
             "reminders": "/api/reminders/",
             "analytics": "/api/analytics/",
-            "calendar": "/api/calendar/"
+            "calendar": "/api/calendar/",
+            "admin": "/api/admin/",
+            "sync": "/api/sync"
         }
     }
 
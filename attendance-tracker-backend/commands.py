@@ -0,0 +1,104 @@
+import click
+
+
+def register_commands(app):
+    """Register maintenance commands on the Flask CLI (``flask <command>``)"""
+
+    @app.cli.command("rebuild-rollups")
+    @click.option("--user-id", type=int, default=None, help="Only rebuild rollups for this user")
+    def rebuild_rollups(user_id):
+        """Backfill the daily attendance rollup table from AttendanceLog"""
+        from services.rollup import RollupService
+
+        rows = RollupService.rebuild(user_id=user_id)
+        scope = f"user {user_id}" if user_id is not None else "all users"
+        click.echo(f"Rebuilt {rows} daily rollup rows for {scope}")
+
+    @app.cli.command("refresh-cohort-stats")
+    def refresh_cohort_stats():
+        """Rebuild the institution-wide cohort analytics tables (run from cron)"""
+        from services.cohort import CohortStatsService
+
+        rows = CohortStatsService.refresh()
+        click.echo(f"Refreshed {rows} cohort statistics rows")
+
+    @app.cli.command("upgrade-attendance-indexes")
+    @click.option("--dry-run", is_flag=True, help="Only report duplicate logs, change nothing")
+    def upgrade_attendance_indexes(dry_run):
+        """Add new columns, remove duplicate (subject, date) logs and create the attendance indexes"""
+        from services.maintenance import AttendanceMaintenance
+
+        if not dry_run:
+            added = AttendanceMaintenance.add_missing_columns()
+            if added:
+                click.echo(f"Added columns: {', '.join(added)} (run backfill-streaks to fill them)")
+
+        removed, subjects = AttendanceMaintenance.dedupe_logs(dry_run=dry_run)
+        if dry_run:
+            click.echo(f"Would remove {removed} duplicate logs across {subjects} subjects")
+            return
+        click.echo(f"Removed {removed} duplicate logs across {subjects} subjects")
+
+        created = AttendanceMaintenance.ensure_indexes()
+        click.echo(f"Created indexes: {', '.join(created)}" if created else "All indexes already exist")
+
+    @app.cli.command("backfill-streaks")
+    def backfill_streaks():
+        """Add the subject streak columns (if missing) and compute streaks from history"""
+        from services.maintenance import AttendanceMaintenance
+
+        added, updated = AttendanceMaintenance.backfill_streaks()
+        if added:
+            click.echo(f"Added columns: {', '.join(added)}")
+        click.echo(f"Computed streaks for {updated} subjects")
+
+    @app.cli.command("reconcile-counters")
+    @click.option("--dry-run", is_flag=True, help="Report drifted counters without fixing them")
+    @click.option("--full", is_flag=True, help="Check every subject, not just those changed since the last pass")
+    @click.option("--chunk-size", type=int, default=500, show_default=True, help="Subjects checked per chunk")
+    @click.option("--max-chunks", type=int, default=None, help="Stop after this many chunks; the next run resumes")
+    def reconcile_counters(dry_run, full, chunk_size, max_chunks):
+        """Recompute drifted subject attendance counters from AttendanceLog"""
+        from services.reconciliation import CounterReconciliation
+
+        report = CounterReconciliation.run(dry_run=dry_run, full=full, chunk_size=chunk_size, max_chunks=max_chunks)
+        for item in report["drift"]:
+            click.echo(
+                f"Subject {item['subject_id']}: "
+                f"{item['stored']['attended_classes']}/{item['stored']['total_classes']} -> "
+                f"{item['actual']['attended_classes']}/{item['actual']['total_classes']}"
+            )
+        verb = "Would fix" if dry_run else "Fixed"
+        fixed = report["subjects_drifted"] if dry_run else report["subjects_fixed"]
+        click.echo(
+            f"Checked {report['subjects_checked']} subjects in {report['chunks']} chunks; "
+            f"{verb} {fixed} drifted in {report['duration_seconds']}s"
+        )
+        if report["subjects_skipped"]:
+            click.echo(f"Skipped {report['subjects_skipped']} changed concurrently; the next pass rechecks them")
+        if not report["completed"] and not dry_run:
+            click.echo(f"Pass incomplete; next run resumes after subject {report['watermark']}")
+
+    @app.cli.command("purge-sync-tombstones")
+    def purge_sync_tombstones():
+        """Delete delta sync tombstones older than SYNC_TOMBSTONE_RETENTION_DAYS"""
+        from services.sync import SyncService
+
+        removed = SyncService.purge_tombstones(app.config["SYNC_TOMBSTONE_RETENTION_DAYS"])
+        click.echo(f"Removed {removed} sync tombstones")
+
+    @app.cli.command("purge-idempotency-keys")
+    def purge_idempotency_keys():
+        """Delete stored Idempotency-Key responses older than IDEMPOTENCY_TTL"""
+        from utils.idempotency import IdempotencyStore
+
+        removed = IdempotencyStore.purge(app.config["IDEMPOTENCY_TTL"])
+        click.echo(f"Removed {removed} idempotency keys")
+
+    @app.cli.command("purge-export-jobs")
+    def purge_export_jobs():
+        """Delete export jobs older than EXPORT_JOB_TTL together with their rendered files"""
+        from services.export_jobs import ExportJobService
+
+        removed = ExportJobService.purge(app.config["EXPORT_JOB_TTL"])
+        click.echo(f"Removed {removed} export jobs")
@@ -19,6 +19,20 @@ class Config:
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
     UPLOAD_FOLDER = os.environ.get("UPLOAD_FOLDER", "uploads")
     
+    # Background export jobs (PDF reports)
+    EXPORT_WORKERS = int(os.environ.get("EXPORT_WORKERS", 2))  # size of the render process pool
+    EXPORT_JOB_TIMEOUT = int(os.environ.get("EXPORT_JOB_TIMEOUT", 600))  # seconds before a queued job counts as lost
+    EXPORT_JOB_TTL = int(os.environ.get("EXPORT_JOB_TTL", 24 * 3600))  # seconds a rendered export can be downloaded
+    
+    # Administrators (comma-separated emails) allowed to use the /api/admin endpoints
+    ADMIN_EMAILS = [e.strip().lower() for e in os.environ.get("ADMIN_EMAILS", "").split(",") if e.strip()]
+    
+    # Idempotency-Key responses for retried POST/PUT requests (stored in the database)
+    IDEMPOTENCY_TTL = int(os.environ.get("IDEMPOTENCY_TTL", 24 * 3600))  # seconds a stored response is replayed
+    
+    # Delta sync: deletions are remembered this long; older cursors get a full resync
+    SYNC_TOMBSTONE_RETENTION_DAYS = int(os.environ.get("SYNC_TOMBSTONE_RETENTION_DAYS", 90))
+    
     # Email configuration (for notifications - optional)
     MAIL_SERVER = os.environ.get("MAIL_SERVER")
     MAIL_PORT = int(os.environ.get("MAIL_PORT", 587))
@@ -1,5 +1,8 @@
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
+from sqlalchemy import case, func
+from sqlalchemy.ext.hybrid import hybrid_property
+from utils.attendance_metrics import attendance_metrics, DEFAULT_TARGET, EPSILON
 
 db = SQLAlchemy()
 
@@ -42,55 +45,66 @@ class Subject(db.Model):
     is_archived = db.Column(db.Boolean, default=False)
     credits = db.Column(db.Integer, default=3)  # Subject credits for weighted calculations
     semester = db.Column(db.String(20), nullable=True)  # e.g., "Fall 2025"
+    # Streaks, maintained by the attendance write paths (see services/streaks.py)
+    current_streak = db.Column(db.Integer, nullable=False, default=0, server_default="0")  # run ending at the latest log
+    current_streak_status = db.Column(db.String(10), nullable=True)  # Present/Absent
+    longest_streak = db.Column(db.Integer, nullable=False, default=0, server_default="0")  # longest run of Present
+    last_log_date = db.Column(db.Date, nullable=True)
     logs = db.relationship("AttendanceLog", backref="subject", lazy=True, cascade="all, delete-orphan")
+    daily_rollups = db.relationship("AttendanceDailyRollup", lazy=True, cascade="all, delete-orphan")
+    
+    __table_args__ = (
+        db.Index("ix_subject_user_archived", "user_id", "is_archived"),
+        db.Index("ix_subject_user_updated_at", "user_id", "updated_at"),  # delta sync
+        db.Index("ix_subject_updated_at", "updated_at"),  # counter reconciliation
+    )
+    
+    @property
+    def absent_classes(self):
+        return self.total_classes - self.attended_classes
     
     @property
+    def metrics(self):
+        """Percentage, classes needed, safe-to-miss and status (see utils/attendance_metrics.py)"""
+        return attendance_metrics(self.total_classes, self.attended_classes, self.target_percentage)
+    
+    @hybrid_property
     def attendance_percentage(self):
         """Calculate attendance percentage"""
-        if self.total_classes == 0:
-            return 0.0
-        return round((self.attended_classes / self.total_classes) * 100, 2)
+        return self.metrics.percentage
+    
+    @attendance_percentage.expression
+    def attendance_percentage(cls):
+        """Unrounded SQL form, for filtering, bucketing and aggregating in the database"""
+        return case(
+            (cls.total_classes > 0, cls.attended_classes * 100.0 / cls.total_classes),
+            else_=0.0
+        )
+    
+    @hybrid_property
+    def meets_target(self):
+        return self.metrics.meets_target
+    
+    @meets_target.expression
+    def meets_target(cls):
+        """Same comparison and float tolerance as ``attendance_metrics``, so both sides agree at the boundary"""
+        target = func.coalesce(cls.target_percentage, DEFAULT_TARGET)
+        return case(
+            (cls.total_classes > 0, cls.attended_classes * 100.0 >= target * cls.total_classes - EPSILON),
+            else_=target <= 0
+        )
     
     @property
     def classes_needed_for_target(self):
         """Calculate how many classes needed to reach target percentage"""
-        if self.attendance_percentage >= self.target_percentage:
-            return 0
-        
-        # Formula: (attended + x) / (total + x) = target/100
-        # Solving for x: x = (target * total - 100 * attended) / (100 - target)
-        target = self.target_percentage
-        if target >= 100:
-            return float('inf')
-        
-        x = (target * self.total_classes - 100 * self.attended_classes) / (100 - target)
-        return max(0, int(x) + 1)  # Round up
+        return self.metrics.classes_needed
     
     @property
     def can_afford_to_miss(self):
         """Calculate how many classes can be missed while maintaining target"""
-        if self.total_classes == 0:
-            return 0
-        
-        current_percentage = self.attendance_percentage
-        if current_percentage <= self.target_percentage:
-            return 0
-        
-        # Binary search for maximum classes that can be missed
-        max_miss = 0
-        for miss in range(1, 20):  # Reasonable upper limit
-            future_attended = self.attended_classes
-            future_total = self.total_classes + miss
-            future_percentage = (future_attended / future_total) * 100
-            
-            if future_percentage >= self.target_percentage:
-                max_miss = miss
-            else:
-                break
-        
-        return max_miss
+        return self.metrics.can_afford_to_miss
     
-    def to_dict(self, include_stats=True):
+    def to_dict(self, include_stats=True, metrics=None):
         data = {
             'id': self.id,
             'name': self.name,
@@ -107,11 +121,12 @@ class Subject(db.Model):
         }
         
         if include_stats:
+            metrics = metrics or self.metrics
             data.update({
-                'attendance_percentage': self.attendance_percentage,
-                'classes_needed_for_target': self.classes_needed_for_target,
-                'can_afford_to_miss': self.can_afford_to_miss,
-                'status': 'good' if self.attendance_percentage >= self.target_percentage else 'warning'
+                'attendance_percentage': metrics.percentage,
+                'classes_needed_for_target': metrics.classes_needed,
+                'can_afford_to_miss': metrics.can_afford_to_miss,
+                'status': metrics.status
             })
         
         return data
@@ -125,6 +140,13 @@ class AttendanceLog(db.Model):
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     notes = db.Column(db.Text, nullable=True)  # Optional notes for the attendance
     
+    __table_args__ = (
+        # One log per subject per day; also serves per-subject date ranges and newest-first listing
+        db.Index("uq_attendance_log_subject_date", "subject_id", "date", unique=True),
+        db.Index("ix_attendance_log_subject_updated_at", "subject_id", "updated_at"),  # delta sync
+        db.Index("ix_attendance_log_updated_at", "updated_at"),  # counter reconciliation
+    )
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -136,6 +158,31 @@ class AttendanceLog(db.Model):
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
 
+class AttendanceDailyRollup(db.Model):
+    """Present/absent counts per (user, subject, day), maintained on every attendance write"""
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), primary_key=True)
+    subject_id = db.Column(db.Integer, db.ForeignKey("subject.id"), primary_key=True)
+    date = db.Column(db.Date, primary_key=True)
+    present_count = db.Column(db.Integer, nullable=False, default=0)
+    absent_count = db.Column(db.Integer, nullable=False, default=0)
+    
+    __table_args__ = (
+        db.Index("ix_attendance_daily_rollup_user_date", "user_id", "date"),
+    )
+    
+    @property
+    def total_count(self):
+        return self.present_count + self.absent_count
+    
+    def to_dict(self):
+        return {
+            'subject_id': self.subject_id,
+            'date': self.date.isoformat() if self.date else None,
+            'present': self.present_count,
+            'absent': self.absent_count,
+            'total': self.total_count
+        }
+
 class Task(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
@@ -151,6 +198,12 @@ class Task(db.Model):
     estimated_hours = db.Column(db.Float, nullable=True)  # Estimated time to complete
     subject_id = db.Column(db.Integer, db.ForeignKey("subject.id"), nullable=True)  # Link to subject
     
+    __table_args__ = (
+        db.Index("ix_task_user_due_date", "user_id", "due_date"),
+        db.Index("ix_task_user_completed_at", "user_id", "completed_at"),
+        db.Index("ix_task_user_updated_at", "user_id", "updated_at"),  # delta sync
+    )
+    
     @property
     def is_overdue(self):
         """Check if task is overdue"""
@@ -199,6 +252,11 @@ class Reminder(db.Model):
     subject_id = db.Column(db.Integer, db.ForeignKey("subject.id"), nullable=True)  # Link to subject
     sent = db.Column(db.Boolean, default=False)  # Track if reminder was sent
     
+    __table_args__ = (
+        db.Index("ix_reminder_user_time", "user_id", "reminder_time"),
+        db.Index("ix_reminder_user_updated_at", "user_id", "updated_at"),  # delta sync
+    )
+    
     @property
     def is_due(self):
         """Check if reminder is due to be sent"""
@@ -222,6 +280,118 @@ class Reminder(db.Model):
         }
 
 
+class SyncTombstone(db.Model):
+    """Record of a deleted row, served to offline clients by the delta sync endpoint"""
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
+    entity = db.Column(db.String(20), nullable=False)  # subjects/attendance_logs/tasks/reminders
+    entity_id = db.Column(db.Integer, nullable=False)
+    deleted_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    
+    __table_args__ = (
+        db.Index("ix_sync_tombstone_user_deleted_at", "user_id", "deleted_at"),
+    )
+
+
+class IdempotencyKey(db.Model):
+    """Idempotency-Key claimed by a write request, with the response replayed to its retries"""
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), primary_key=True)
+    key = db.Column(db.String(255), primary_key=True)
+    fingerprint = db.Column(db.String(64), nullable=False)  # sha256 of method, path, query string and body
+    status_code = db.Column(db.Integer, nullable=True)  # None while the first request is still running
+    headers = db.Column(db.JSON, nullable=True)  # [[name, value], ...] replayed with the body
+    body = db.Column(db.LargeBinary, nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    
+    __table_args__ = (
+        db.Index("ix_idempotency_key_created_at", "created_at"),
+    )
+
+
+class DashboardSnapshot(db.Model):
+    """Precomputed, write-maintained sections of a user's analytics dashboard"""
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), primary_key=True)
+    attendance = db.Column(db.JSON, nullable=True)  # overview, at-risk subjects, charts, recent logs
+    tasks = db.Column(db.JSON, nullable=True)  # task totals that only change on task writes
+    computed_on = db.Column(db.Date, nullable=True)  # day the attendance trend window was built for
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class ExportJob(db.Model):
+    """Asynchronously rendered export (e.g. PDF report) stored under UPLOAD_FOLDER"""
+    id = db.Column(db.String(36), primary_key=True)  # uuid4
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id"), nullable=False)
+    kind = db.Column(db.String(30), nullable=False)  # pdf_report
+    status = db.Column(db.String(20), nullable=False, default='queued')  # queued/completed/failed
+    fingerprint = db.Column(db.String(64), nullable=False)  # hash of the source data, for deduplication
+    file_path = db.Column(db.String(500), nullable=True)
+    filename = db.Column(db.String(200), nullable=True)
+    error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    completed_at = db.Column(db.DateTime, nullable=True)
+    
+    __table_args__ = (
+        db.Index("ix_export_job_user_kind_fingerprint", "user_id", "kind", "fingerprint"),
+        db.Index("ix_export_job_created_at", "created_at"),  # retention purge
+    )
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'filename': self.filename,
+            'error': self.error,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'completed_at': self.completed_at.isoformat() if self.completed_at else None
+        }
+
+
+class CohortStat(db.Model):
+    """Institution-wide attendance distribution for one cohort, rebuilt periodically"""
+    dimension = db.Column(db.String(20), primary_key=True)  # overall/subject/semester/type
+    key = db.Column(db.String(120), primary_key=True)  # normalized group value
+    label = db.Column(db.String(120), nullable=False)  # display value
+    subject_count = db.Column(db.Integer, nullable=False, default=0)
+    student_count = db.Column(db.Integer, nullable=False, default=0)
+    total_classes = db.Column(db.Integer, nullable=False, default=0)
+    attended_classes = db.Column(db.Integer, nullable=False, default=0)
+    mean_percentage = db.Column(db.Float, nullable=False, default=0.0)
+    percentiles = db.Column(db.JSON, nullable=True)  # {"p10": .., "p25": .., "p50": .., "p75": .., "p90": ..}
+    distribution = db.Column(db.JSON, nullable=True)  # subject counts per 10-point percentage band
+    at_risk_subjects = db.Column(db.Integer, nullable=False, default=0)  # below their target
+    at_risk_students = db.Column(db.Integer, nullable=False, default=0)  # with at least one such subject
+    refreshed_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    def to_dict(self):
+        return {
+            'dimension': self.dimension,
+            'key': self.key,
+            'label': self.label,
+            'subject_count': self.subject_count,
+            'student_count': self.student_count,
+            'total_classes': self.total_classes,
+            'attended_classes': self.attended_classes,
+            'overall_percentage': round(self.attended_classes / self.total_classes * 100, 2) if self.total_classes else 0.0,
+            'mean_percentage': self.mean_percentage,
+            'percentiles': self.percentiles,
+            'distribution': self.distribution,
+            'at_risk_subjects': self.at_risk_subjects,
+            'at_risk_students': self.at_risk_students,
+            'refreshed_at': self.refreshed_at.isoformat() if self.refreshed_at else None
+        }
+
+
+class ReconciliationState(db.Model):
+    """Progress of a resumable background reconciliation job (one row per job)"""
+    job = db.Column(db.String(50), primary_key=True)  # e.g. subject_counters
+    changed_since = db.Column(db.DateTime, nullable=True)  # start of the last completed pass; None = never run
+    pass_started_at = db.Column(db.DateTime, nullable=True)  # set while a pass is in progress
+    watermark = db.Column(db.Integer, nullable=True)  # last subject id processed by the current pass
+    last_completed_at = db.Column(db.DateTime, nullable=True)
+    last_report = db.Column(db.JSON, nullable=True)  # metrics of the most recent (non dry-run) run
+
+
 # Analytics Models for Advanced Features
 class AttendanceGoal(db.Model):
     """Track user-defined attendance goals and milestones"""
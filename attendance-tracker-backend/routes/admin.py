@@ -0,0 +1,56 @@
+from flask import Blueprint, request, jsonify, current_app
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from models import db, User
+from services.cohort import CohortStatsService, COHORT_DIMENSIONS
+from functools import wraps
+
+admin_bp = Blueprint("admin", __name__)
+
+def admin_required(view):
+    """Allow only users whose email is listed in ADMIN_EMAILS"""
+    @wraps(view)
+    @jwt_required()
+    def wrapper(*args, **kwargs):
+        user = db.session.get(User, int(get_jwt_identity()))
+        if not user or user.email.lower() not in current_app.config.get("ADMIN_EMAILS", []):
+            return jsonify({"error": "Admin access required"}), 403
+        return view(*args, **kwargs)
+    return wrapper
+
+@admin_bp.route("/cohorts", methods=["GET"])
+@admin_required
+def get_cohort_overview():
+    """Institution-wide attendance overview from the precomputed cohort tables"""
+    overall = CohortStatsService.overall()
+    if not overall:
+        return jsonify({"error": "Cohort statistics have not been computed yet"}), 404
+    
+    return jsonify({"overall": overall.to_dict()})
+
+@admin_bp.route("/cohorts/<dimension>", methods=["GET"])
+@admin_required
+def get_cohort_breakdown(dimension):
+    """Attendance distribution per subject name, semester or type"""
+    if dimension not in COHORT_DIMENSIONS:
+        return jsonify({"error": f"Dimension must be one of: {', '.join(COHORT_DIMENSIONS)}"}), 400
+    
+    min_students = request.args.get("min_students", 1, type=int)
+    cohorts = CohortStatsService.get(dimension, min_students=max(min_students, 1))
+    
+    return jsonify({
+        "dimension": dimension,
+        "cohorts": [c.to_dict() for c in cohorts],
+        "count": len(cohorts),
+        "refreshed_at": cohorts[0].refreshed_at.isoformat() if cohorts else None
+    })
+
+@admin_bp.route("/cohorts/refresh", methods=["POST"])
+@admin_required
+def refresh_cohorts():
+    """Rebuild the cohort tables now instead of waiting for the scheduled refresh"""
+    rows = CohortStatsService.refresh()
+    
+    return jsonify({
+        "message": "Cohort statistics refreshed",
+        "rows": rows
+    })
@@ -1,13 +1,27 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, send_file, current_app, url_for
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from models import db, AttendanceLog, Subject
 from datetime import datetime, date
-from sqlalchemy import func
+from sqlalchemy import func, tuple_
+from sqlalchemy.exc import IntegrityError
+from services.rollup import RollupService
+from services.aggregation import AttendanceAggregator
+from services.streaks import StreakService
+from services.bulk_attendance import BulkAttendanceService, MAX_BULK_ENTRIES
+from services.attendance_import import AttendanceImportService, ImportFileError
+from services.export_backends import get_backend
+from services.export_jobs import ExportJobService
+from services.timeseries import TimeSeriesEngine, parse_series_args
+from utils.pagination import encode_cursor, decode_cursor
+import json
+import tempfile
+from utils.idempotency import idempotent
 
 attendance_bp = Blueprint("attendance", __name__)
 
 @attendance_bp.route("/mark", methods=["POST"])
 @jwt_required()
+@idempotent
 def mark_attendance():
     """Mark attendance for a subject"""
     data = request.json
@@ -25,49 +39,115 @@ def mark_attendance():
     if not subject:
         return jsonify({"error": "Subject not found"}), 404
     
-    # Check if attendance already marked for today
+    # Parse the (optional) class date
     today = date.today()
-    existing_log = AttendanceLog.query.filter_by(
-        subject_id=data["subject_id"], 
-        date=today
-    ).first()
-    
-    if existing_log:
-        return jsonify({"error": "Attendance already marked for today"}), 400
+    log_date = today
+    if data.get("date"):
+        try:
+            log_date = datetime.strptime(data["date"], "%Y-%m-%d").date()
+        except ValueError:
+            return jsonify({"error": "Invalid date format. Use YYYY-MM-DD"}), 400
     
-    # Create attendance log
-    attendance_log = AttendanceLog(
-        date=data.get("date", today),
-        status=data["status"],
-        subject_id=data["subject_id"]
+    # Insert unless a log already exists for that date (enforced by the unique index)
+    log_id = BulkAttendanceService.insert_log_if_absent(
+        subject.user_id, subject.id, log_date, data["status"], data.get("notes")
     )
+    if log_id is None:
+        return jsonify({"error": "Attendance already marked for this date"}), 400
     
     # Update subject counters
-    subject.total_classes += 1
-    if data["status"] == "Present":
-        subject.attended_classes += 1
+    total_classes, attended_classes = BulkAttendanceService.adjust_counters(
+        subject.id, 1, 1 if data["status"] == "Present" else 0
+    )
+    StreakService.on_append(subject, log_date, data["status"])
     
-    db.session.add(attendance_log)
     db.session.commit()
     
     # Calculate attendance percentage
-    percentage = (subject.attended_classes / subject.total_classes * 100) if subject.total_classes > 0 else 0
+    percentage = (attended_classes / total_classes * 100) if total_classes > 0 else 0
     
     return jsonify({
         "message": "Attendance marked successfully",
         "attendance_log": {
-            "id": attendance_log.id,
-            "date": attendance_log.date.isoformat(),
-            "status": attendance_log.status,
-            "subject_id": attendance_log.subject_id
+            "id": log_id,
+            "date": log_date.isoformat(),
+            "status": data["status"],
+            "subject_id": subject.id
         },
         "subject_stats": {
-            "total_classes": subject.total_classes,
-            "attended_classes": subject.attended_classes,
+            "total_classes": total_classes,
+            "attended_classes": attended_classes,
             "attendance_percentage": round(percentage, 2)
         }
     }), 201
 
+@attendance_bp.route("/mark/bulk", methods=["POST"])
+@jwt_required()
+@idempotent
+def mark_attendance_bulk():
+    """Mark attendance for many subjects and dates in one transaction"""
+    data = request.json or {}
+    user_id = get_jwt_identity()
+    
+    entries = data.get("entries")
+    if not isinstance(entries, list) or not entries:
+        return jsonify({"error": "A non-empty list of entries is required"}), 400
+    if len(entries) > MAX_BULK_ENTRIES:
+        return jsonify({"error": f"At most {MAX_BULK_ENTRIES} entries per request"}), 400
+    
+    try:
+        results, subject_stats = BulkAttendanceService.mark(user_id, entries)
+    except IntegrityError:
+        # Another request marked one of these dates between our duplicate check and insert
+        return jsonify({"error": "Attendance was marked concurrently for some of these dates, please retry"}), 409
+    created = sum(1 for r in results if r["status"] == "created")
+    
+    return jsonify({
+        "message": f"Marked {created} of {len(entries)} entries",
+        "created": created,
+        "duplicates": sum(1 for r in results if r["status"] == "duplicate"),
+        "errors": sum(1 for r in results if r["status"] == "error"),
+        "results": results,
+        "subject_stats": subject_stats
+    }), 201 if created else 200
+
+@attendance_bp.route("/import", methods=["POST"])
+@jwt_required()
+@idempotent
+def import_attendance():
+    """Import attendance history from a CSV or Excel file"""
+    user_id = get_jwt_identity()
+    
+    upload = request.files.get("file")
+    if not upload or not upload.filename:
+        return jsonify({"error": "A CSV or XLSX file is required"}), 400
+    
+    columns = {}
+    if request.form.get("columns"):
+        try:
+            columns = json.loads(request.form["columns"])
+        except ValueError:
+            return jsonify({"error": "columns must be a JSON object"}), 400
+        if not isinstance(columns, dict):
+            return jsonify({"error": "columns must be a JSON object"}), 400
+    
+    try:
+        report = AttendanceImportService.run(
+            user_id,
+            upload.stream,
+            upload.filename,
+            columns=columns,
+            create_subjects=request.form.get("create_subjects", "false").lower() == "true",
+            dry_run=request.form.get("dry_run", "false").lower() == "true"
+        )
+    except ImportFileError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    return jsonify({
+        "message": f"{'Would import' if report['dry_run'] else 'Imported'} {report['imported']} of {report['rows']} rows",
+        "report": report
+    }), 201 if report["imported"] and not report["dry_run"] else 200
+
 @attendance_bp.route("/logs/<int:subject_id>", methods=["GET"])
 @jwt_required()
 def get_attendance_logs(subject_id):
@@ -79,12 +159,60 @@ def get_attendance_logs(subject_id):
     if not subject:
         return jsonify({"error": "Subject not found"}), 404
     
+    subject_data = {
+        "id": subject.id,
+        "name": subject.name,
+        "type": subject.type
+    }
+    
+    # Cursor (keyset) mode: pass ?cursor= (empty for the first page)
+    if "cursor" in request.args:
+        per_page = min(max(request.args.get("per_page", 20, type=int), 1), current_app.config["MAX_ITEMS_PER_PAGE"])
+        
+        logs_query = AttendanceLog.query.filter_by(subject_id=subject_id)
+        if request.args["cursor"]:
+            try:
+                cursor_date, cursor_id = decode_cursor(request.args["cursor"])
+            except ValueError:
+                return jsonify({"error": "Invalid cursor"}), 400
+            logs_query = logs_query.filter(
+                tuple_(AttendanceLog.date, AttendanceLog.id) < tuple_(cursor_date, cursor_id)
+            )
+        
+        # One extra row tells us whether another page exists
+        logs = logs_query.order_by(AttendanceLog.date.desc(), AttendanceLog.id.desc()).limit(per_page + 1).all()
+        has_next = len(logs) > per_page
+        logs = logs[:per_page]
+        
+        pagination = {
+            "per_page": per_page,
+            "next_cursor": encode_cursor(logs[-1].date, logs[-1].id) if has_next else None,
+            "has_next": has_next
+        }
+        if request.args.get("include_total", "false").lower() == "true":
+            pagination["total"] = db.session.query(func.count(AttendanceLog.id)).filter(
+                AttendanceLog.subject_id == subject_id
+            ).scalar()
+        
+        return jsonify({
+            "logs": [{
+                "id": log.id,
+                "date": log.date.isoformat(),
+                "status": log.status,
+                "subject_id": log.subject_id
+            } for log in logs],
+            "pagination": pagination,
+            "subject": subject_data
+        })
+    
     # Get pagination parameters
     page = request.args.get("page", 1, type=int)
     per_page = request.args.get("per_page", 20, type=int)
     
     # Query attendance logs
-    logs_query = AttendanceLog.query.filter_by(subject_id=subject_id).order_by(AttendanceLog.date.desc())
+    logs_query = AttendanceLog.query.filter_by(subject_id=subject_id).order_by(
+        AttendanceLog.date.desc(), AttendanceLog.id.desc()
+    )
     logs_paginated = logs_query.paginate(
         page=page, per_page=per_page, error_out=False
     )
@@ -106,15 +234,12 @@ def get_attendance_logs(subject_id):
             "has_next": logs_paginated.has_next,
             "has_prev": logs_paginated.has_prev
         },
-        "subject": {
-            "id": subject.id,
-            "name": subject.name,
-            "type": subject.type
-        }
+        "subject": subject_data
     })
 
 @attendance_bp.route("/update/<int:log_id>", methods=["PUT"])
 @jwt_required()
+@idempotent
 def update_attendance(log_id):
     """Update an existing attendance record"""
     user_id = get_jwt_identity()
@@ -136,15 +261,9 @@ def update_attendance(log_id):
     # Get the subject for counter updates
     subject = Subject.query.get(attendance_log.subject_id)
     old_status = attendance_log.status
+    old_date = attendance_log.date
     new_status = data.get("status", old_status)
     
-    # Update counters if status changed
-    if old_status != new_status:
-        if old_status == "Present" and new_status == "Absent":
-            subject.attended_classes -= 1
-        elif old_status == "Absent" and new_status == "Present":
-            subject.attended_classes += 1
-    
     # Update attendance log
     attendance_log.status = new_status
     if "date" in data:
@@ -153,10 +272,28 @@ def update_attendance(log_id):
         except ValueError:
             return jsonify({"error": "Invalid date format. Use YYYY-MM-DD"}), 400
     
-    db.session.commit()
+    try:
+        RollupService.move(
+            subject.user_id, subject.id,
+            old_date, old_status,
+            attendance_log.date, attendance_log.status
+        )
+        # Update counters (atomically) if status changed
+        if old_status != new_status:
+            total_classes, attended_classes = BulkAttendanceService.adjust_counters(
+                subject.id, attended_delta=1 if new_status == "Present" else -1
+            )
+        else:
+            total_classes, attended_classes = subject.total_classes, subject.attended_classes
+        if (old_date, old_status) != (attendance_log.date, attendance_log.status):
+            StreakService.recompute(subject)
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({"error": "Attendance already marked for this date"}), 400
     
     # Calculate updated percentage
-    percentage = (subject.attended_classes / subject.total_classes * 100) if subject.total_classes > 0 else 0
+    percentage = (attended_classes / total_classes * 100) if total_classes > 0 else 0
     
     return jsonify({
         "message": "Attendance updated successfully",
@@ -167,8 +304,8 @@ def update_attendance(log_id):
             "subject_id": attendance_log.subject_id
         },
         "subject_stats": {
-            "total_classes": subject.total_classes,
-            "attended_classes": subject.attended_classes,
+            "total_classes": total_classes,
+            "attended_classes": attended_classes,
             "attendance_percentage": round(percentage, 2)
         }
     })
@@ -184,35 +321,20 @@ def get_attendance_stats(subject_id):
     if not subject:
         return jsonify({"error": "Subject not found"}), 404
     
-    # Get detailed statistics
-    total_logs = AttendanceLog.query.filter_by(subject_id=subject_id).count()
-    present_count = AttendanceLog.query.filter_by(subject_id=subject_id, status="Present").count()
-    absent_count = AttendanceLog.query.filter_by(subject_id=subject_id, status="Absent").count()
+    # Counters and streaks are maintained on the subject row by every write path
+    total_logs = subject.total_classes
+    present_count = subject.attended_classes
+    absent_count = subject.absent_classes
     
     # Calculate percentages
     attendance_percentage = (present_count / total_logs * 100) if total_logs > 0 else 0
     absence_percentage = (absent_count / total_logs * 100) if total_logs > 0 else 0
     
-    # Get recent attendance (last 10 classes)
-    recent_logs = AttendanceLog.query.filter_by(subject_id=subject_id)\
+    # One bounded read of plain columns along the (subject_id, date) index
+    recent_logs = db.session.query(AttendanceLog.date, AttendanceLog.status)\
+        .filter(AttendanceLog.subject_id == subject_id)\
         .order_by(AttendanceLog.date.desc()).limit(10).all()
     
-    recent_attendance = [{
-        "date": log.date.isoformat(),
-        "status": log.status
-    } for log in recent_logs]
-    
-    # Calculate streak (consecutive present/absent days)
-    current_streak = 0
-    streak_type = None
-    if recent_logs:
-        streak_type = recent_logs[0].status
-        for log in recent_logs:
-            if log.status == streak_type:
-                current_streak += 1
-            else:
-                break
-    
     return jsonify({
         "subject": {
             "id": subject.id,
@@ -226,11 +348,16 @@ def get_attendance_stats(subject_id):
             "attendance_percentage": round(attendance_percentage, 2),
             "absence_percentage": round(absence_percentage, 2),
             "current_streak": {
-                "count": current_streak,
-                "type": streak_type
-            }
+                "count": subject.current_streak,
+                "type": subject.current_streak_status
+            },
+            "longest_streak": subject.longest_streak,
+            "last_class_date": subject.last_log_date.isoformat() if subject.last_log_date else None
         },
-        "recent_attendance": recent_attendance
+        "recent_attendance": [{
+            "date": log.date.isoformat(),
+            "status": log.status
+        } for log in recent_logs]
     })
 
 @attendance_bp.route("/<int:log_id>", methods=["DELETE"])
@@ -252,22 +379,24 @@ def delete_attendance(log_id):
     subject = Subject.query.get(attendance_log.subject_id)
     
     # Update counters
-    subject.total_classes -= 1
-    if attendance_log.status == "Present":
-        subject.attended_classes -= 1
+    total_classes, attended_classes = BulkAttendanceService.adjust_counters(
+        subject.id, -1, -1 if attendance_log.status == "Present" else 0
+    )
     
     # Delete the log
+    RollupService.apply(subject.user_id, subject.id, attendance_log.date, attendance_log.status, delta=-1)
     db.session.delete(attendance_log)
+    StreakService.recompute(subject)
     db.session.commit()
     
     # Calculate updated percentage
-    percentage = (subject.attended_classes / subject.total_classes * 100) if subject.total_classes > 0 else 0
+    percentage = (attended_classes / total_classes * 100) if total_classes > 0 else 0
     
     return jsonify({
         "message": "Attendance record deleted successfully",
         "subject_stats": {
-            "total_classes": subject.total_classes,
-            "attended_classes": subject.attended_classes,
+            "total_classes": total_classes,
+            "attended_classes": attended_classes,
             "attendance_percentage": round(percentage, 2)
         }
     })
@@ -278,48 +407,57 @@ def get_attendance_summary():
     """Get overall attendance summary for all subjects"""
     user_id = get_jwt_identity()
     
-    # Get all subjects for the user
-    subjects = Subject.query.filter_by(user_id=user_id).all()
-    
-    summary_data = []
-    overall_total = 0
-    overall_attended = 0
-    
-    for subject in subjects:
-        total_classes = subject.total_classes
-        attended_classes = subject.attended_classes
-        percentage = (attended_classes / total_classes * 100) if total_classes > 0 else 0
-        
-        # Get recent attendance status
-        last_attendance = AttendanceLog.query.filter_by(subject_id=subject.id)\
-            .order_by(AttendanceLog.date.desc()).first()
-        
-        subject_data = {
-            "id": subject.id,
-            "name": subject.name,
-            "type": subject.type,
-            "total_classes": total_classes,
-            "attended_classes": attended_classes,
-            "attendance_percentage": round(percentage, 2),
-            "last_attendance": {
-                "date": last_attendance.date.isoformat() if last_attendance else None,
-                "status": last_attendance.status if last_attendance else None
-            }
-        }
-        
-        summary_data.append(subject_data)
-        overall_total += total_classes
-        overall_attended += attended_classes
+    return jsonify(AttendanceAggregator.subject_summary(user_id))
+
+@attendance_bp.route("/trends", methods=["GET"])
+@jwt_required()
+def get_attendance_trends():
+    """Overall and per-subject attendance trends bucketed by period"""
+    user_id = get_jwt_identity()
     
-    # Calculate overall percentage
-    overall_percentage = (overall_attended / overall_total * 100) if overall_total > 0 else 0
+    try:
+        period, start_date, end_date, max_points = parse_series_args(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     
-    return jsonify({
-        "subjects": summary_data,
-        "overall_stats": {
-            "total_classes": overall_total,
-            "attended_classes": overall_attended,
-            "attendance_percentage": round(overall_percentage, 2),
-            "total_subjects": len(subjects)
-        }
-    })
+    return jsonify(TimeSeriesEngine.attendance(
+        user_id, period, start_date, end_date, by_subject=True, max_points=max_points
+    ))
+
+@attendance_bp.route("/export", methods=["GET"])
+@jwt_required()
+def export_attendance():
+    """Download attendance data in any registered export format (PDF reports are queued as export jobs)"""
+    user_id = get_jwt_identity()
+    fmt = request.args.get("format", "pdf")  # csv, xlsx, pdf, parquet, arrow
+    export_type = request.args.get("type", "attendance")  # attendance, tasks, subjects
+    
+    backend = get_backend(fmt)
+    if not backend:
+        return jsonify({"error": "Invalid export format"}), 400
+    if export_type not in backend.export_types:
+        return jsonify({"error": f"Export type '{export_type}' is not supported for {fmt}"}), 400
+    if not backend.available():
+        return jsonify({"error": f"{fmt} export is not available on this server"}), 501
+    
+    if fmt == "pdf":
+        # Rendered in the background export pool; a finished report of unchanged data is served directly
+        job, created = ExportJobService.submit_pdf_report(user_id)
+        if job.status == "completed":
+            return send_file(job.file_path, mimetype=backend.mimetype, as_attachment=True, download_name=job.filename)
+        if job.status == "failed":
+            return jsonify({"error": f"Export job failed: {job.error}", "job": job.to_dict()}), 503
+        response = jsonify({
+            "message": "Export job queued" if created else "Export job is still being rendered",
+            "job": job.to_dict()
+        })
+        response.headers["Location"] = url_for("analytics.get_export_job", job_id=job.id)
+        return response, 202
+    
+    # Small exports stay in memory; large ones spill to disk
+    sink = tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024)
+    backend.write(user_id, export_type, sink)
+    sink.seek(0)
+    
+    return send_file(sink, mimetype=backend.mimetype, as_attachment=True,
+                     download_name=backend.filename(export_type, datetime.now()))
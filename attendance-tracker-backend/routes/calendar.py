@@ -2,6 +2,9 @@ from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from models import db, User, Subject, AttendanceLog, Task, Reminder
 from datetime import datetime, date, timedelta
+from services.aggregation import AttendanceAggregator
+from services.notifications import NotificationService
+from utils.calendar_utils import CalendarUtils
 import calendar
 
 calendar_bp = Blueprint("calendar", __name__)
@@ -404,11 +407,8 @@ def get_weekly_overview():
     end_of_week = start_of_week + timedelta(days=6)  # Sunday
     
     # Get attendance for the week
-    attendance_logs = AttendanceLog.query.join(Subject).filter(
-        Subject.user_id == user_id,
-        AttendanceLog.date >= start_of_week,
-        AttendanceLog.date <= end_of_week
-    ).all()
+    daily_entries = AttendanceAggregator.daily_entries(user_id, start_of_week, end_of_week)
+    daily_totals = AttendanceAggregator.entry_totals(daily_entries)
     
     # Get tasks for the week
     week_start_dt = datetime.combine(start_of_week, datetime.min.time())
@@ -434,25 +434,19 @@ def get_weekly_overview():
     
     while current_date <= end_of_week:
         day_key = current_date.strftime("%A").lower()
-        day_attendance = [log for log in attendance_logs if log.date == current_date]
+        day_present, day_total = daily_totals.get(current_date, (0, 0))
         day_tasks = [task for task in tasks if task.due_date.date() == current_date]
         day_reminders = [r for r in reminders if r.reminder_time.date() == current_date]
         
         weekly_data[day_key] = {
             "date": current_date.isoformat(),
             "day_name": current_date.strftime("%A"),
-            "attendance": [
-                {
-                    "subject": log.subject.name,
-                    "status": log.status,
-                    "notes": log.notes
-                } for log in day_attendance
-            ],
+            "attendance": daily_entries.get(current_date, []),
             "tasks": [task.to_dict() for task in day_tasks],
             "reminders": [reminder.to_dict() for reminder in day_reminders],
             "summary": {
-                "classes": len(day_attendance),
-                "present": len([log for log in day_attendance if log.status == "Present"]),
+                "classes": day_total,
+                "present": day_present,
                 "tasks_due": len(day_tasks),
                 "reminders": len(day_reminders)
             }
@@ -466,8 +460,8 @@ def get_weekly_overview():
             "end_date": end_of_week.isoformat(),
             "days": weekly_data,
             "weekly_summary": {
-                "total_classes": len(attendance_logs),
-                "total_present": len([log for log in attendance_logs if log.status == "Present"]),
+                "total_classes": sum(total for _, total in daily_totals.values()),
+                "total_present": sum(present for present, _ in daily_totals.values()),
                 "total_tasks": len(tasks),
                 "total_reminders": len(reminders)
             }
@@ -484,13 +478,6 @@ def get_month_overview(year, month):
     first_day = date(year, month, 1)
     last_day = date(year, month, calendar.monthrange(year, month)[1])
     
-    # Get attendance for the month
-    attendance_logs = AttendanceLog.query.join(Subject).filter(
-        Subject.user_id == user_id,
-        AttendanceLog.date >= first_day,
-        AttendanceLog.date <= last_day
-    ).all()
-    
     # Get tasks for the month
     month_start_dt = datetime.combine(first_day, datetime.min.time())
     month_end_dt = datetime.combine(last_day, datetime.max.time())
@@ -508,33 +495,14 @@ def get_month_overview(year, month):
         Task.due_date <= month_end_dt
     ).count()
     
+    # Subject-wise breakdown (read from the daily rollup, not raw logs)
+    subjects_breakdown = AttendanceAggregator.subject_breakdown(user_id, first_day, last_day)
+    
     # Calculate statistics
-    total_classes = len(attendance_logs)
-    present_classes = len([log for log in attendance_logs if log.status == "Present"])
+    total_classes = sum(item["total"] for item in subjects_breakdown)
+    present_classes = sum(item["present"] for item in subjects_breakdown)
     attendance_percentage = (present_classes / total_classes * 100) if total_classes > 0 else 0
     
-    # Subject-wise breakdown
-    subjects_data = {}
-    for log in attendance_logs:
-        subject_name = log.subject.name
-        if subject_name not in subjects_data:
-            subjects_data[subject_name] = {"total": 0, "present": 0}
-        
-        subjects_data[subject_name]["total"] += 1
-        if log.status == "Present":
-            subjects_data[subject_name]["present"] += 1
-    
-    # Convert to list with percentages
-    subjects_breakdown = []
-    for subject, data in subjects_data.items():
-        percentage = (data["present"] / data["total"] * 100) if data["total"] > 0 else 0
-        subjects_breakdown.append({
-            "subject": subject,
-            "total": data["total"],
-            "present": data["present"],
-            "percentage": round(percentage, 2)
-        })
-    
     return jsonify({
         "month_overview": {
             "year": year,
@@ -3,11 +3,13 @@ from flask_jwt_extended import jwt_required, get_jwt_identity
 from models import db, Reminder, Task, Subject
 from datetime import datetime, timedelta
 from sqlalchemy import and_, or_
+from utils.idempotency import idempotent
 
 reminders_bp = Blueprint("reminders", __name__)
 
 @reminders_bp.route("/", methods=["POST"])
 @jwt_required()
+@idempotent
 def create_reminder():
     """Create a new reminder"""
     data = request.json
@@ -138,6 +140,7 @@ def get_reminder(reminder_id):
 
 @reminders_bp.route("/<int:reminder_id>", methods=["PUT"])
 @jwt_required()
+@idempotent
 def update_reminder(reminder_id):
     """Update a reminder"""
     user_id = get_jwt_identity()
@@ -238,6 +241,7 @@ def get_due_reminders():
 
 @reminders_bp.route("/<int:reminder_id>/mark-sent", methods=["POST"])
 @jwt_required()
+@idempotent
 def mark_reminder_sent(reminder_id):
     """Mark a reminder as sent"""
     user_id = get_jwt_identity()
@@ -303,6 +307,7 @@ def get_upcoming_reminders():
 
 @reminders_bp.route("/bulk-create", methods=["POST"])
 @jwt_required()
+@idempotent
 def bulk_create_reminders():
     """Create multiple reminders at once"""
     data = request.json
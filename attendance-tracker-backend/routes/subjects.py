@@ -1,7 +1,9 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from models import db, Subject
-from datetime import datetime
+from services.subject_analytics import SubjectAnalytics
+from services.forecast import AttendanceForecaster, DEFAULT_SAMPLES
+from datetime import datetime, date
 
 subjects_bp = Blueprint("subjects", __name__)
 
@@ -159,154 +161,34 @@ def get_subjects_analytics():
     """Get comprehensive analytics for all subjects"""
     user_id = get_jwt_identity()
     
-    subjects = Subject.query.filter_by(user_id=user_id, is_archived=False).all()
-    
-    # Calculate overall statistics
-    total_subjects = len(subjects)
-    total_classes = sum(s.total_classes for s in subjects)
-    total_attended = sum(s.attended_classes for s in subjects)
-    overall_percentage = (total_attended / total_classes * 100) if total_classes > 0 else 0
-    
-    # Subjects below target
-    below_target = [s for s in subjects if s.attendance_percentage < s.target_percentage]
-    critical_subjects = [s for s in subjects if s.attendance_percentage < 60]
-    
-    # Subject performance categories
-    excellent = [s for s in subjects if s.attendance_percentage >= 90]
-    good = [s for s in subjects if 75 <= s.attendance_percentage < 90]
-    warning = [s for s in subjects if 60 <= s.attendance_percentage < 75]
-    critical = [s for s in subjects if s.attendance_percentage < 60]
-    
-    # Calculate weighted average (by credits)
-    total_credits = sum(s.credits for s in subjects if s.credits)
-    weighted_percentage = 0
-    if total_credits > 0:
-        weighted_percentage = sum(
-            s.attendance_percentage * s.credits for s in subjects if s.credits
-        ) / total_credits
-    
-    # Classes needed to reach targets
-    classes_needed = sum(s.classes_needed_for_target for s in below_target)
-    
-    # Type-wise breakdown
-    type_stats = {}
-    for subject_type in ["theory", "lab", "tutorial", "practical"]:
-        type_subjects = [s for s in subjects if s.type == subject_type]
-        if type_subjects:
-            type_total_classes = sum(s.total_classes for s in type_subjects)
-            type_attended = sum(s.attended_classes for s in type_subjects)
-            type_percentage = (type_attended / type_total_classes * 100) if type_total_classes > 0 else 0
-            
-            type_stats[subject_type] = {
-                "count": len(type_subjects),
-                "total_classes": type_total_classes,
-                "attended_classes": type_attended,
-                "percentage": round(type_percentage, 2),
-                "below_target": len([s for s in type_subjects if s.attendance_percentage < s.target_percentage])
-            }
-    
-    return jsonify({
-        "analytics": {
-            "summary": {
-                "total_subjects": total_subjects,
-                "total_classes": total_classes,
-                "total_attended": total_attended,
-                "overall_percentage": round(overall_percentage, 2),
-                "weighted_percentage": round(weighted_percentage, 2),
-                "subjects_below_target": len(below_target),
-                "critical_subjects": len(critical_subjects),
-                "classes_needed_for_targets": classes_needed
-            },
-            "performance_categories": {
-                "excellent": {
-                    "count": len(excellent),
-                    "subjects": [{"id": s.id, "name": s.name, "percentage": s.attendance_percentage} for s in excellent]
-                },
-                "good": {
-                    "count": len(good),
-                    "subjects": [{"id": s.id, "name": s.name, "percentage": s.attendance_percentage} for s in good]
-                },
-                "warning": {
-                    "count": len(warning),
-                    "subjects": [{"id": s.id, "name": s.name, "percentage": s.attendance_percentage} for s in warning]
-                },
-                "critical": {
-                    "count": len(critical),
-                    "subjects": [{"id": s.id, "name": s.name, "percentage": s.attendance_percentage} for s in critical]
-                }
-            },
-            "type_breakdown": type_stats,
-            "action_items": {
-                "immediate_attention": [
-                    {
-                        "id": s.id,
-                        "name": s.name,
-                        "percentage": s.attendance_percentage,
-                        "classes_needed": s.classes_needed_for_target,
-                        "can_afford_to_miss": s.can_afford_to_miss
-                    } for s in below_target
-                ]
-            }
-        }
-    })
+    return jsonify({"analytics": SubjectAnalytics.analytics(user_id)})
 
 @subjects_bp.route("/predictions", methods=["GET"])
 @jwt_required()
 def get_attendance_predictions():
-    """Get attendance predictions and recommendations"""
+    """Monte Carlo forecast of each subject's attendance at the end of the term"""
     user_id = get_jwt_identity()
     
-    subjects = Subject.query.filter_by(user_id=user_id, is_archived=False).all()
-    predictions = []
-    
-    for subject in subjects:
-        # Simple prediction based on current trend
-        if subject.total_classes >= 5:  # Need some history for prediction
-            current_percentage = subject.attendance_percentage
-            
-            # Predict based on different scenarios
-            scenarios = {
-                "maintain_current": {
-                    "description": "If you maintain current attendance pattern",
-                    "classes_to_predict": 20,
-                    "expected_attendance_rate": current_percentage / 100
-                },
-                "perfect_attendance": {
-                    "description": "If you attend all remaining classes",
-                    "classes_to_predict": 20,
-                    "expected_attendance_rate": 1.0
-                },
-                "skip_one_per_week": {
-                    "description": "If you skip one class per week",
-                    "classes_to_predict": 20,
-                    "expected_attendance_rate": 0.8
-                }
-            }
-            
-            subject_predictions = {"id": subject.id, "name": subject.name, "scenarios": {}}
-            
-            for scenario_name, scenario in scenarios.items():
-                future_classes = scenario["classes_to_predict"]
-                future_attended = int(future_classes * scenario["expected_attendance_rate"])
-                
-                final_total = subject.total_classes + future_classes
-                final_attended = subject.attended_classes + future_attended
-                final_percentage = (final_attended / final_total) * 100
-                
-                subject_predictions["scenarios"][scenario_name] = {
-                    "description": scenario["description"],
-                    "predicted_percentage": round(final_percentage, 2),
-                    "will_meet_target": final_percentage >= subject.target_percentage,
-                    "classes_predicted": future_classes,
-                    "attendance_rate": scenario["expected_attendance_rate"]
-                }
-            
-            predictions.append(subject_predictions)
-    
-    return jsonify({
-        "predictions": predictions,
-        "generated_at": datetime.utcnow().isoformat()
-    })
+    term_end = None
+    if request.args.get("term_end"):
+        try:
+            term_end = datetime.strptime(request.args["term_end"], "%Y-%m-%d").date()
+        except ValueError:
+            return jsonify({"error": "Invalid term_end format. Use YYYY-MM-DD"}), 400
+        if term_end < date.today():
+            return jsonify({"error": "term_end must not be in the past"}), 400
+    
+    try:
+        samples = int(request.args.get("samples", DEFAULT_SAMPLES))
+    except ValueError:
+        return jsonify({"error": "samples must be an integer"}), 400
+    if samples < 1:
+        return jsonify({"error": "samples must be at least 1"}), 400
+    
+    forecast = AttendanceForecaster.forecast(user_id, term_end=term_end, samples=samples)
+    forecast["generated_at"] = datetime.utcnow().isoformat()
+    
+    return jsonify(forecast)
 
 @subjects_bp.route("/recommendations", methods=["GET"])
 @jwt_required()
@@ -318,20 +200,22 @@ def get_recommendations():
     recommendations = []
     
     for subject in subjects:
+        metrics = subject.metrics
         subject_recommendations = []
         
         # Below target recommendations
-        if subject.attendance_percentage < subject.target_percentage:
-            classes_needed = subject.classes_needed_for_target
+        if not metrics.meets_target:
             subject_recommendations.append({
                 "type": "urgent",
-                "message": f"Attend the next {classes_needed} classes to reach {subject.target_percentage}% target",
+                "message": f"Attend the next {metrics.classes_needed} classes to reach {subject.target_percentage}% target"
+                if metrics.classes_needed is not None else
+                f"The {subject.target_percentage}% target can no longer be reached; attend every remaining class",
                 "action": "attend_consecutively",
                 "priority": "high"
             })
         
         # Critical subjects
-        elif subject.attendance_percentage < 60:
+        elif metrics.percentage < 60:
             subject_recommendations.append({
                 "type": "critical",
                 "message": "Your attendance is critically low. Consider speaking with your instructor.",
@@ -340,9 +224,9 @@ def get_recommendations():
             })
         
         # Good performance but room for improvement
-        elif 75 <= subject.attendance_percentage < 85:
-            can_miss = subject.can_afford_to_miss
-            if can_miss > 0:
+        elif 75 <= metrics.percentage < 85:
+            can_miss = metrics.can_afford_to_miss
+            if can_miss:
                 subject_recommendations.append({
                     "type": "info",
                     "message": f"You can afford to miss {can_miss} more classes while maintaining your target",
@@ -351,7 +235,7 @@ def get_recommendations():
                 })
         
         # Excellent performance
-        elif subject.attendance_percentage >= 90:
+        elif metrics.percentage >= 90:
             subject_recommendations.append({
                 "type": "success",
                 "message": "Excellent attendance! Keep up the good work.",
@@ -363,7 +247,7 @@ def get_recommendations():
             recommendations.append({
                 "subject_id": subject.id,
                 "subject_name": subject.name,
-                "current_percentage": subject.attendance_percentage,
+                "current_percentage": metrics.percentage,
                 "recommendations": subject_recommendations
             })
     
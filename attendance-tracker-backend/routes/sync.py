@@ -0,0 +1,25 @@
+from flask import Blueprint, request, jsonify, current_app
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from services.sync import SyncService, DEFAULT_TOMBSTONE_RETENTION_DAYS
+from utils.pagination import encode_sync_cursor, decode_sync_cursor
+
+sync_bp = Blueprint("sync", __name__)
+
+@sync_bp.route("", methods=["GET"])
+@jwt_required()
+def sync_changes():
+    """Subjects, attendance logs, tasks and reminders changed or deleted since a cursor"""
+    user_id = get_jwt_identity()
+    
+    since = None
+    if request.args.get("since"):
+        try:
+            since = decode_sync_cursor(request.args["since"])
+        except ValueError:
+            return jsonify({"error": "Invalid since cursor"}), 400
+    
+    retention_days = current_app.config.get("SYNC_TOMBSTONE_RETENTION_DAYS", DEFAULT_TOMBSTONE_RETENTION_DAYS)
+    changes, cursor = SyncService.changes(user_id, since, retention_days=retention_days)
+    changes["cursor"] = encode_sync_cursor(cursor)
+    
+    return jsonify(changes)
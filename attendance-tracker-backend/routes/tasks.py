@@ -3,11 +3,13 @@ from flask_jwt_extended import jwt_required, get_jwt_identity
 from models import db, Task, Subject
 from datetime import datetime, timedelta
 from sqlalchemy import and_, or_
+from utils.idempotency import idempotent
 
 tasks_bp = Blueprint("tasks", __name__)
 
 @tasks_bp.route("/", methods=["POST"])
 @jwt_required()
+@idempotent
 def create_task():
     """Create a new task"""
     data = request.json
@@ -138,6 +140,7 @@ def get_task(task_id):
 
 @tasks_bp.route("/<int:task_id>", methods=["PUT"])
 @jwt_required()
+@idempotent
 def update_task(task_id):
     """Update a task"""
     user_id = get_jwt_identity()
@@ -219,6 +222,7 @@ def delete_task(task_id):
 
 @tasks_bp.route("/bulk", methods=["PUT"])
 @jwt_required()
+@idempotent
 def bulk_update_tasks():
     """Bulk update tasks (mark multiple as complete, change priority, etc.)"""
     user_id = get_jwt_identity()
@@ -0,0 +1,321 @@
+from models import db, Subject, AttendanceLog, AttendanceDailyRollup, Task, Reminder
+from datetime import datetime, timedelta
+from sqlalchemy import func, case, select, and_, Integer, Float, Date
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import FunctionElement
+
+DAY_NAMES = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+
+
+class day_of_week(FunctionElement):
+    """Portable day-of-week expression (0 = Sunday ... 6 = Saturday)"""
+    type = Integer()
+    inherit_cache = True
+
+
+@compiles(day_of_week)
+def _compile_day_of_week(element, compiler, **kw):
+    return "EXTRACT(DOW FROM %s)" % compiler.process(element.clauses, **kw)
+
+
+@compiles(day_of_week, "sqlite")
+def _compile_day_of_week_sqlite(element, compiler, **kw):
+    return "CAST(strftime('%%w', %s) AS INTEGER)" % compiler.process(element.clauses, **kw)
+
+
+@compiles(day_of_week, "mysql")
+def _compile_day_of_week_mysql(element, compiler, **kw):
+    return "(DAYOFWEEK(%s) - 1)" % compiler.process(element.clauses, **kw)
+
+
+class day_of(FunctionElement):
+    """Portable calendar date of a DateTime expression"""
+    type = Date()
+    inherit_cache = True
+
+
+@compiles(day_of)
+def _compile_day_of(element, compiler, **kw):
+    return "CAST(%s AS DATE)" % compiler.process(element.clauses, **kw)
+
+
+@compiles(day_of, "sqlite")
+@compiles(day_of, "mysql")
+def _compile_day_of_function(element, compiler, **kw):
+    return "DATE(%s)" % compiler.process(element.clauses, **kw)
+
+
+class seconds_between(FunctionElement):
+    """Portable ``end - start`` in seconds for two DateTime expressions"""
+    type = Float()
+    inherit_cache = True
+
+
+@compiles(seconds_between)
+def _compile_seconds_between(element, compiler, **kw):
+    end, start = list(element.clauses)
+    return "EXTRACT(EPOCH FROM (%s - %s))" % (compiler.process(end, **kw), compiler.process(start, **kw))
+
+
+@compiles(seconds_between, "sqlite")
+def _compile_seconds_between_sqlite(element, compiler, **kw):
+    end, start = list(element.clauses)
+    return "((julianday(%s) - julianday(%s)) * 86400.0)" % (compiler.process(end, **kw), compiler.process(start, **kw))
+
+
+@compiles(seconds_between, "mysql")
+def _compile_seconds_between_mysql(element, compiler, **kw):
+    end, start = list(element.clauses)
+    return "TIMESTAMPDIFF(SECOND, %s, %s)" % (compiler.process(start, **kw), compiler.process(end, **kw))
+
+
+class AttendanceAggregator:
+    """Set-based aggregations backing the analytics dashboard.
+
+    Every method issues a single GROUP BY query, so the number of round
+    trips per dashboard stays fixed regardless of how much history a
+    user has. Attendance figures are read from AttendanceDailyRollup,
+    which keeps them O(days) rather than O(logs).
+    """
+
+    @staticmethod
+    def daily_trend(user_id, start_date, end_date):
+        """Present/total per day for the given (inclusive) date range"""
+        rows = db.session.query(
+            AttendanceDailyRollup.date,
+            func.sum(AttendanceDailyRollup.present_count).label("present"),
+            func.sum(AttendanceDailyRollup.present_count + AttendanceDailyRollup.absent_count).label("total")
+        ).filter(
+            AttendanceDailyRollup.user_id == user_id,
+            AttendanceDailyRollup.date >= start_date,
+            AttendanceDailyRollup.date <= end_date
+        ).group_by(AttendanceDailyRollup.date).order_by(AttendanceDailyRollup.date).all()
+
+        trend = []
+        for row in rows:
+            present, total = int(row.present), int(row.total)
+            if not total:
+                continue
+            trend.append({
+                "date": row.date.isoformat(),
+                "percentage": round(present / total * 100, 2),
+                "present": present,
+                "total": total
+            })
+        return trend
+
+    @staticmethod
+    def weekday_distribution(user_id):
+        """Present/total per weekday across the user's whole history"""
+        dow = day_of_week(AttendanceDailyRollup.date)
+        rows = db.session.query(
+            dow.label("dow"),
+            func.sum(AttendanceDailyRollup.present_count).label("present"),
+            func.sum(AttendanceDailyRollup.present_count + AttendanceDailyRollup.absent_count).label("total")
+        ).filter(
+            AttendanceDailyRollup.user_id == user_id
+        ).group_by(dow).all()
+
+        by_dow = {int(row.dow): (int(row.present), int(row.total)) for row in rows}
+
+        distribution = {}
+        for i, day_name in enumerate(DAY_NAMES):  # Monday = 0, Sunday = 6
+            present, total = by_dow.get((i + 1) % 7, (0, 0))
+            if total:
+                distribution[day_name] = {
+                    "percentage": round(present / total * 100, 2),
+                    "present": present,
+                    "total": total
+                }
+        return distribution
+
+    @staticmethod
+    def daily_entries(user_id, start_date, end_date):
+        """Per-class detail rows grouped by date, fetched as plain columns in one query"""
+        rows = db.session.query(
+            AttendanceLog.date,
+            Subject.name,
+            AttendanceLog.status,
+            AttendanceLog.notes
+        ).join(Subject).filter(
+            Subject.user_id == user_id,
+            AttendanceLog.date >= start_date,
+            AttendanceLog.date <= end_date
+        ).order_by(AttendanceLog.date, Subject.name).all()
+
+        entries = {}
+        for row in rows:
+            entries.setdefault(row.date, []).append({
+                "subject": row.name,
+                "status": row.status,
+                "notes": row.notes
+            })
+        return entries
+
+    @staticmethod
+    def entry_totals(entries):
+        """Map of date -> (present, total) counted from ``daily_entries``, so the counts match the lists"""
+        return {
+            day: (sum(1 for entry in day_entries if entry["status"] == "Present"), len(day_entries))
+            for day, day_entries in entries.items()
+        }
+
+    @staticmethod
+    def subject_breakdown(user_id, start_date, end_date):
+        """Present/total per subject name for the given (inclusive) date range"""
+        rows = db.session.query(
+            Subject.name,
+            func.sum(AttendanceDailyRollup.present_count).label("present"),
+            func.sum(AttendanceDailyRollup.present_count + AttendanceDailyRollup.absent_count).label("total")
+        ).join(Subject, Subject.id == AttendanceDailyRollup.subject_id).filter(
+            AttendanceDailyRollup.user_id == user_id,
+            AttendanceDailyRollup.date >= start_date,
+            AttendanceDailyRollup.date <= end_date
+        ).group_by(Subject.name).all()
+
+        breakdown = []
+        for row in rows:
+            present, total = int(row.present), int(row.total)
+            if total:
+                breakdown.append({
+                    "subject": row.name,
+                    "total": total,
+                    "present": present,
+                    "percentage": round(present / total * 100, 2)
+                })
+        return breakdown
+
+    @staticmethod
+    def subject_summary(user_id):
+        """Every subject with its counters and latest log, in one query.
+
+        The latest log per subject is picked with ROW_NUMBER() over the
+        user's logs and LEFT JOINed back, instead of one lookup per subject.
+        """
+        ranked = select(
+            AttendanceLog.subject_id,
+            AttendanceLog.date,
+            AttendanceLog.status,
+            func.row_number().over(
+                partition_by=AttendanceLog.subject_id,
+                order_by=(AttendanceLog.date.desc(), AttendanceLog.id.desc())
+            ).label("rank")
+        ).where(
+            AttendanceLog.subject_id.in_(select(Subject.id).where(Subject.user_id == user_id))
+        ).subquery()
+
+        rows = db.session.query(
+            Subject.id,
+            Subject.name,
+            Subject.type,
+            Subject.total_classes,
+            Subject.attended_classes,
+            ranked.c.date.label("last_date"),
+            ranked.c.status.label("last_status")
+        ).outerjoin(
+            ranked, and_(ranked.c.subject_id == Subject.id, ranked.c.rank == 1)
+        ).filter(
+            Subject.user_id == user_id
+        ).order_by(Subject.id).all()
+
+        subjects = []
+        overall_total = overall_attended = 0
+        for row in rows:
+            total, attended = row.total_classes or 0, row.attended_classes or 0
+            subjects.append({
+                "id": row.id,
+                "name": row.name,
+                "type": row.type,
+                "total_classes": total,
+                "attended_classes": attended,
+                "attendance_percentage": round(attended / total * 100, 2) if total else 0,
+                "last_attendance": {
+                    "date": row.last_date.isoformat() if row.last_date else None,
+                    "status": row.last_status
+                }
+            })
+            overall_total += total
+            overall_attended += attended
+
+        return {
+            "subjects": subjects,
+            "overall_stats": {
+                "total_classes": overall_total,
+                "attended_classes": overall_attended,
+                "attendance_percentage": round(overall_attended / overall_total * 100, 2) if overall_total else 0,
+                "total_subjects": len(subjects)
+            }
+        }
+
+    @staticmethod
+    def task_counters(user_id, now=None, completed_since=None):
+        """Total/pending/overdue/recently-completed task counts in one query"""
+        now = now or datetime.utcnow()
+        completed_since = completed_since or (now - timedelta(days=7))
+
+        row = db.session.query(
+            func.count(Task.id).label("total"),
+            func.coalesce(func.sum(case((Task.completed == False, 1), else_=0)), 0).label("pending"),
+            func.coalesce(func.sum(case(
+                ((Task.completed == False) & Task.due_date.isnot(None) & (Task.due_date < now), 1),
+                else_=0
+            )), 0).label("overdue"),
+            func.coalesce(func.sum(case(
+                ((Task.completed == True) & (Task.completed_at >= completed_since), 1),
+                else_=0
+            )), 0).label("completed_recently")
+        ).filter(Task.user_id == user_id).one()
+
+        return {
+            "total_tasks": int(row.total),
+            "pending_tasks": int(row.pending),
+            "overdue_tasks": int(row.overdue),
+            "completed_this_week": int(row.completed_recently)
+        }
+
+    @staticmethod
+    def time_sensitive_counters(user_id, now=None, completed_since=None):
+        """Overdue tasks, recently completed tasks and due reminders in one round trip"""
+        now = now or datetime.utcnow()
+        completed_since = completed_since or (now - timedelta(days=7))
+
+        overdue = db.session.query(func.count(Task.id)).filter(
+            Task.user_id == user_id,
+            Task.completed == False,
+            Task.due_date.isnot(None),
+            Task.due_date < now
+        ).scalar_subquery()
+        completed_recently = db.session.query(func.count(Task.id)).filter(
+            Task.user_id == user_id,
+            Task.completed == True,
+            Task.completed_at >= completed_since
+        ).scalar_subquery()
+        due_reminders = db.session.query(func.count(Reminder.id)).filter(
+            Reminder.user_id == user_id,
+            Reminder.reminder_time <= now,
+            Reminder.sent == False,
+            Reminder.active == True
+        ).scalar_subquery()
+
+        row = db.session.query(
+            overdue.label("overdue"),
+            completed_recently.label("completed_recently"),
+            due_reminders.label("due_reminders")
+        ).one()
+
+        return {
+            "overdue_tasks": int(row.overdue or 0),
+            "completed_this_week": int(row.completed_recently or 0),
+            "due_reminders": int(row.due_reminders or 0)
+        }
+
+    @staticmethod
+    def due_reminder_count(user_id, now=None):
+        """Number of active, unsent reminders whose time has passed"""
+        now = now or datetime.utcnow()
+        return db.session.query(func.count(Reminder.id)).filter(
+            Reminder.user_id == user_id,
+            Reminder.reminder_time <= now,
+            Reminder.sent == False,
+            Reminder.active == True
+        ).scalar() or 0
@@ -0,0 +1,211 @@
+from models import db, Subject
+from datetime import datetime, date
+from services.bulk_attendance import BulkAttendanceService
+from services.streaks import StreakService
+import csv
+import io
+
+IMPORT_CHUNK_SIZE = 1000  # rows validated and inserted per batch
+MAX_REPORTED_ERRORS = 500
+
+# Accepted header names per field (compared case-insensitively)
+COLUMN_ALIASES = {
+    "date": ("date", "class date", "day"),
+    "subject": ("subject", "subject name", "course"),
+    "status": ("status", "attendance"),
+    "notes": ("notes", "note", "remarks"),
+    "type": ("type", "subject type")
+}
+
+STATUS_VALUES = {
+    "present": "Present", "p": "Present", "yes": "Present", "y": "Present", "1": "Present", "true": "Present",
+    "absent": "Absent", "a": "Absent", "no": "Absent", "n": "Absent", "0": "Absent", "false": "Absent"
+}
+
+DATE_FORMATS = ("%Y-%m-%d", "%d/%m/%Y", "%d-%m-%Y", "%d.%m.%Y")
+SUBJECT_TYPES = ("theory", "lab", "tutorial", "practical")
+
+
+class ImportFileError(ValueError):
+    """A problem with the uploaded file as a whole (bad format, missing columns)"""
+
+
+def _normalize(value):
+    return " ".join(str(value or "").split()).lower()
+
+
+def _read_csv(stream):
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    for row in csv.reader(text):
+        yield row
+
+
+def _read_xlsx(stream):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ImportFileError("Excel import is not available on this server")
+    try:
+        workbook = load_workbook(stream, read_only=True, data_only=True)
+    except Exception:
+        raise ImportFileError("Could not read the Excel file")
+    try:
+        for row in workbook.active.iter_rows(values_only=True):
+            yield list(row)
+    finally:
+        workbook.close()
+
+
+class AttendanceImportService:
+    """Streams attendance history from a CSV or XLSX upload into AttendanceLog.
+
+    Rows are read one at a time (openpyxl read-only mode for Excel), mapped
+    to the user's subjects by name, validated, and inserted in chunks with
+    the bulk attendance writer. Subject counters are recomputed once for the
+    touched subjects at the end, and the whole import is one transaction.
+    """
+
+    @staticmethod
+    def run(user_id, stream, filename, columns=None, create_subjects=False, dry_run=False):
+        """Import a file and return a summary with an error report"""
+        extension = filename.rsplit(".", 1)[-1].lower() if "." in filename else ""
+        if extension == "csv":
+            rows = _read_csv(stream)
+        elif extension in ("xlsx", "xlsm"):
+            rows = _read_xlsx(stream)
+        else:
+            raise ImportFileError("Unsupported file type. Upload a .csv or .xlsx file")
+
+        header = next(rows, None)
+        if not header:
+            raise ImportFileError("The file is empty")
+        positions = AttendanceImportService.map_columns(header, columns or {})
+
+        subjects = {}
+        for subject in Subject.query.filter_by(user_id=user_id).order_by(Subject.is_archived, Subject.id):
+            subjects.setdefault(_normalize(subject.name), subject.id)
+
+        report = {"rows": 0, "imported": 0, "duplicates": 0, "invalid": 0, "subjects_created": [], "errors": []}
+        touched = set()
+        seen = set()
+        chunk = []
+
+        def error(line, message):
+            report["invalid"] += 1
+            if len(report["errors"]) < MAX_REPORTED_ERRORS:
+                report["errors"].append({"row": line, "error": message})
+
+        def flush():
+            keys = {(entry[0], entry[1]) for _, entry in chunk}
+            existing = BulkAttendanceService.existing_keys(keys)
+            logs = []
+            for _, entry in chunk:
+                if (entry[0], entry[1]) in existing:
+                    report["duplicates"] += 1
+                else:
+                    logs.append(entry)
+            if not dry_run:
+                BulkAttendanceService.insert_logs(user_id, logs)
+            touched.update(entry[0] for entry in logs)
+            report["imported"] += len(logs)
+            chunk.clear()
+
+        try:
+            for line, row in enumerate(rows, start=2):  # line 1 is the header
+                if not any(cell not in (None, "") for cell in row):
+                    continue
+                report["rows"] += 1
+
+                values = {field: (row[i] if i < len(row) else None) for field, i in positions.items()}
+                try:
+                    log_date = AttendanceImportService.parse_date(values["date"])
+                    status = AttendanceImportService.parse_status(values["status"])
+                except ValueError as e:
+                    error(line, str(e))
+                    continue
+
+                name = _normalize(values["subject"])
+                if not name:
+                    error(line, "Subject is required")
+                    continue
+                subject_id = subjects.get(name)
+                if subject_id is None:
+                    if not create_subjects:
+                        error(line, f"Unknown subject '{values['subject']}'")
+                        continue
+                    subject_type = _normalize(values.get("type"))
+                    subject = Subject(
+                        name=str(values["subject"]).strip()[:120],
+                        type=subject_type if subject_type in SUBJECT_TYPES else "theory",
+                        user_id=user_id
+                    )
+                    db.session.add(subject)
+                    db.session.flush()
+                    subject_id = subjects[name] = subject.id
+                    report["subjects_created"].append(subject.name)
+
+                key = (subject_id, log_date)
+                if key in seen:
+                    report["duplicates"] += 1
+                    continue
+                seen.add(key)
+
+                notes = values.get("notes")
+                chunk.append((line, (subject_id, log_date, status, str(notes).strip() if notes not in (None, "") else None)))
+                if len(chunk) >= IMPORT_CHUNK_SIZE:
+                    flush()
+
+            if chunk:
+                flush()
+
+            if dry_run:
+                db.session.rollback()
+            else:
+                BulkAttendanceService.recompute_counters(touched)
+                StreakService.recompute_many(touched)
+                db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        report["errors_truncated"] = report["invalid"] > len(report["errors"])
+        report["dry_run"] = dry_run
+        return report
+
+    @staticmethod
+    def map_columns(header, overrides):
+        """Position of each field in the header row; ``overrides`` maps field -> header name"""
+        names = [_normalize(cell) for cell in header]
+        positions = {}
+        for field, aliases in COLUMN_ALIASES.items():
+            candidates = (_normalize(overrides[field]),) if overrides.get(field) else aliases
+            for candidate in candidates:
+                if candidate in names:
+                    positions[field] = names.index(candidate)
+                    break
+
+        missing = [field for field in ("date", "subject", "status") if field not in positions]
+        if missing:
+            raise ImportFileError(f"Missing required column(s): {', '.join(missing)}")
+        return positions
+
+    @staticmethod
+    def parse_date(value):
+        if isinstance(value, datetime):
+            return value.date()
+        if isinstance(value, date):
+            return value
+        text = str(value or "").strip()
+        for fmt in DATE_FORMATS:
+            try:
+                return datetime.strptime(text, fmt).date()
+            except ValueError:
+                continue
+        raise ValueError(f"Invalid date '{text}'")
+
+    @staticmethod
+    def parse_status(value):
+        status = STATUS_VALUES.get(_normalize(value))
+        if status is None:
+            raise ValueError(f"Invalid status '{value}', expected Present or Absent")
+        return status
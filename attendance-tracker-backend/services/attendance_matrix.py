@@ -0,0 +1,89 @@
+from models import db, AttendanceLog
+import numpy as np
+
+
+class AttendanceMatrix:
+    """Compact, vectorized view of a set of attendance logs.
+
+    Logs are held as three parallel arrays sorted by subject and then newest
+    first: ``subject_index`` (position in ``subject_ids``), ``day`` (date
+    ordinal) and ``present`` (status bit). All aggregations are NumPy
+    reductions over those arrays, so cost is linear in the number of logs
+    with no per-row Python work.
+    """
+
+    def __init__(self, subject_ids, subject_index, day, present):
+        self.subject_ids = np.asarray(subject_ids, dtype=np.int64)
+        self.subject_index = np.asarray(subject_index, dtype=np.int64)
+        self.day = np.asarray(day, dtype=np.int64)
+        self.present = np.asarray(present, dtype=bool)
+
+        n_subjects = len(self.subject_ids)
+        self.group_size = np.bincount(self.subject_index, minlength=n_subjects)
+        self.group_start = np.cumsum(self.group_size) - self.group_size
+        # Position of each log within its subject, 0 = most recent
+        self.rank = np.arange(len(self.day)) - self.group_start[self.subject_index]
+
+    @classmethod
+    def from_subjects(cls, subject_ids, start_date=None, end_date=None):
+        """Load the logs of the given subjects in a single query"""
+        subject_ids = sorted(set(subject_ids))
+        if not subject_ids:
+            return cls([], [], [], [])
+
+        query = db.session.query(
+            AttendanceLog.subject_id,
+            AttendanceLog.date,
+            AttendanceLog.status
+        ).filter(AttendanceLog.subject_id.in_(subject_ids))
+        if start_date is not None:
+            query = query.filter(AttendanceLog.date >= start_date)
+        if end_date is not None:
+            query = query.filter(AttendanceLog.date <= end_date)
+        rows = query.order_by(
+            AttendanceLog.subject_id, AttendanceLog.date.desc(), AttendanceLog.id.desc()
+        ).all()
+
+        ids = np.asarray(subject_ids, dtype=np.int64)
+        raw_subjects = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+        day = np.fromiter((row[1].toordinal() for row in rows), dtype=np.int64, count=len(rows))
+        present = np.fromiter((row[2] == "Present" for row in rows), dtype=bool, count=len(rows))
+        return cls(ids, np.searchsorted(ids, raw_subjects), day, present)
+
+    @property
+    def n_subjects(self):
+        return len(self.subject_ids)
+
+    def subject_counts(self):
+        """(present, total) arrays per subject"""
+        present = np.bincount(self.subject_index, weights=self.present, minlength=self.n_subjects)
+        return present.astype(np.int64), self.group_size.copy()
+
+    def recent_counts(self, window):
+        """(present, total) per subject over each subject's last ``window`` classes"""
+        mask = self.rank < window
+        idx = self.subject_index[mask]
+        present = np.bincount(idx, weights=self.present[mask], minlength=self.n_subjects)
+        total = np.bincount(idx, minlength=self.n_subjects)
+        return present.astype(np.int64), total
+
+    def current_streaks(self):
+        """(is_present, length) of the run ending at each subject's latest class"""
+        has_logs = self.group_size > 0
+        latest = np.zeros(self.n_subjects, dtype=bool)
+        latest[has_logs] = self.present[self.group_start[has_logs]]
+
+        # A streak ends at the first (most recent-first) log whose status differs
+        mismatch = self.present != latest[self.subject_index]
+        length = self.group_size.copy()
+        np.minimum.at(length, self.subject_index[mismatch], self.rank[mismatch])
+        return latest, length
+
+    def weekday_counts(self):
+        """(present, total) arrays of shape (n_subjects, 7), Monday = 0"""
+        weekday = (self.day - 1) % 7  # ordinal 1 (0001-01-01) was a Monday
+        cell = self.subject_index * 7 + weekday
+        size = self.n_subjects * 7
+        present = np.bincount(cell, weights=self.present, minlength=size).astype(np.int64)
+        total = np.bincount(cell, minlength=size)
+        return present.reshape(self.n_subjects, 7), total.reshape(self.n_subjects, 7)
@@ -0,0 +1,231 @@
+from models import db, Subject, AttendanceLog
+from datetime import datetime, date
+from sqlalchemy import insert, update, tuple_, select, func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm.attributes import set_committed_value
+from services.rollup import RollupService
+from services.streaks import StreakService
+from services.dashboard import DashboardService, ATTENDANCE_SECTION
+from utils.db_utils import supports_upsert, upsert_insert, expire_loaded
+
+VALID_STATUSES = ("Present", "Absent")
+MAX_BULK_ENTRIES = 500  # entries accepted by one bulk marking request
+
+
+class BulkAttendanceService:
+    """Set-based attendance writes for batches of (subject, date, status) entries.
+
+    Ownership and duplicate checks are one query each for the whole batch,
+    logs go in with a single executemany INSERT, and every statement runs
+    in the caller's transaction, so a batch commits or rolls back as one.
+    """
+
+    @staticmethod
+    def parse_entry(entry, default_date=None):
+        """Validate one raw entry and return (subject_id, date, status, notes); raises ValueError"""
+        if not isinstance(entry, dict):
+            raise ValueError("Entry must be an object")
+        try:
+            subject_id = int(entry["subject_id"])
+        except (KeyError, TypeError, ValueError):
+            raise ValueError("A numeric subject_id is required")
+
+        status = entry.get("status")
+        if status not in VALID_STATUSES:
+            raise ValueError("Status must be 'Present' or 'Absent'")
+
+        log_date = default_date or date.today()
+        if entry.get("date"):
+            try:
+                log_date = datetime.strptime(str(entry["date"]), "%Y-%m-%d").date()
+            except ValueError:
+                raise ValueError("Invalid date format. Use YYYY-MM-DD")
+
+        notes = entry.get("notes")
+        return subject_id, log_date, status, (str(notes) if notes is not None else None)
+
+    @staticmethod
+    def owned_subject_ids(user_id, subject_ids):
+        """The subset of ``subject_ids`` that belong to the user"""
+        if not subject_ids:
+            return set()
+        rows = db.session.query(Subject.id).filter(
+            Subject.user_id == user_id,
+            Subject.id.in_(set(subject_ids))
+        ).all()
+        return {row.id for row in rows}
+
+    @staticmethod
+    def existing_keys(keys):
+        """The (subject_id, date) pairs among ``keys`` that already have a log"""
+        if not keys:
+            return set()
+        rows = db.session.query(AttendanceLog.subject_id, AttendanceLog.date).filter(
+            tuple_(AttendanceLog.subject_id, AttendanceLog.date).in_(list(keys))
+        ).all()
+        return {(row.subject_id, row.date) for row in rows}
+
+    @staticmethod
+    def insert_log_if_absent(user_id, subject_id, log_date, status, notes=None):
+        """Insert one log unless the subject already has one that day; returns the new id or None.
+
+        Relies on the unique (subject_id, date) index rather than a prior
+        SELECT, so two concurrent requests cannot both create a log.
+        """
+        values = {
+            "subject_id": subject_id,
+            "date": log_date,
+            "status": status,
+            "notes": notes,
+            "created_at": datetime.utcnow(),
+            "updated_at": datetime.utcnow()
+        }
+        bind = db.session.get_bind()
+
+        if supports_upsert(bind):
+            stmt = upsert_insert(AttendanceLog, bind).values(**values).on_conflict_do_nothing(
+                index_elements=["subject_id", "date"]
+            ).returning(AttendanceLog.id)
+            log_id = db.session.execute(stmt).scalar()
+        else:
+            try:
+                with db.session.begin_nested():
+                    log_id = db.session.execute(insert(AttendanceLog).values(**values)).inserted_primary_key[0]
+            except IntegrityError:
+                log_id = None
+
+        if log_id is not None:
+            RollupService.apply(user_id, subject_id, log_date, status)
+            DashboardService.record_log_insert(db.session, user_id, log_id, subject_id, log_date, status, notes)
+        return log_id
+
+    @staticmethod
+    def insert_logs(user_id, logs):
+        """Insert validated logs with one executemany and fold them into the rollup.
+
+        ``logs`` is a list of (subject_id, date, status, notes). Subject
+        counters are left to the caller.
+        """
+        if not logs:
+            return
+        now = datetime.utcnow()
+        db.session.execute(insert(AttendanceLog), [
+            {
+                "subject_id": subject_id,
+                "date": log_date,
+                "status": status,
+                "notes": notes,
+                "created_at": now
+            }
+            for subject_id, log_date, status, notes in logs
+        ])
+
+        counts = {}
+        for subject_id, log_date, status, _ in logs:
+            present, absent = counts.get((subject_id, log_date), (0, 0))
+            counts[(subject_id, log_date)] = (present + 1, absent) if status == "Present" else (present, absent + 1)
+        RollupService.apply_many(user_id, counts)
+
+        # Bulk statements bypass the ORM events that keep the dashboard current
+        DashboardService.mark_dirty(db.session, user_id, (ATTENDANCE_SECTION,))
+
+    @staticmethod
+    def adjust_counters(subject_id, total_delta=0, attended_delta=0):
+        """Atomically add to a subject's counters and return the new (total, attended).
+
+        The arithmetic happens in the UPDATE itself, so concurrent writers
+        never overwrite each other's increments the way a read-modify-write
+        of the loaded ``Subject`` would. A ``Subject`` already in the session
+        is given the new values, so later reads in the same transaction (the
+        dashboard refresh at commit) don't see the old counters.
+        """
+        stmt = update(Subject).where(Subject.id == subject_id).values(
+            total_classes=Subject.total_classes + total_delta,
+            attended_classes=Subject.attended_classes + attended_delta
+        ).execution_options(synchronize_session=False)
+
+        if db.session.get_bind().dialect.update_returning:
+            row = db.session.execute(stmt.returning(Subject.total_classes, Subject.attended_classes)).one()
+        else:
+            db.session.execute(stmt)
+            row = db.session.query(Subject.total_classes, Subject.attended_classes).filter(
+                Subject.id == subject_id
+            ).one()
+
+        subject = db.session.identity_map.get(db.session.identity_key(Subject, subject_id))
+        if subject is not None:
+            set_committed_value(subject, "total_classes", row.total_classes)
+            set_committed_value(subject, "attended_classes", row.attended_classes)
+        return row.total_classes, row.attended_classes
+
+    @staticmethod
+    def recompute_counters(subject_ids):
+        """Reset total/attended counters of the given subjects from their logs in one UPDATE"""
+        if not subject_ids:
+            return
+        total = select(func.count(AttendanceLog.id)).where(
+            AttendanceLog.subject_id == Subject.id
+        ).scalar_subquery()
+        attended = select(func.count(AttendanceLog.id)).where(
+            AttendanceLog.subject_id == Subject.id,
+            AttendanceLog.status == "Present"
+        ).scalar_subquery()
+        db.session.execute(
+            update(Subject).where(Subject.id.in_(set(subject_ids))).values(
+                total_classes=total,
+                attended_classes=attended
+            ).execution_options(synchronize_session=False)
+        )
+        expire_loaded(db.session, Subject, subject_ids, ["total_classes", "attended_classes"])
+
+    @staticmethod
+    def mark(user_id, entries):
+        """Mark a batch of entries and commit; returns per-entry results and subject stats"""
+        results = [None] * len(entries)
+        parsed = {}
+        for i, entry in enumerate(entries):
+            try:
+                parsed[i] = BulkAttendanceService.parse_entry(entry)
+            except ValueError as e:
+                results[i] = {"index": i, "status": "error", "error": str(e)}
+
+        owned = BulkAttendanceService.owned_subject_ids(user_id, [p[0] for p in parsed.values()])
+        candidates = {(p[0], p[1]) for p in parsed.values() if p[0] in owned}
+        existing = BulkAttendanceService.existing_keys(candidates)
+
+        to_insert = []
+        seen = set()
+        increments = {}
+        for i, (subject_id, log_date, status, notes) in parsed.items():
+            item = {"index": i, "subject_id": subject_id, "date": log_date.isoformat(), "attendance": status}
+            key = (subject_id, log_date)
+            if subject_id not in owned:
+                item.update({"status": "error", "error": "Subject not found"})
+            elif key in existing or key in seen:
+                item.update({"status": "duplicate", "error": "Attendance already marked for this date"})
+            else:
+                seen.add(key)
+                to_insert.append((subject_id, log_date, status, notes))
+                total, attended = increments.get(subject_id, (0, 0))
+                increments[subject_id] = (total + 1, attended + (status == "Present"))
+                item["status"] = "created"
+            results[i] = item
+
+        stats = []
+        try:
+            BulkAttendanceService.insert_logs(user_id, to_insert)
+            for subject_id, (total, attended) in sorted(increments.items()):
+                total_classes, attended_classes = BulkAttendanceService.adjust_counters(subject_id, total, attended)
+                stats.append({
+                    "subject_id": subject_id,
+                    "total_classes": total_classes,
+                    "attended_classes": attended_classes,
+                    "attendance_percentage": round(attended_classes / total_classes * 100, 2) if total_classes else 0
+                })
+            StreakService.recompute_many(increments.keys())
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        return results, stats
@@ -0,0 +1,102 @@
+from models import db, Subject, CohortStat
+from datetime import datetime
+import numpy as np
+
+COHORT_DIMENSIONS = ("subject", "semester", "type")
+PERCENTILES = (10, 25, 50, 75, 90)
+COHORT_BATCH_SIZE = 1000  # subject rows fetched per server-side cursor batch
+
+
+def _normalize(value):
+    """Group key for free-text values: case and whitespace insensitive"""
+    return " ".join((value or "").split()).lower()
+
+
+class CohortStatsService:
+    """Builds and serves the institution-wide ``CohortStat`` tables.
+
+    A refresh is one streaming pass over the per-subject attendance counters
+    (never ``AttendanceLog``); the distribution maths runs in NumPy and the
+    results replace the previous rows in a single short transaction, so
+    readers are never blocked by a long scan.
+    """
+
+    @staticmethod
+    def refresh():
+        """Recompute every cohort row and return the number stored"""
+        query = db.session.query(
+            Subject.user_id,
+            Subject.name,
+            Subject.semester,
+            Subject.type,
+            Subject.total_classes,
+            Subject.attended_classes,
+            Subject.target_percentage
+        ).filter(Subject.is_archived == False, Subject.total_classes > 0)
+
+        user_ids, totals, attended, targets = [], [], [], []
+        groups = {dimension: {} for dimension in COHORT_DIMENSIONS}
+        labels = {dimension: {} for dimension in COHORT_DIMENSIONS}
+        for i, row in enumerate(query.yield_per(COHORT_BATCH_SIZE)):
+            user_ids.append(row.user_id)
+            totals.append(row.total_classes)
+            attended.append(row.attended_classes)
+            targets.append(row.target_percentage if row.target_percentage is not None else 75.0)
+            for dimension, value in (("subject", row.name), ("semester", row.semester), ("type", row.type)):
+                key = _normalize(value) or "unspecified"
+                groups[dimension].setdefault(key, []).append(i)
+                labels[dimension].setdefault(key, (value or "").strip() or "Unspecified")
+
+        user_ids = np.asarray(user_ids, dtype=np.int64)
+        totals = np.asarray(totals, dtype=np.int64)
+        attended = np.asarray(attended, dtype=np.int64)
+        percentages = attended / np.maximum(totals, 1) * 100
+        at_risk = percentages < np.asarray(targets, dtype=np.float64)
+
+        now = datetime.utcnow()
+
+        def build(dimension, key, label, index):
+            pct = percentages[index]
+            bands = np.minimum((pct // 10).astype(np.int64), 9)
+            quantiles = np.percentile(pct, PERCENTILES) if len(index) else np.zeros(len(PERCENTILES))
+            return CohortStat(
+                dimension=dimension,
+                key=key,
+                label=label,
+                subject_count=int(len(index)),
+                student_count=int(len(np.unique(user_ids[index]))),
+                total_classes=int(totals[index].sum()),
+                attended_classes=int(attended[index].sum()),
+                mean_percentage=round(float(pct.mean()), 2) if len(index) else 0.0,
+                percentiles={f"p{p}": round(float(q), 2) for p, q in zip(PERCENTILES, quantiles)},
+                distribution=np.bincount(bands, minlength=10).tolist(),
+                at_risk_subjects=int(at_risk[index].sum()),
+                at_risk_students=int(len(np.unique(user_ids[index][at_risk[index]]))),
+                refreshed_at=now
+            )
+
+        rows = [build("overall", "all", "All subjects", np.arange(len(totals)))]
+        for dimension in COHORT_DIMENSIONS:
+            for key, index in groups[dimension].items():
+                rows.append(build(dimension, key, labels[dimension][key], np.asarray(index, dtype=np.int64)))
+
+        try:
+            CohortStat.query.delete()
+            db.session.add_all(rows)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        return len(rows)
+
+    @staticmethod
+    def get(dimension, min_students=1):
+        """Stored cohorts for one dimension, largest first"""
+        return CohortStat.query.filter(
+            CohortStat.dimension == dimension,
+            CohortStat.student_count >= min_students
+        ).order_by(CohortStat.student_count.desc(), CohortStat.key).all()
+
+    @staticmethod
+    def overall():
+        return db.session.get(CohortStat, ("overall", "all"))
@@ -0,0 +1,416 @@
+from models import db, Subject, AttendanceLog, Task, DashboardSnapshot
+from services.aggregation import AttendanceAggregator, DAY_NAMES
+from datetime import date, datetime, timedelta
+from sqlalchemy import event, func, case, inspect
+from sqlalchemy.orm import Session
+from utils.db_utils import supports_upsert, upsert_insert
+from utils.attendance_metrics import metrics_for
+
+ATTENDANCE_SECTION = "attendance"
+TASKS_SECTION = "tasks"
+RECENT_LOGS = 10
+AT_RISK_BELOW = 75
+CRITICAL_BELOW = 60
+
+_PENDING_KEY = "dashboard_snapshot_pending"
+
+
+class DashboardService:
+    """Write-maintained dashboard snapshots.
+
+    Attendance and subject writes are applied to the stored attendance
+    section as deltas inside the same commit: the one trend day and weekday
+    bucket a log falls on, the entries of the subjects involved, and the
+    recent logs. Bulk statements, subject deletions and task writes rebuild
+    the sections they touch instead. Reads serve the stored sections and
+    leave the time-sensitive fields (overdue counts, upcoming windows) to a
+    cheap overlay computed by the caller. Reminder fields are all
+    time-sensitive, so reminder writes never touch the snapshot.
+    """
+
+    @staticmethod
+    def get_snapshot(user_id, today=None):
+        """Return the user's snapshot sections, rebuilding any that are missing or stale"""
+        today = today or date.today()
+        snapshot = db.session.get(DashboardSnapshot, int(user_id))
+
+        sections = {}
+        if snapshot is None or snapshot.attendance is None or snapshot.computed_on != today:
+            sections[ATTENDANCE_SECTION] = DashboardService.build_attendance_section(user_id, today)
+            # Already includes anything this session flushed; don't apply it again at commit
+            _pending(db.session)["rebuilt"].add(int(user_id))
+        if snapshot is None or snapshot.tasks is None:
+            sections[TASKS_SECTION] = DashboardService.build_tasks_section(user_id)
+
+        if sections:
+            DashboardService._store(user_id, sections, today)
+            db.session.commit()
+
+        return {
+            ATTENDANCE_SECTION: sections.get(ATTENDANCE_SECTION, snapshot.attendance if snapshot else None),
+            TASKS_SECTION: sections.get(TASKS_SECTION, snapshot.tasks if snapshot else None)
+        }
+
+    @staticmethod
+    def refresh(user_id, sections, changes=None, today=None):
+        """Bring an existing snapshot up to date (no-op if none is stored yet).
+
+        ``sections`` are rebuilt in full; ``changes`` are applied to the
+        stored attendance section with ``apply_attendance_changes``. The
+        snapshot row is locked first so concurrent writers patch it in turn.
+        """
+        today = today or date.today()
+        stored = db.session.query(
+            DashboardSnapshot.attendance,
+            DashboardSnapshot.computed_on
+        ).filter_by(user_id=int(user_id)).with_for_update().first()
+        if stored is None:
+            return
+
+        built = {}
+        if ATTENDANCE_SECTION in sections:
+            built[ATTENDANCE_SECTION] = DashboardService.build_attendance_section(user_id, today)
+        elif changes and stored.attendance is not None and stored.computed_on == today:
+            # A section from an earlier day is rebuilt on the next read anyway
+            section = DashboardService.apply_attendance_changes(stored.attendance, user_id, changes, today)
+            if section is None:
+                section = DashboardService.build_attendance_section(user_id, today)
+            built[ATTENDANCE_SECTION] = section
+        if TASKS_SECTION in sections:
+            built[TASKS_SECTION] = DashboardService.build_tasks_section(user_id)
+        if built:
+            DashboardService._store(user_id, built, today)
+
+    @staticmethod
+    def mark_dirty(session, user_id, sections):
+        """Queue a full rebuild for writes that bypass the ORM (bulk INSERT/UPDATE statements)"""
+        _pending(session)["users"].setdefault(int(user_id), set()).update(sections)
+
+    @staticmethod
+    def record_log_insert(session, user_id, log_id, subject_id, log_date, status, notes=None):
+        """Queue the delta for one log inserted with a Core statement"""
+        pending = _pending(session)
+        pending["owners"][subject_id] = int(user_id)
+        pending["logs"].append((subject_id, log_date, status, 1))
+        pending["inserted"].append((log_id, subject_id, log_date, status, notes))
+        pending["subjects"].add(subject_id)
+
+    @staticmethod
+    def build_attendance_section(user_id, today):
+        """Attendance overview, at-risk subjects, charts and most recent logs"""
+        subjects = Subject.query.filter_by(user_id=user_id, is_archived=False).order_by(Subject.id).all()
+        metrics = metrics_for(subjects)
+        performance = [_performance_entry(s, metrics[s.id]) for s in subjects]
+
+        return {
+            "overview": _overview(performance),
+            "at_risk_subjects": [
+                _at_risk_entry(s, metrics[s.id]) for s in subjects if metrics[s.id].percentage < AT_RISK_BELOW
+            ],
+            "attendance_trend": AttendanceAggregator.daily_trend(
+                user_id, today - timedelta(days=30), today - timedelta(days=1)
+            ),
+            "weekly_distribution": AttendanceAggregator.weekday_distribution(user_id),
+            "subject_performance": performance,
+            "recent_logs": DashboardService.recent_logs(user_id)
+        }
+
+    @staticmethod
+    def apply_attendance_changes(section, user_id, changes, today):
+        """Patch a stored attendance section with the logs and subjects one commit changed.
+
+        ``changes`` holds the counted log deltas as (subject_id, date,
+        status, +1/-1), the inserted logs, the ids of the subjects involved
+        and whether an existing log was edited or removed. Only those
+        subjects are loaded; the trend and weekday figures are adjusted in
+        place. Returns None when the stored section predates the ids the
+        patch relies on, so the caller rebuilds it.
+        """
+        performance = section.get("subject_performance") or []
+        recent = section.get("recent_logs") or []
+        if any("id" not in entry for entry in performance) or any("subject_id" not in entry for entry in recent):
+            return None
+
+        trend = {entry["date"]: (entry["present"], entry["total"]) for entry in section["attendance_trend"]}
+        weekdays = {name: (entry["present"], entry["total"]) for name, entry in section["weekly_distribution"].items()}
+        first_day, last_day = today - timedelta(days=30), today - timedelta(days=1)
+        for _, log_date, status, delta in changes["logs"]:
+            present = delta if status == "Present" else 0
+            if first_day <= log_date <= last_day:
+                day_present, day_total = trend.get(log_date.isoformat(), (0, 0))
+                trend[log_date.isoformat()] = (day_present + present, day_total + delta)
+            day_name = DAY_NAMES[log_date.weekday()]
+            day_present, day_total = weekdays.get(day_name, (0, 0))
+            weekdays[day_name] = (day_present + present, day_total + delta)
+
+        subject_ids = changes["subjects"]
+        subjects = {}
+        if subject_ids:
+            # populate_existing: counters may have been changed by UPDATE statements in this transaction
+            subjects = {s.id: s for s in Subject.query.filter(
+                Subject.user_id == user_id,
+                Subject.id.in_(subject_ids)
+            ).populate_existing()}
+        active = [s for s in subjects.values() if not s.is_archived]
+        metrics = metrics_for(active)
+
+        by_id = {entry["id"]: entry for entry in performance}
+        at_risk = {entry["id"]: entry for entry in section["at_risk_subjects"]}
+        for subject_id in subject_ids:
+            by_id.pop(subject_id, None)
+            at_risk.pop(subject_id, None)
+        for s in active:
+            by_id[s.id] = _performance_entry(s, metrics[s.id])
+            if metrics[s.id].percentage < AT_RISK_BELOW:
+                at_risk[s.id] = _at_risk_entry(s, metrics[s.id])
+        performance = [by_id[subject_id] for subject_id in sorted(by_id)]
+
+        if changes["edited"] or any(subject_id not in subjects for _, subject_id, _, _, _ in changes["inserted"]):
+            # An edited or removed log may leave the list short, so read it again
+            recent = DashboardService.recent_logs(user_id)
+        else:
+            recent = [dict(entry) for entry in recent]
+            for entry in recent:
+                if entry["subject_id"] in subjects:
+                    entry["subject_name"] = subjects[entry["subject_id"]].name
+            for log_id, subject_id, log_date, status, notes in changes["inserted"]:
+                recent.append(_recent_entry(log_id, log_date, subject_id, subjects[subject_id].name, status, notes))
+            recent.sort(key=lambda entry: (entry["date"], entry["id"]), reverse=True)
+            del recent[RECENT_LOGS:]
+
+        return {
+            "overview": _overview(performance),
+            "at_risk_subjects": [at_risk[subject_id] for subject_id in sorted(at_risk)],
+            "attendance_trend": [
+                dict(date=day, **_rate(*trend[day])) for day in sorted(trend) if trend[day][1] > 0
+            ],
+            "weekly_distribution": {
+                day_name: _rate(*weekdays[day_name])
+                for day_name in DAY_NAMES if weekdays.get(day_name, (0, 0))[1] > 0
+            },
+            "subject_performance": performance,
+            "recent_logs": recent
+        }
+
+    @staticmethod
+    def recent_logs(user_id):
+        """The user's newest logs, newest first"""
+        rows = db.session.query(
+            AttendanceLog.id,
+            AttendanceLog.date,
+            AttendanceLog.subject_id,
+            Subject.name,
+            AttendanceLog.status,
+            AttendanceLog.notes
+        ).join(Subject).filter(
+            Subject.user_id == user_id
+        ).order_by(AttendanceLog.date.desc(), AttendanceLog.id.desc()).limit(RECENT_LOGS).all()
+        return [
+            _recent_entry(row.id, row.date, row.subject_id, row.name, row.status, row.notes) for row in rows
+        ]
+
+
+    @staticmethod
+    def build_tasks_section(user_id):
+        """Task totals that only change when a task is written"""
+        row = db.session.query(
+            func.count(Task.id).label("total"),
+            func.sum(case((Task.completed == False, 1), else_=0)).label("pending")
+        ).filter(Task.user_id == user_id).one()
+        return {"total_tasks": int(row.total), "pending_tasks": int(row.pending or 0)}
+
+    @staticmethod
+    def _store(user_id, sections, today):
+        values = dict(sections)
+        if ATTENDANCE_SECTION in sections:
+            values["computed_on"] = today
+
+        bind = db.session.get_bind()
+        if supports_upsert(bind):
+            stmt = upsert_insert(DashboardSnapshot, bind).values(user_id=int(user_id), **values)
+            stmt = stmt.on_conflict_do_update(index_elements=["user_id"], set_=values)
+            db.session.execute(stmt)
+            return
+
+        snapshot = db.session.get(DashboardSnapshot, int(user_id))
+        if snapshot is None:
+            snapshot = DashboardSnapshot(user_id=int(user_id))
+            db.session.add(snapshot)
+        for key, value in values.items():
+            setattr(snapshot, key, value)
+
+
+def _rate(present, total):
+    return {"percentage": round(present / total * 100, 2), "present": present, "total": total}
+
+
+def _overview(performance):
+    total_classes = sum(entry["total"] for entry in performance)
+    total_attended = sum(entry["attended"] for entry in performance)
+    overall_percentage = (total_attended / total_classes * 100) if total_classes > 0 else 0
+    return {
+        "total_subjects": len(performance),
+        "total_classes": total_classes,
+        "total_attended": total_attended,
+        "overall_percentage": round(overall_percentage, 2),
+        "at_risk_count": sum(1 for entry in performance if entry["percentage"] < AT_RISK_BELOW),
+        "critical_count": sum(1 for entry in performance if entry["percentage"] < CRITICAL_BELOW)
+    }
+
+
+def _performance_entry(subject, metrics):
+    return {
+        "id": subject.id,
+        "name": subject.name,
+        "type": subject.type,
+        "percentage": metrics.percentage,
+        "attended": subject.attended_classes,
+        "total": subject.total_classes,
+        "target": subject.target_percentage,
+        "status": metrics.status,
+        "color": subject.color
+    }
+
+
+def _at_risk_entry(subject, metrics):
+    return {
+        "id": subject.id,
+        "name": subject.name,
+        "percentage": metrics.percentage,
+        "classes_needed": metrics.classes_needed
+    }
+
+
+def _recent_entry(log_id, log_date, subject_id, subject_name, status, notes):
+    return {
+        "id": log_id,
+        "date": log_date.isoformat(),
+        "subject_id": subject_id,
+        "subject_name": subject_name,
+        "status": status,
+        "notes": notes
+    }
+
+
+def _as_date(value):
+    return value.date() if isinstance(value, datetime) else value
+
+
+def _pending(session):
+    return session.info.setdefault(_PENDING_KEY, {
+        "users": {},        # user id -> sections to rebuild in full
+        "logs": [],         # (subject_id, date, status, +1/-1) per counted log change
+        "inserted": [],     # (log_id, subject_id, date, status, notes) per new log
+        "subjects": set(),  # subjects whose entries need replacing
+        "edited": set(),    # subjects with an edited or removed log
+        "unknown": set(),   # subjects with a log change that couldn't be read; owner gets a rebuild
+        "owners": {},       # subject id -> user id, where already known
+        "rebuilt": set()    # users whose attendance section was rebuilt in this transaction
+    })
+
+
+def init_snapshot_tracking():
+    """Hook the ORM so committed writes refresh the affected snapshot sections"""
+    if event.contains(Session, "after_flush", _collect_dirty_sections):
+        return
+    event.listen(Session, "after_flush", _collect_dirty_sections)
+    event.listen(Session, "before_commit", _refresh_dirty_sections)
+    event.listen(Session, "after_rollback", _discard_dirty_sections)
+
+
+def _collect_dirty_sections(session, flush_context):
+    # Runs before the flush resets attribute history, so the old values are still readable
+    pending = _pending(session)
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, AttendanceLog):
+            _collect_log_change(session, pending, obj)
+        elif isinstance(obj, Subject) and obj.user_id is not None:
+            pending["owners"][obj.id] = int(obj.user_id)
+            if obj in session.deleted:
+                # Its logs and rollups go with it
+                pending["users"].setdefault(int(obj.user_id), set()).add(ATTENDANCE_SECTION)
+            else:
+                pending["subjects"].add(obj.id)
+        elif isinstance(obj, Task) and obj.user_id is not None:
+            pending["users"].setdefault(int(obj.user_id), set()).add(TASKS_SECTION)
+
+
+def _collect_log_change(session, pending, log):
+    if log in session.new:
+        log_date = _as_date(log.date)
+        pending["logs"].append((log.subject_id, log_date, log.status, 1))
+        pending["inserted"].append((log.id, log.subject_id, log_date, log.status, log.notes))
+        pending["subjects"].add(log.subject_id)
+        return
+
+    state = inspect(log)
+    old = tuple(_committed_value(state, key) for key in ("subject_id", "date", "status"))
+    if None in old:
+        pending["unknown"].add(old[0] if old[0] is not None else log.subject_id)
+        return
+    pending["subjects"].add(old[0])
+    pending["edited"].add(old[0])
+    if log in session.deleted:
+        pending["logs"].append(old + (-1,))
+        return
+
+    new = (log.subject_id, _as_date(log.date), log.status)
+    if new != old:
+        pending["logs"].extend([old + (-1,), new + (1,)])
+        pending["subjects"].add(log.subject_id)
+        pending["edited"].add(log.subject_id)
+
+
+def _committed_value(state, key):
+    """Value of ``key`` as last loaded from the database, or None when it was never loaded"""
+    history = state.attrs[key].history
+    values = history.deleted or history.unchanged
+    return _as_date(values[0]) if values else None
+
+
+def _refresh_dirty_sections(session):
+    session.flush()
+    pending = session.info.pop(_PENDING_KEY, None)
+    if not pending:
+        return
+
+    owners = pending["owners"]
+    unresolved = (pending["subjects"] | pending["unknown"]) - set(owners) - {None}
+    if unresolved:
+        rows = session.query(Subject.id, Subject.user_id).filter(Subject.id.in_(unresolved))
+        owners.update((row.id, int(row.user_id)) for row in rows)
+
+    rebuild = pending["users"]
+    for subject_id in pending["unknown"]:
+        if subject_id in owners:
+            rebuild.setdefault(owners[subject_id], set()).add(ATTENDANCE_SECTION)
+
+    changes = {}
+
+    def changes_for(subject_id):
+        user_id = owners.get(subject_id)
+        if user_id is None or user_id in pending["rebuilt"]:
+            return None
+        return changes.setdefault(user_id, {"logs": [], "inserted": [], "subjects": set(), "edited": False})
+
+    for change in pending["logs"]:
+        user_changes = changes_for(change[0])
+        if user_changes is not None:
+            user_changes["logs"].append(change)
+    for inserted in pending["inserted"]:
+        user_changes = changes_for(inserted[1])
+        if user_changes is not None:
+            user_changes["inserted"].append(inserted)
+    for subject_id in pending["subjects"]:
+        user_changes = changes_for(subject_id)
+        if user_changes is not None:
+            user_changes["subjects"].add(subject_id)
+            user_changes["edited"] = user_changes["edited"] or subject_id in pending["edited"]
+
+    for user_id in set(rebuild) | set(changes):
+        DashboardService.refresh(user_id, rebuild.get(user_id, ()), changes.get(user_id))
+    session.info.pop(_PENDING_KEY, None)
+
+
+def _discard_dirty_sections(session):
+    session.info.pop(_PENDING_KEY, None)
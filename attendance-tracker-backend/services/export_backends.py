@@ -0,0 +1,79 @@
+import importlib
+import importlib.util
+import threading
+
+
+class ExportBackend:
+    """An export format whose implementation is imported on first use.
+
+    ``target`` is a ``"module:function"`` path to a writer with the signature
+    ``writer(user_id, export_type, sink)`` that writes the file to the binary
+    ``sink``. Nothing is imported until ``load`` is called, so heavy
+    dependencies (ReportLab, openpyxl, pyarrow) stay out of worker startup.
+    """
+
+    def __init__(self, name, extension, mimetype, target, export_types, requires=()):
+        self.name = name
+        self.extension = extension
+        self.mimetype = mimetype
+        self.target = target
+        self.export_types = tuple(export_types)
+        self.requires = tuple(requires)
+        self._writer = None
+        self._lock = threading.Lock()
+
+    def available(self):
+        """Whether the optional dependencies are installed (checked without importing them)"""
+        return all(importlib.util.find_spec(module) is not None for module in self.requires)
+
+    def load(self):
+        """Import and cache the writer"""
+        if self._writer is None:
+            with self._lock:
+                if self._writer is None:
+                    module_name, func_name = self.target.split(":")
+                    self._writer = getattr(importlib.import_module(module_name), func_name)
+        return self._writer
+
+    def write(self, user_id, export_type, sink):
+        self.load()(user_id, export_type, sink)
+
+    def filename(self, export_type, timestamp):
+        return f"{export_type}_export_{timestamp.strftime('%Y%m%d_%H%M%S')}.{self.extension}"
+
+
+EXPORT_BACKENDS = {}
+
+DATA_EXPORT_TYPES = ("attendance", "subjects", "tasks")
+
+
+def register_backend(backend):
+    """Add (or replace) an export backend"""
+    EXPORT_BACKENDS[backend.name] = backend
+    return backend
+
+
+def get_backend(name):
+    return EXPORT_BACKENDS.get(name)
+
+
+register_backend(ExportBackend(
+    "csv", "csv", "text/csv",
+    "services.exports:write_csv", DATA_EXPORT_TYPES
+))
+register_backend(ExportBackend(
+    "xlsx", "xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "services.exports:write_xlsx", DATA_EXPORT_TYPES, requires=("openpyxl",)
+))
+register_backend(ExportBackend(
+    "parquet", "parquet", "application/vnd.apache.parquet",
+    "services.exports:write_parquet", DATA_EXPORT_TYPES, requires=("pyarrow",)
+))
+register_backend(ExportBackend(
+    "arrow", "arrow", "application/vnd.apache.arrow.file",
+    "services.exports:write_arrow", DATA_EXPORT_TYPES, requires=("pyarrow",)
+))
+register_backend(ExportBackend(
+    "pdf", "pdf", "application/pdf",
+    "services.reports:write_attendance_report_to", ("attendance",), requires=("reportlab",)
+))
@@ -0,0 +1,182 @@
+from flask import current_app
+from models import db, User, Subject, ExportJob
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from utils.attendance_metrics import metrics_for
+import hashlib
+import json
+import logging
+import os
+import threading
+import uuid
+
+PDF_REPORT = "pdf_report"
+DEFAULT_JOB_TIMEOUT = 600  # seconds a job may stay queued before it is considered lost
+DEFAULT_JOB_TTL = 24 * 3600  # seconds a rendered export is kept
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor(max_workers):
+    """Process pool shared by all export jobs in this worker process"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(max_workers=max_workers)
+        return _executor
+
+
+class ExportJobService:
+    """Queue PDF reports onto a bounded process pool and track them as ExportJob rows.
+
+    Jobs stay ``queued`` until the render finishes, then move to
+    ``completed`` or ``failed``. A job still queued after
+    ``EXPORT_JOB_TIMEOUT`` seconds (its pool or worker process died, or the
+    server restarted before it ran) is marked ``failed``, so the report can
+    be submitted again. Jobs expire ``EXPORT_JOB_TTL`` seconds after they
+    were submitted: their file is no longer served, and
+    ``flask purge-export-jobs`` deletes the rows and files.
+    """
+
+    @staticmethod
+    def fail_stale_jobs(user_id, timeout=None):
+        """Mark the user's jobs queued for longer than ``timeout`` seconds as failed; returns how many"""
+        if timeout is None:
+            timeout = current_app.config.get("EXPORT_JOB_TIMEOUT", DEFAULT_JOB_TIMEOUT)
+        now = datetime.utcnow()
+        failed = ExportJob.query.filter(
+            ExportJob.user_id == user_id,
+            ExportJob.status == "queued",
+            ExportJob.created_at < now - timedelta(seconds=timeout)
+        ).update({
+            ExportJob.status: "failed",
+            ExportJob.error: "Export job timed out before it finished",
+            ExportJob.completed_at: now
+        }, synchronize_session="fetch")
+        if failed:
+            db.session.commit()
+        return failed
+
+    @staticmethod
+    def is_expired(job, now=None):
+        """True once ``job`` is older than EXPORT_JOB_TTL (its file may already be purged)"""
+        ttl = current_app.config.get("EXPORT_JOB_TTL", DEFAULT_JOB_TTL)
+        return job.created_at < (now or datetime.utcnow()) - timedelta(seconds=ttl)
+
+    @staticmethod
+    def purge(ttl=DEFAULT_JOB_TTL, now=None):
+        """Delete jobs older than ``ttl`` seconds and their files; returns how many jobs were removed"""
+        cutoff = (now or datetime.utcnow()) - timedelta(seconds=ttl)
+        expired = ExportJob.query.filter(ExportJob.created_at < cutoff)
+        for (file_path,) in expired.with_entities(ExportJob.file_path).filter(ExportJob.file_path.isnot(None)):
+            try:
+                os.remove(file_path)
+            except FileNotFoundError:
+                pass
+        removed = expired.delete(synchronize_session=False)
+        db.session.commit()
+        return removed
+
+    @staticmethod
+    def collect_report_data(user_id):
+        """Snapshot everything the report needs as plain, picklable data"""
+        user = User.query.get(user_id)
+        subjects = Subject.query.filter_by(user_id=user_id, is_archived=False).order_by(Subject.id).all()
+        metrics = metrics_for(subjects)
+
+        return {
+            "user": {"name": user.name, "email": user.email},
+            "generated_at": datetime.now().strftime('%B %d, %Y at %I:%M %p'),
+            "subjects": [
+                {
+                    "name": s.name,
+                    "type": s.type,
+                    "attended": s.attended_classes,
+                    "total": s.total_classes,
+                    "percentage": metrics[s.id].percentage,
+                    "target": s.target_percentage,
+                    "classes_needed": metrics[s.id].classes_needed
+                } for s in subjects
+            ]
+        }
+
+    @staticmethod
+    def fingerprint(report):
+        """Hash of the report's source data (the generation timestamp is ignored)"""
+        source = {key: value for key, value in report.items() if key != "generated_at"}
+        return hashlib.sha256(json.dumps(source, sort_keys=True, default=str).encode()).hexdigest()
+
+    @staticmethod
+    def submit_pdf_report(user_id):
+        """Queue a PDF report, reusing an existing live job when the data has not changed"""
+        ExportJobService.fail_stale_jobs(user_id)
+        report = ExportJobService.collect_report_data(user_id)
+        fingerprint = ExportJobService.fingerprint(report)
+
+        existing = ExportJob.query.filter(
+            ExportJob.user_id == user_id,
+            ExportJob.kind == PDF_REPORT,
+            ExportJob.fingerprint == fingerprint,
+            ExportJob.status.in_(["queued", "completed"])
+        ).order_by(ExportJob.created_at.desc()).first()
+
+        if existing and ExportJobService.is_expired(existing):
+            existing = None
+        if existing and (existing.status != "completed" or os.path.exists(existing.file_path)):
+            return existing, False
+
+        job = ExportJob(
+            id=str(uuid.uuid4()),
+            user_id=user_id,
+            kind=PDF_REPORT,
+            status="queued",
+            fingerprint=fingerprint,
+            filename=f"attendance_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
+        )
+        job.file_path = os.path.join(ExportJobService.export_folder(), f"{job.id}.pdf")
+        db.session.add(job)
+        db.session.commit()
+
+        from services.reports import write_attendance_report
+
+        app = current_app._get_current_object()
+        executor = get_executor(app.config.get("EXPORT_WORKERS", 2))
+        try:
+            future = executor.submit(write_attendance_report, report, job.file_path)
+        except RuntimeError as e:  # pool shut down or broken
+            job.status = "failed"
+            job.error = str(e)
+            job.completed_at = datetime.utcnow()
+            db.session.commit()
+            return job, True
+
+        future.add_done_callback(lambda f, job_id=job.id: ExportJobService._finish(app, job_id, f))
+        return job, True
+
+    @staticmethod
+    def export_folder():
+        """Directory under UPLOAD_FOLDER holding rendered exports (created on demand)"""
+        folder = os.path.join(current_app.root_path, current_app.config["UPLOAD_FOLDER"], "exports")
+        os.makedirs(folder, exist_ok=True)
+        return folder
+
+    @staticmethod
+    def _finish(app, job_id, future):
+        """Record the outcome of a render (runs on the executor's callback thread)"""
+        with app.app_context():
+            try:
+                job = db.session.get(ExportJob, job_id)
+                if job is None:
+                    return
+                error = future.exception()
+                if error is None:
+                    job.status = "completed"
+                else:
+                    logging.error(f"Export job {job_id} failed: {error}")
+                    job.status = "failed"
+                    job.error = str(error)
+                job.completed_at = datetime.utcnow()
+                db.session.commit()
+            finally:
+                db.session.remove()
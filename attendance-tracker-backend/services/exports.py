@@ -0,0 +1,191 @@
+from models import db, Subject, AttendanceLog, Task
+from datetime import date
+import csv
+from io import StringIO
+
+EXPORT_BATCH_SIZE = 500  # rows fetched per server-side cursor batch
+
+EXPORT_COLUMNS = {
+    "attendance": ['Date', 'Subject', 'Type', 'Status', 'Notes'],
+    "subjects": ['Name', 'Type', 'Total Classes', 'Attended Classes', 'Attendance Percentage',
+                 'Target Percentage', 'Classes Needed', 'Credits', 'Semester'],
+    "tasks": ['Title', 'Description', 'Due Date', 'Completed', 'Priority', 'Category',
+              'Created At', 'Completed At']
+}
+
+# Logical column types, mapped to Arrow types for columnar exports
+EXPORT_COLUMN_TYPES = {
+    "attendance": ['date', 'string', 'string', 'string', 'string'],
+    "subjects": ['string', 'string', 'int', 'int', 'float', 'float', 'float', 'int', 'string'],
+    "tasks": ['string', 'string', 'timestamp', 'bool', 'string', 'string', 'timestamp', 'timestamp']
+}
+
+
+class ExportService:
+    """Row sources plus CSV and columnar (Parquet/Arrow) encoding shared by the export endpoints"""
+
+    @staticmethod
+    def iter_rows(user_id, export_type, batch_size=EXPORT_BATCH_SIZE):
+        """Yield export rows as tuples of native values, fetched in batches from a server-side cursor"""
+        if export_type == "attendance":
+            query = db.session.query(
+                AttendanceLog.date,
+                Subject.name,
+                Subject.type,
+                AttendanceLog.status,
+                AttendanceLog.notes
+            ).join(Subject).filter(
+                Subject.user_id == user_id
+            ).order_by(AttendanceLog.date, AttendanceLog.id)
+            for row in query.yield_per(batch_size):
+                yield tuple(row)
+
+        elif export_type == "subjects":
+            query = Subject.query.filter_by(user_id=user_id).order_by(Subject.id)
+            for subject in query.yield_per(batch_size):
+                metrics = subject.metrics
+                yield (
+                    subject.name,
+                    subject.type,
+                    subject.total_classes,
+                    subject.attended_classes,
+                    metrics.percentage,
+                    subject.target_percentage,
+                    metrics.classes_needed,
+                    subject.credits,
+                    subject.semester
+                )
+
+        elif export_type == "tasks":
+            query = db.session.query(
+                Task.title,
+                Task.description,
+                Task.due_date,
+                Task.completed,
+                Task.priority,
+                Task.category,
+                Task.created_at,
+                Task.completed_at
+            ).filter(Task.user_id == user_id).order_by(Task.id)
+            for row in query.yield_per(batch_size):
+                yield tuple(row)
+
+        else:
+            raise ValueError(f"Invalid export type: {export_type}")
+
+    @staticmethod
+    def iter_csv(user_id, export_type, rows_per_chunk=EXPORT_BATCH_SIZE):
+        """Yield the export as CSV text chunks of roughly ``rows_per_chunk`` rows"""
+        buffer = StringIO()
+        writer = csv.writer(buffer, lineterminator="\n")
+        writer.writerow(EXPORT_COLUMNS[export_type])
+
+        pending = 0
+        for row in ExportService.iter_rows(user_id, export_type):
+            writer.writerow([ExportService._csv_value(value) for value in row])
+            pending += 1
+            if pending >= rows_per_chunk:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate(0)
+                pending = 0
+
+        yield buffer.getvalue()
+
+    @staticmethod
+    def _csv_value(value):
+        if value is None:
+            return ''
+        if isinstance(value, date):  # also covers datetime
+            return value.isoformat()
+        return value
+
+    @staticmethod
+    def iter_record_batches(user_id, export_type, batch_size=EXPORT_BATCH_SIZE):
+        """Yield the export as Arrow record batches of up to ``batch_size`` rows"""
+        schema = ExportService.arrow_schema(export_type)
+        batch = []
+        for row in ExportService.iter_rows(user_id, export_type, batch_size):
+            batch.append(row)
+            if len(batch) >= batch_size:
+                yield ExportService._to_record_batch(batch, schema)
+                batch = []
+        if batch:
+            yield ExportService._to_record_batch(batch, schema)
+
+    @staticmethod
+    def arrow_schema(export_type):
+        """Arrow schema for an export type, built from EXPORT_COLUMN_TYPES"""
+        import pyarrow as pa
+
+        arrow_types = {
+            'string': pa.string(),
+            'int': pa.int64(),
+            'float': pa.float64(),
+            'bool': pa.bool_(),
+            'date': pa.date32(),
+            'timestamp': pa.timestamp('us')
+        }
+        return pa.schema([
+            (name, arrow_types[kind])
+            for name, kind in zip(EXPORT_COLUMNS[export_type], EXPORT_COLUMN_TYPES[export_type])
+        ])
+
+    @staticmethod
+    def write_columnar(user_id, export_type, fmt, sink):
+        """Write the export to ``sink`` as Parquet or Arrow IPC, one record batch at a time"""
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        schema = ExportService.arrow_schema(export_type)
+        if fmt == "parquet":
+            writer = pq.ParquetWriter(sink, schema, compression="snappy")
+        elif fmt == "arrow":
+            writer = pa.ipc.new_file(sink, schema)
+        else:
+            raise ValueError(f"Invalid columnar format: {fmt}")
+
+        with writer:
+            for batch in ExportService.iter_record_batches(user_id, export_type):
+                writer.write_batch(batch)
+
+    @staticmethod
+    def write_xlsx(user_id, export_type, sink):
+        """Write the export as an Excel workbook using openpyxl's streaming write-only mode"""
+        from openpyxl import Workbook
+
+        workbook = Workbook(write_only=True)
+        sheet = workbook.create_sheet(title=export_type.title())
+        sheet.append(EXPORT_COLUMNS[export_type])
+        for row in ExportService.iter_rows(user_id, export_type):
+            sheet.append(row)
+        workbook.save(sink)
+
+    @staticmethod
+    def _to_record_batch(rows, schema):
+        import pyarrow as pa
+
+        columns = list(zip(*rows))
+        return pa.RecordBatch.from_arrays(
+            [pa.array(column, type=field.type) for column, field in zip(columns, schema)],
+            schema=schema
+        )
+
+
+# Writers registered in services.export_backends: writer(user_id, export_type, sink)
+
+def write_csv(user_id, export_type, sink):
+    for chunk in ExportService.iter_csv(user_id, export_type):
+        sink.write(chunk.encode())
+
+
+def write_xlsx(user_id, export_type, sink):
+    ExportService.write_xlsx(user_id, export_type, sink)
+
+
+def write_parquet(user_id, export_type, sink):
+    ExportService.write_columnar(user_id, export_type, "parquet", sink)
+
+
+def write_arrow(user_id, export_type, sink):
+    ExportService.write_columnar(user_id, export_type, "arrow", sink)
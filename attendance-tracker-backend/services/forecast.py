@@ -0,0 +1,127 @@
+from models import Subject
+from services.attendance_matrix import AttendanceMatrix
+from services.timeseries import bucket_start, next_bucket
+from datetime import date, timedelta
+import numpy as np
+
+DEFAULT_SAMPLES = 10000
+MAX_SAMPLES = 50000
+MIN_CLASSES_FOR_FORECAST = 5
+RECENCY_HALF_LIFE = 10  # classes; a log this many classes back counts half as much as the latest
+WEEKDAY_SHRINKAGE = 5  # pseudo-classes pulling each weekday rate towards the subject's overall rate
+SCHEDULE_WEEKS = 8  # recent weeks used to infer which weekdays a subject meets on
+BAND_PERCENTILES = (5, 25, 50, 75, 95)
+_RATE_CLIP = (0.01, 0.99)
+
+
+def default_term_end(today=None):
+    """Last day of the current semester (half-year terms, see services/timeseries.py)"""
+    today = today or date.today()
+    return next_bucket(bucket_start(today, "semester"), "semester") - timedelta(days=1)
+
+
+def _logit(p):
+    return np.log(p / (1 - p))
+
+
+class AttendanceForecaster:
+    """Monte Carlo forecast of end-of-term attendance for all of a user's subjects.
+
+    Each subject is fitted from one scan of its logs (``AttendanceMatrix``):
+    a Beta posterior over its attendance rate built from recency-weighted
+    classes, log-odds weekday effects shrunk towards that rate, and the
+    number of classes left per weekday inferred from its recent timetable.
+    All futures are then drawn at once: a rate per subject and sample, and
+    a binomial per sample for each (subject, weekday) the subject still
+    meets on, so the cost is a handful of array operations over at most
+    (subjects * 7, samples) cells.
+    """
+
+    @staticmethod
+    def forecast(user_id, term_end=None, samples=DEFAULT_SAMPLES, today=None, seed=None):
+        today = today or date.today()
+        term_end = term_end or default_term_end(today)
+        samples = max(1, min(int(samples), MAX_SAMPLES))
+
+        subjects = Subject.query.filter_by(user_id=user_id, is_archived=False).order_by(Subject.id).all()
+        subjects = [s for s in subjects if (s.total_classes or 0) >= MIN_CLASSES_FOR_FORECAST]
+        result = {
+            "term_end": term_end.isoformat(),
+            "samples": samples,
+            "predictions": []
+        }
+        if not subjects:
+            return result
+
+        matrix = AttendanceMatrix.from_subjects([s.id for s in subjects], end_date=today)
+        n = matrix.n_subjects  # subject_ids are sorted, matching the id order above
+
+        # Recency-weighted Beta(1 + present, 1 + absent) posterior per subject
+        weight = 0.5 ** (matrix.rank / RECENCY_HALF_LIFE)
+        weighted_present = np.bincount(matrix.subject_index, weights=weight * matrix.present, minlength=n)
+        weighted_total = np.bincount(matrix.subject_index, weights=weight, minlength=n)
+        alpha = 1 + weighted_present
+        beta = 1 + weighted_total - weighted_present
+
+        # Weekday effects relative to the subject's overall rate
+        present, total = matrix.subject_counts()
+        overall = np.clip((present + 1) / (total + 2), *_RATE_CLIP)
+        weekday_present, weekday_total = matrix.weekday_counts()
+        weekday_rate = (weekday_present + WEEKDAY_SHRINKAGE * overall[:, None]) / (weekday_total + WEEKDAY_SHRINKAGE)
+        effect = _logit(np.clip(weekday_rate, *_RATE_CLIP)) - _logit(overall)[:, None]
+
+        # Remaining classes per weekday: recent classes-per-week times the weekdays left in the term
+        window_start = today.toordinal() - SCHEDULE_WEEKS * 7
+        recent = matrix.day > window_start
+        cell = matrix.subject_index[recent] * 7 + (matrix.day[recent] - 1) % 7  # ordinal 1 was a Monday
+        recent_counts = np.bincount(cell, minlength=n * 7).reshape(n, 7)
+        first_day = np.full(n, today.toordinal())
+        np.minimum.at(first_day, matrix.subject_index, matrix.day)
+        weeks = np.clip((today.toordinal() - np.maximum(first_day, window_start)) / 7, 1, SCHEDULE_WEEKS)
+        per_week = np.minimum(recent_counts / weeks[:, None], 1.0)  # at most one class per subject per day
+
+        days_left = np.arange(today.toordinal() + 1, term_end.toordinal() + 1)
+        weekdays_left = np.bincount((days_left - 1) % 7, minlength=7)
+        future = np.rint(per_week * weekdays_left).astype(np.int64)  # (n, 7)
+
+        # Simulate: a rate per (subject, sample), then attended classes for every
+        # (subject, weekday) cell that still has classes, summed back per subject
+        rng = np.random.default_rng(seed)
+        rate = rng.beta(alpha[:, None], beta[:, None], size=(n, samples))
+        logit_rate = _logit(np.clip(rate, 1e-6, 1 - 1e-6))
+        cell_subject, cell_weekday = np.nonzero(future)
+        cell_p = 1 / (1 + np.exp(-(logit_rate[cell_subject] + effect[cell_subject, cell_weekday][:, None])))
+        cell_attended = rng.binomial(future[cell_subject, cell_weekday][:, None], cell_p)
+        future_attended = np.zeros((n, samples), dtype=np.int64)
+        np.add.at(future_attended, cell_subject, cell_attended)
+
+        attended_now = np.array([s.attended_classes or 0 for s in subjects], dtype=np.int64)
+        total_now = np.array([s.total_classes or 0 for s in subjects], dtype=np.int64)
+        targets = np.array([s.target_percentage if s.target_percentage is not None else 75.0 for s in subjects])
+        future_total = future.sum(axis=1)
+        final_total = total_now + future_total
+        final_percentage = (attended_now[:, None] + future_attended) / final_total[:, None] * 100
+
+        meets = final_percentage >= targets[:, None] - 1e-9
+        bands = np.percentile(final_percentage, BAND_PERCENTILES, axis=1)  # (len(BAND_PERCENTILES), n)
+        # Classes that can still be missed (negative: the target is out of reach even with full attendance)
+        can_miss = np.floor(attended_now + future_total - targets * final_total / 100 + 1e-9).astype(np.int64)
+
+        for i, subject in enumerate(subjects):
+            result["predictions"].append({
+                "id": subject.id,
+                "name": subject.name,
+                "current_percentage": round(float(attended_now[i] / total_now[i] * 100), 2),
+                "target_percentage": subject.target_percentage,
+                "remaining_classes": int(future_total[i]),
+                "expected_attendance_rate": round(float(alpha[i] / (alpha[i] + beta[i])), 4),
+                "probability_meeting_target": round(float(meets[i].mean()), 4),
+                "predicted_percentage": {
+                    "mean": round(float(final_percentage[i].mean()), 2),
+                    **{f"p{q}": round(float(bands[j, i]), 2) for j, q in enumerate(BAND_PERCENTILES)}
+                },
+                "can_miss_remaining": int(can_miss[i]) if can_miss[i] >= 0 else None,
+                "target_reachable": bool(can_miss[i] >= 0),
+                "weekday_classes_remaining": future[i].tolist()
+            })
+        return result
@@ -0,0 +1,112 @@
+from services.attendance_matrix import AttendanceMatrix
+import numpy as np
+
+DAY_NAMES = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+RECENT_WINDOW = 5  # classes considered "recent"
+STREAK_WINDOW = 20  # latest classes a reported streak is counted over
+MIN_CLASSES_FOR_PATTERN = 3  # per weekday, before a pattern is reported
+
+
+class InsightsEngine:
+    """Computes attendance signals for all subjects from one vectorized scan.
+
+    Insight rules are plain functions registered with ``InsightsEngine.rule``;
+    each receives the subject and its signals and returns an insight dict
+    (or None). Rules never query the database themselves.
+    """
+
+    rules = []
+
+    @classmethod
+    def rule(cls, func):
+        """Decorator registering an insight rule"""
+        cls.rules.append(func)
+        return func
+
+    @staticmethod
+    def collect_signals(subject_ids):
+        """Recent-absence, streak and weekday signals for every subject from one query"""
+        matrix = AttendanceMatrix.from_subjects(subject_ids)
+
+        _, seen = matrix.subject_counts()
+        recent_present, recent_total = matrix.recent_counts(RECENT_WINDOW)
+        streak_present, streak_length = matrix.current_streaks()
+        streak_length = np.minimum(streak_length, STREAK_WINDOW)
+        weekday_present, weekday_total = matrix.weekday_counts()
+        weekday_absences = weekday_total - weekday_present
+
+        # Absence rate per weekday, only where there is enough data for a pattern
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rates = np.where(weekday_total >= MIN_CLASSES_FOR_PATTERN, weekday_absences / weekday_total, 0.0)
+        worst_day = rates.argmax(axis=1) if matrix.n_subjects else np.zeros(0, dtype=np.int64)
+
+        signals = {}
+        for i, subject_id in enumerate(matrix.subject_ids.tolist()):
+            rate = float(rates[i, worst_day[i]])
+            signals[subject_id] = {
+                "seen": int(seen[i]),
+                "recent_absences": int(recent_total[i] - recent_present[i]),
+                "streak_type": ("Present" if streak_present[i] else "Absent") if seen[i] else None,
+                "streak_length": int(streak_length[i]),
+                "most_missed_day": DAY_NAMES[worst_day[i]] if rate > 0 else None,
+                "absence_rate": rate,
+                "weekdays": [
+                    {"total": int(weekday_total[i, d]), "absences": int(weekday_absences[i, d])}
+                    for d in range(7)
+                ]
+            }
+        return signals
+
+    @staticmethod
+    def generate(subjects):
+        """Run every registered rule against every subject"""
+        signals = InsightsEngine.collect_signals([s.id for s in subjects])
+
+        insights = []
+        for subject in subjects:
+            subject_signals = signals.get(subject.id)
+            if not subject_signals or not subject_signals["seen"]:
+                continue
+            for rule in InsightsEngine.rules:
+                insight = rule(subject, subject_signals)
+                if insight:
+                    insights.append(insight)
+        return insights
+
+
+@InsightsEngine.rule
+def recent_absences_rule(subject, signals):
+    if signals["recent_absences"] >= 3:
+        return {
+            "type": "warning",
+            "subject": subject.name,
+            "message": f"You've missed {signals['recent_absences']} out of the last {RECENT_WINDOW} {subject.name} classes",
+            "recommendation": "Consider attending the next few classes to improve your percentage",
+            "priority": "high"
+        }
+
+
+@InsightsEngine.rule
+def attendance_streak_rule(subject, signals):
+    if signals["streak_type"] == "Present" and signals["streak_length"] >= 7:
+        return {
+            "type": "achievement",
+            "subject": subject.name,
+            "message": f"Great job! You have a {signals['streak_length']}-class attendance streak in {subject.name}",
+            "recommendation": "Keep up the excellent work!",
+            "priority": "low"
+        }
+
+
+@InsightsEngine.rule
+def weekday_pattern_rule(subject, signals):
+    day = signals["most_missed_day"]
+    if day:
+        return {
+            "type": "pattern",
+            "subject": subject.name,
+            "message": f"You tend to miss {subject.name} classes on {day}",
+            "recommendation": f"Set a reminder for {subject.name} on {day}s",
+            "priority": "medium"
+        }
@@ -0,0 +1,117 @@
+from models import db, Subject, AttendanceLog, Task, Reminder, ExportJob
+from sqlalchemy import select, delete, inspect
+from sqlalchemy.orm import aliased
+from services.bulk_attendance import BulkAttendanceService
+from services.dashboard import DashboardService, ATTENDANCE_SECTION
+from services.rollup import RollupService
+from services.streaks import StreakService
+from services.sync import SyncService
+from utils.db_utils import add_missing_columns
+
+# Tables whose indexes are (re)created by ``ensure_indexes`` on existing databases
+INDEXED_MODELS = (AttendanceLog, Subject, Task, Reminder, ExportJob)
+
+
+class AttendanceMaintenance:
+    """One-off data migrations for databases created before a schema change.
+
+    ``db.create_all()`` only creates missing tables, so indexes added to
+    existing tables have to be created here, after any data that would
+    violate them has been cleaned up.
+    """
+
+    @staticmethod
+    def duplicate_log_ids():
+        """Ids of every log superseded by a newer log for the same subject and date"""
+        newer = aliased(AttendanceLog)
+        return select(AttendanceLog.id).join(
+            newer,
+            (newer.subject_id == AttendanceLog.subject_id) &
+            (newer.date == AttendanceLog.date) &
+            (newer.id > AttendanceLog.id)
+        ).distinct()
+
+    @staticmethod
+    def dedupe_logs(dry_run=False):
+        """Keep the newest log per (subject, date), then fix counters and rollups.
+
+        Returns (logs removed, subjects affected).
+        """
+        duplicates = AttendanceMaintenance.duplicate_log_ids().subquery()
+        affected = db.session.query(Subject.id, Subject.user_id).join(
+            AttendanceLog, AttendanceLog.subject_id == Subject.id
+        ).filter(AttendanceLog.id.in_(select(duplicates.c.id))).distinct().all()
+        removed = db.session.query(duplicates.c.id).count()
+
+        if dry_run or not removed:
+            db.session.rollback()
+            return removed, len(affected)
+
+        # Bulk DELETE skips the ORM hook, so tombstones for delta sync are written here
+        deleted_by_user = {}
+        for row in db.session.query(AttendanceLog.id, Subject.user_id).join(Subject).filter(
+            AttendanceLog.id.in_(select(duplicates.c.id))
+        ):
+            deleted_by_user.setdefault(row.user_id, []).append(row.id)
+        for user_id, log_ids in deleted_by_user.items():
+            SyncService.record_deleted(user_id, "attendance_logs", log_ids)
+
+        db.session.execute(
+            delete(AttendanceLog).where(AttendanceLog.id.in_(select(duplicates.c.id))),
+            execution_options={"synchronize_session": False}
+        )
+        BulkAttendanceService.recompute_counters({row.id for row in affected})
+        StreakService.recompute_many({row.id for row in affected})
+        for user_id in {row.user_id for row in affected}:
+            DashboardService.mark_dirty(db.session, user_id, (ATTENDANCE_SECTION,))
+        db.session.commit()
+
+        for user_id in {row.user_id for row in affected}:
+            RollupService.rebuild(user_id=user_id)
+        return removed, len(affected)
+
+    @staticmethod
+    def ensure_indexes():
+        """Create any model index missing from the database; returns the names created"""
+        bind = db.engine
+        inspector = inspect(bind)
+        created = []
+        for model in INDEXED_MODELS:
+            table = model.__table__
+            existing = {index["name"] for index in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name not in existing:
+                    index.create(bind)
+                    created.append(index.name)
+        return created
+
+    @staticmethod
+    def add_missing_columns():
+        """Add columns introduced on existing tables (the Subject streak columns); returns their names.
+
+        Runs first in every upgrade command: the models map these columns,
+        so any ``Subject`` query fails until they exist.
+        """
+        return add_missing_columns(db.engine, Subject.__table__)
+
+    @staticmethod
+    def backfill_streaks(batch_size=500):
+        """Add the Subject streak columns if missing and compute them for every subject.
+
+        Returns (columns added, subjects updated).
+        """
+        added = AttendanceMaintenance.add_missing_columns()
+
+        updated = 0
+        last_id = 0
+        while True:
+            ids = [row.id for row in db.session.query(Subject.id).filter(
+                Subject.id > last_id
+            ).order_by(Subject.id).limit(batch_size)]
+            if not ids:
+                break
+            StreakService.recompute_many(ids)
+            db.session.commit()
+            updated += len(ids)
+            last_id = ids[-1]
+        return added, updated
@@ -214,14 +214,15 @@ class NotificationService:
         warnings_created = 0
         
         for subject in subjects:
-            if subject.attendance_percentage < subject.target_percentage:
+            metrics = subject.metrics
+            if not metrics.meets_target and metrics.classes_needed is not None:
                 # Create warning reminder for tomorrow
                 tomorrow = datetime.utcnow() + timedelta(days=1)
                 tomorrow = tomorrow.replace(hour=8, minute=0, second=0, microsecond=0)  # 8 AM
                 
-                message = (f"⚠️ Your {subject.name} attendance is {subject.attendance_percentage:.1f}%, "
+                message = (f"⚠️ Your {subject.name} attendance is {metrics.percentage:.1f}%, "
                           f"which is below your {subject.target_percentage}% target. "
-                          f"You need to attend the next {subject.classes_needed_for_target} classes to reach your goal.")
+                          f"You need to attend the next {metrics.classes_needed} classes to reach your goal.")
                 
                 # Check if similar reminder already exists
                 existing = Reminder.query.filter(
@@ -0,0 +1,203 @@
+from models import db, Subject, AttendanceLog, ReconciliationState
+from datetime import datetime
+from sqlalchemy import func, case, update, select, union, bindparam
+from services.dashboard import DashboardService, ATTENDANCE_SECTION
+import bisect
+import logging
+import time
+
+COUNTER_JOB = "subject_counters"
+RECONCILE_CHUNK_SIZE = 500  # subjects checked (and committed) per chunk
+MAX_REPORTED_DRIFT = 200
+
+
+class CounterReconciliation:
+    """Resumable repair of ``Subject.total_classes`` / ``attended_classes``.
+
+    A pass walks candidate subjects in id order, one chunk at a time: a
+    grouped COUNT over their logs is compared with the stored counters and
+    only drifted rows are rewritten. Progress (the last subject id done) is
+    committed with each chunk, so an interrupted or ``max_chunks``-bounded
+    run picks up where it stopped. Candidates are subjects that were, or
+    whose logs were, written since the previous completed pass; the first
+    pass (or ``full=True``) checks everything.
+    """
+
+    @staticmethod
+    def state():
+        state = db.session.get(ReconciliationState, COUNTER_JOB)
+        if state is None:
+            state = ReconciliationState(job=COUNTER_JOB)
+            db.session.add(state)
+        return state
+
+    @staticmethod
+    def changed_subject_ids(changed_since):
+        """Sorted ids of subjects that were, or whose logs were, written since ``changed_since``.
+
+        Counter updates bump ``Subject.updated_at`` (including the ones made
+        on log deletes), and every log insert or edit sets its own
+        ``updated_at``. Both are range scans on their ``updated_at`` index,
+        run once per pass rather than once per chunk.
+        """
+        rows = db.session.execute(union(
+            select(Subject.id).where(Subject.updated_at >= changed_since),
+            select(AttendanceLog.subject_id).where(AttendanceLog.updated_at >= changed_since)
+        )).scalars()
+        return sorted(set(rows))
+
+    @staticmethod
+    def candidates(changed_ids, after_id, limit):
+        """Next ``limit`` subject ids above ``after_id``: from ``changed_ids``, or all subjects when it is None"""
+        if changed_ids is not None:
+            start = bisect.bisect_right(changed_ids, after_id)
+            return changed_ids[start:start + limit]
+        query = db.session.query(Subject.id).filter(Subject.id > after_id)
+        return [row.id for row in query.order_by(Subject.id).limit(limit)]
+
+    @staticmethod
+    def drift(subject_ids):
+        """(subject_id, user_id, stored total, stored attended, actual total, actual attended) for drifted subjects"""
+        counts = db.session.query(
+            AttendanceLog.subject_id,
+            func.count(AttendanceLog.id).label("total"),
+            func.sum(case((AttendanceLog.status == "Present", 1), else_=0)).label("attended")
+        ).filter(AttendanceLog.subject_id.in_(subject_ids)).group_by(AttendanceLog.subject_id).all()
+        actual = {row.subject_id: (int(row.total), int(row.attended or 0)) for row in counts}
+
+        stored = db.session.query(
+            Subject.id, Subject.user_id, Subject.total_classes, Subject.attended_classes
+        ).filter(Subject.id.in_(subject_ids)).all()
+
+        drifted = []
+        for row in stored:
+            total, attended = actual.get(row.id, (0, 0))
+            if (row.total_classes, row.attended_classes) != (total, attended):
+                drifted.append((row.id, row.user_id, row.total_classes, row.attended_classes, total, attended))
+        return drifted
+
+    @staticmethod
+    def run(dry_run=False, full=False, chunk_size=RECONCILE_CHUNK_SIZE, max_chunks=None, now=None):
+        """Run (or resume) a reconciliation pass and return its report.
+
+        ``dry_run`` reports drift without writing counters or progress.
+        ``max_chunks`` bounds the work done by this call; the pass resumes
+        from the saved watermark next time.
+        """
+        started = time.monotonic()
+        state = CounterReconciliation.state()
+
+        resumed = state.pass_started_at is not None and not full
+        if not resumed:
+            state.pass_started_at = now or datetime.utcnow()
+            state.watermark = 0
+            if full:
+                state.changed_since = None  # a resumed full pass must stay full
+        changed_since = state.changed_since
+        watermark = state.watermark or 0
+
+        report = {
+            "dry_run": dry_run,
+            "full": changed_since is None,
+            "resumed": resumed,
+            "changed_since": changed_since.isoformat() if changed_since else None,
+            "chunks": 0,
+            "subjects_checked": 0,
+            "subjects_drifted": 0,
+            "subjects_fixed": 0,
+            "subjects_skipped": 0,  # changed concurrently; rechecked by the next pass
+            "total_classes_delta": 0,
+            "attended_classes_delta": 0,
+            "drift": []
+        }
+
+        completed = False
+        try:
+            changed_ids = None if changed_since is None else CounterReconciliation.changed_subject_ids(changed_since)
+            while max_chunks is None or report["chunks"] < max_chunks:
+                ids = CounterReconciliation.candidates(changed_ids, watermark, chunk_size)
+                if not ids:
+                    completed = True
+                    break
+
+                drifted = CounterReconciliation.drift(ids)
+                report["chunks"] += 1
+                report["subjects_checked"] += len(ids)
+                report["subjects_drifted"] += len(drifted)
+                for subject_id, user_id, old_total, old_attended, total, attended in drifted:
+                    report["total_classes_delta"] += total - (old_total or 0)
+                    report["attended_classes_delta"] += attended - (old_attended or 0)
+                    if len(report["drift"]) < MAX_REPORTED_DRIFT:
+                        report["drift"].append({
+                            "subject_id": subject_id,
+                            "stored": {"total_classes": old_total, "attended_classes": old_attended},
+                            "actual": {"total_classes": total, "attended_classes": attended}
+                        })
+
+                watermark = ids[-1]
+                if dry_run:
+                    continue
+
+                if drifted:
+                    # Only overwrite counters still holding the values we compared
+                    # against, so a concurrent attendance write is never undone.
+                    # Subjects skipped that way were written after the pass
+                    # started, so the next pass checks them again.
+                    subjects = Subject.__table__
+                    stmt = update(subjects).where(
+                        subjects.c.id == bindparam("subject_id"),
+                        func.coalesce(subjects.c.total_classes, 0) == bindparam("old_total"),
+                        func.coalesce(subjects.c.attended_classes, 0) == bindparam("old_attended")
+                    ).values(
+                        total_classes=bindparam("new_total"),
+                        attended_classes=bindparam("new_attended")
+                    )
+                    params = [
+                        {
+                            "subject_id": subject_id,
+                            "old_total": old_total or 0,
+                            "old_attended": old_attended or 0,
+                            "new_total": total,
+                            "new_attended": attended
+                        }
+                        for subject_id, _, old_total, old_attended, total, attended in drifted
+                    ]
+                    if db.session.get_bind().dialect.supports_sane_multi_rowcount:
+                        fixed = db.session.execute(stmt, params).rowcount
+                    else:
+                        fixed = sum(db.session.execute(stmt, row).rowcount for row in params)
+                    for user_id in {row[1] for row in drifted}:
+                        DashboardService.mark_dirty(db.session, user_id, (ATTENDANCE_SECTION,))
+                    report["subjects_fixed"] += fixed
+                    report["subjects_skipped"] += len(drifted) - fixed
+                state = CounterReconciliation.state()
+                state.watermark = watermark
+                db.session.commit()
+
+            report["completed"] = completed
+            report["watermark"] = None if completed else watermark
+            report["duration_seconds"] = round(time.monotonic() - started, 3)
+            report["drift_truncated"] = report["subjects_drifted"] > len(report["drift"])
+
+            if dry_run:
+                db.session.rollback()
+                return report
+
+            state = CounterReconciliation.state()
+            if completed:
+                state.changed_since = state.pass_started_at
+                state.pass_started_at = None
+                state.watermark = None
+                state.last_completed_at = datetime.utcnow()
+            state.last_report = {key: value for key, value in report.items() if key != "drift"}
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        logging.info(
+            "Counter reconciliation: checked %s subjects in %s chunks, fixed %s (%s)",
+            report["subjects_checked"], report["chunks"], report["subjects_fixed"],
+            "pass complete" if completed else f"resume after subject {watermark}"
+        )
+        return report
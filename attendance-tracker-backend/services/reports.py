@@ -0,0 +1,138 @@
+import os
+from io import BytesIO
+from reportlab.lib.pagesizes import A4
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.units import inch
+from reportlab.lib import colors
+
+
+def render_attendance_report(report):
+    """Render the attendance report PDF from plain data and return its bytes.
+
+    ``report`` is the dict built by ``ExportJobService.collect_report_data``;
+    it holds no ORM objects so this can run in a worker process.
+    """
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=A4)
+    styles = getSampleStyleSheet()
+    story = []
+
+    # Title
+    title_style = ParagraphStyle(
+        'CustomTitle',
+        parent=styles['Heading1'],
+        fontSize=18,
+        spaceAfter=30,
+        alignment=1  # Center alignment
+    )
+
+    story.append(Paragraph("Attendance Report", title_style))
+    story.append(Spacer(1, 20))
+
+    # User info
+    story.append(Paragraph(f"<b>Student:</b> {report['user']['name']}", styles['Normal']))
+    story.append(Paragraph(f"<b>Email:</b> {report['user']['email']}", styles['Normal']))
+    story.append(Paragraph(f"<b>Report Generated:</b> {report['generated_at']}", styles['Normal']))
+    story.append(Spacer(1, 20))
+
+    # Overall statistics
+    subjects = report["subjects"]
+    total_classes = sum(s["total"] for s in subjects)
+    total_attended = sum(s["attended"] for s in subjects)
+    overall_percentage = (total_attended / total_classes * 100) if total_classes > 0 else 0
+
+    story.append(Paragraph("<b>Overall Statistics</b>", styles['Heading2']))
+
+    overall_data = [
+        ['Metric', 'Value'],
+        ['Total Subjects', str(len(subjects))],
+        ['Total Classes', str(total_classes)],
+        ['Classes Attended', str(total_attended)],
+        ['Overall Percentage', f"{overall_percentage:.2f}%"]
+    ]
+
+    overall_table = Table(overall_data)
+    overall_table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 12),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black)
+    ]))
+
+    story.append(overall_table)
+    story.append(Spacer(1, 20))
+
+    # Subject-wise breakdown
+    story.append(Paragraph("<b>Subject-wise Breakdown</b>", styles['Heading2']))
+
+    subject_data = [['Subject', 'Type', 'Attended/Total', 'Percentage', 'Status']]
+
+    for subject in subjects:
+        status = "✓ Good" if subject["percentage"] >= subject["target"] else "⚠ Below Target"
+        subject_data.append([
+            subject["name"],
+            subject["type"].title(),
+            f"{subject['attended']}/{subject['total']}",
+            f"{subject['percentage']:.1f}%",
+            status
+        ])
+
+    subject_table = Table(subject_data, colWidths=[2*inch, 1*inch, 1*inch, 1*inch, 1.5*inch])
+    subject_table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 10),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black),
+        ('FONTSIZE', (0, 1), (-1, -1), 9)
+    ]))
+
+    story.append(subject_table)
+    story.append(Spacer(1, 20))
+
+    # Recommendations
+    story.append(Paragraph("<b>Recommendations</b>", styles['Heading2']))
+
+    below_target = [s for s in subjects if s["percentage"] < s["target"]]
+
+    if below_target:
+        for subject in below_target:
+            story.append(Paragraph(
+                f"• <b>{subject['name']}</b>: Attend the next {subject['classes_needed']} classes to reach {subject['target']}% target",
+                styles['Normal']
+            ))
+    else:
+        story.append(Paragraph("• Excellent work! All subjects meet the attendance requirements.", styles['Normal']))
+
+    # Build PDF
+    doc.build(story)
+
+    pdf_data = buffer.getvalue()
+    buffer.close()
+    return pdf_data
+
+
+def write_attendance_report(report, path):
+    """Render the report straight to ``path`` (entry point for the export worker pool)"""
+    pdf_data = render_attendance_report(report)
+    tmp_path = f"{path}.part"
+    with open(tmp_path, "wb") as f:
+        f.write(pdf_data)
+    # Rename last so a half-written file is never served
+    os.replace(tmp_path, path)
+    return path
+
+
+def write_attendance_report_to(user_id, export_type, sink):
+    """Export-backend entry point: render the user's report into ``sink``"""
+    from services.export_jobs import ExportJobService
+
+    sink.write(render_attendance_report(ExportJobService.collect_report_data(user_id)))
@@ -0,0 +1,138 @@
+from models import db, Subject, AttendanceLog, AttendanceDailyRollup
+from sqlalchemy import func, case, insert, select, delete
+from utils.db_utils import supports_upsert, upsert_insert
+
+
+class RollupService:
+    """Maintains the per-day attendance rollup used by trend and calendar views.
+
+    ``apply`` runs inside the caller's transaction, so the rollup commits (or
+    rolls back) together with the AttendanceLog write that triggered it.
+    """
+
+    @staticmethod
+    def apply(user_id, subject_id, log_date, status, delta=1):
+        """Add (or with delta=-1, remove) one log's contribution to the rollup"""
+        present = delta if status == "Present" else 0
+        absent = delta if status != "Present" else 0
+        bind = db.session.get_bind()
+
+        if supports_upsert(bind):
+            stmt = upsert_insert(AttendanceDailyRollup, bind).values(
+                user_id=user_id,
+                subject_id=subject_id,
+                date=log_date,
+                present_count=present,
+                absent_count=absent
+            )
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["user_id", "subject_id", "date"],
+                set_={
+                    "present_count": AttendanceDailyRollup.present_count + stmt.excluded.present_count,
+                    "absent_count": AttendanceDailyRollup.absent_count + stmt.excluded.absent_count
+                }
+            )
+            db.session.execute(stmt)
+            if delta < 0:
+                RollupService._prune(user_id, subject_id, log_date)
+            return
+
+        rollup = db.session.get(AttendanceDailyRollup, (user_id, subject_id, log_date))
+        if rollup is None:
+            rollup = AttendanceDailyRollup(
+                user_id=user_id, subject_id=subject_id, date=log_date,
+                present_count=0, absent_count=0
+            )
+            db.session.add(rollup)
+        rollup.present_count += present
+        rollup.absent_count += absent
+        if rollup.present_count <= 0 and rollup.absent_count <= 0:
+            db.session.delete(rollup)
+
+    @staticmethod
+    def apply_many(user_id, counts):
+        """Add many days at once; ``counts`` maps (subject_id, date) -> (present, absent)"""
+        if not counts:
+            return
+        bind = db.session.get_bind()
+
+        if supports_upsert(bind):
+            stmt = upsert_insert(AttendanceDailyRollup, bind)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["user_id", "subject_id", "date"],
+                set_={
+                    "present_count": AttendanceDailyRollup.present_count + stmt.excluded.present_count,
+                    "absent_count": AttendanceDailyRollup.absent_count + stmt.excluded.absent_count
+                }
+            )
+            db.session.execute(stmt, [
+                {
+                    "user_id": user_id,
+                    "subject_id": subject_id,
+                    "date": log_date,
+                    "present_count": present,
+                    "absent_count": absent
+                }
+                for (subject_id, log_date), (present, absent) in counts.items()
+            ])
+            return
+
+        for (subject_id, log_date), (present, absent) in counts.items():
+            rollup = db.session.get(AttendanceDailyRollup, (user_id, subject_id, log_date))
+            if rollup is None:
+                rollup = AttendanceDailyRollup(
+                    user_id=user_id, subject_id=subject_id, date=log_date,
+                    present_count=0, absent_count=0
+                )
+                db.session.add(rollup)
+            rollup.present_count += present
+            rollup.absent_count += absent
+
+    @staticmethod
+    def _prune(user_id, subject_id, log_date):
+        """Drop a rollup row once every log for that day has been removed"""
+        db.session.execute(delete(AttendanceDailyRollup).where(
+            AttendanceDailyRollup.user_id == user_id,
+            AttendanceDailyRollup.subject_id == subject_id,
+            AttendanceDailyRollup.date == log_date,
+            AttendanceDailyRollup.present_count <= 0,
+            AttendanceDailyRollup.absent_count <= 0
+        ))
+
+    @staticmethod
+    def move(user_id, subject_id, old_date, old_status, new_date, new_status):
+        """Re-bucket a log whose date and/or status was edited"""
+        if old_date == new_date and old_status == new_status:
+            return
+        RollupService.apply(user_id, subject_id, old_date, old_status, delta=-1)
+        RollupService.apply(user_id, subject_id, new_date, new_status, delta=1)
+
+    @staticmethod
+    def rebuild(user_id=None):
+        """Recompute rollup rows from AttendanceLog (for one user or everyone).
+
+        Returns the number of rollup rows written.
+        """
+        clear = delete(AttendanceDailyRollup)
+        if user_id is not None:
+            clear = clear.where(AttendanceDailyRollup.user_id == user_id)
+        db.session.execute(clear)
+
+        source = select(
+            Subject.user_id,
+            AttendanceLog.subject_id,
+            AttendanceLog.date,
+            func.sum(case((AttendanceLog.status == "Present", 1), else_=0)),
+            func.sum(case((AttendanceLog.status == "Present", 0), else_=1))
+        ).join(Subject, Subject.id == AttendanceLog.subject_id)
+        if user_id is not None:
+            source = source.where(Subject.user_id == user_id)
+        source = source.group_by(Subject.user_id, AttendanceLog.subject_id, AttendanceLog.date)
+
+        result = db.session.execute(
+            insert(AttendanceDailyRollup).from_select(
+                ["user_id", "subject_id", "date", "present_count", "absent_count"], source
+            )
+        )
+        db.session.commit()
+        return result.rowcount
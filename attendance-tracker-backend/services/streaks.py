@@ -0,0 +1,96 @@
+from models import db, Subject, AttendanceLog
+from sqlalchemy import update, case, func, or_
+from utils.db_utils import expire_loaded
+
+PRESENT = "Present"
+STREAK_COLUMNS = ["current_streak", "current_streak_status", "longest_streak", "last_log_date"]
+
+
+def _streaks(statuses):
+    """(current length, current status, longest Present run) for statuses oldest first"""
+    current, current_status, longest, run = 0, None, 0, 0
+    for status in statuses:
+        current = current + 1 if status == current_status else 1
+        current_status = status
+        run = run + 1 if status == PRESENT else 0
+        longest = max(longest, run)
+    return current, current_status, longest
+
+
+class StreakService:
+    """Keeps the streak columns on ``Subject`` current.
+
+    Appending a log at or after the subject's latest date is a single
+    UPDATE of the subject row. Anything else (a back-dated log, an edit, a
+    delete) recomputes that subject's streaks from a status-only scan of
+    its own logs.
+    """
+
+    @staticmethod
+    def on_append(subject, log_date, status):
+        """Account for a newly inserted log with one UPDATE computed from the row itself.
+
+        Like the counter UPDATE, this never writes back values read earlier,
+        so concurrent marks cannot lose each other's streak updates. A
+        back-dated log (older than ``last_log_date``) matches nothing and the
+        subject is recomputed from its logs instead.
+        """
+        current = case(
+            (Subject.current_streak_status == status, func.coalesce(Subject.current_streak, 0) + 1),
+            else_=1
+        )
+        values = {"current_streak": current, "current_streak_status": status, "last_log_date": log_date}
+        if status == PRESENT:
+            longest = func.coalesce(Subject.longest_streak, 0)
+            values["longest_streak"] = case((longest >= current, longest), else_=current)
+
+        result = db.session.execute(
+            update(Subject).where(
+                Subject.id == subject.id,
+                or_(Subject.last_log_date.is_(None), Subject.last_log_date <= log_date)
+            ).values(**values).execution_options(synchronize_session=False)
+        )
+        db.session.expire(subject, STREAK_COLUMNS)
+        if result.rowcount == 0:
+            StreakService.recompute(subject)
+
+    @staticmethod
+    def recompute(subject):
+        """Recompute one subject's streaks from its logs (after an edit, delete or back-dated insert)"""
+        db.session.flush()
+        rows = db.session.query(AttendanceLog.date, AttendanceLog.status).filter(
+            AttendanceLog.subject_id == subject.id
+        ).order_by(AttendanceLog.date, AttendanceLog.id).all()
+
+        subject.current_streak, subject.current_streak_status, subject.longest_streak = _streaks(
+            row.status for row in rows
+        )
+        subject.last_log_date = rows[-1].date if rows else None
+
+    @staticmethod
+    def recompute_many(subject_ids):
+        """Recompute streaks for many subjects with one scan and one bulk UPDATE"""
+        if not subject_ids:
+            return
+        rows = db.session.query(AttendanceLog.subject_id, AttendanceLog.date, AttendanceLog.status).filter(
+            AttendanceLog.subject_id.in_(set(subject_ids))
+        ).order_by(AttendanceLog.subject_id, AttendanceLog.date, AttendanceLog.id).all()
+
+        by_subject = {subject_id: [] for subject_id in subject_ids}
+        last_dates = {}
+        for row in rows:
+            by_subject[row.subject_id].append(row.status)
+            last_dates[row.subject_id] = row.date
+
+        params = []
+        for subject_id, statuses in by_subject.items():
+            current, status, longest = _streaks(statuses)
+            params.append({
+                "id": subject_id,
+                "current_streak": current,
+                "current_streak_status": status,
+                "longest_streak": longest,
+                "last_log_date": last_dates.get(subject_id)
+            })
+        db.session.execute(update(Subject), params)
+        expire_loaded(db.session, Subject, by_subject.keys(), STREAK_COLUMNS)
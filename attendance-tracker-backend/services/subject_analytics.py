@@ -0,0 +1,113 @@
+from models import db, Subject
+from sqlalchemy import func, case
+from utils.attendance_metrics import metrics_for
+
+SUBJECT_TYPES = ("theory", "lab", "tutorial", "practical")
+PERFORMANCE_CATEGORIES = ("excellent", "good", "warning", "critical")
+
+
+def _performance_category():
+    """SQL label of a subject's performance band (90+/75+/60+/below)"""
+    percentage = Subject.attendance_percentage
+    return case(
+        (percentage >= 90, "excellent"),
+        (percentage >= 75, "good"),
+        (percentage >= 60, "warning"),
+        else_="critical"
+    )
+
+
+class SubjectAnalytics:
+    """Subject analytics aggregated in the database.
+
+    Summary, performance bands and the type breakdown are GROUP BY queries
+    over the ``Subject.attendance_percentage`` / ``meets_target`` SQL
+    expressions; band members are fetched as (id, name, percentage) tuples.
+    Only subjects below their target are loaded as full rows, for the
+    action items.
+    """
+
+    @staticmethod
+    def analytics(user_id):
+        base = (Subject.user_id == user_id, Subject.is_archived == False)
+        category = _performance_category()
+        below_target = case((Subject.meets_target, 0), else_=1)
+        credits = func.coalesce(Subject.credits, 0)
+
+        category_rows = db.session.query(
+            category.label("category"),
+            func.count(Subject.id).label("subjects"),
+            func.coalesce(func.sum(Subject.total_classes), 0).label("total"),
+            func.coalesce(func.sum(Subject.attended_classes), 0).label("attended"),
+            func.sum(below_target).label("below_target"),
+            func.sum(Subject.attendance_percentage * credits).label("weighted"),
+            func.sum(credits).label("credits")
+        ).filter(*base).group_by(category).all()
+
+        type_rows = db.session.query(
+            Subject.type,
+            func.count(Subject.id).label("subjects"),
+            func.coalesce(func.sum(Subject.total_classes), 0).label("total"),
+            func.coalesce(func.sum(Subject.attended_classes), 0).label("attended"),
+            func.sum(below_target).label("below_target")
+        ).filter(*base, Subject.type.in_(SUBJECT_TYPES)).group_by(Subject.type).all()
+
+        members = {name: [] for name in PERFORMANCE_CATEGORIES}
+        for row in db.session.query(
+            Subject.id, Subject.name, Subject.attendance_percentage.label("percentage"), category.label("category")
+        ).filter(*base).order_by(Subject.id):
+            members[row.category].append({"id": row.id, "name": row.name, "percentage": round(float(row.percentage), 2)})
+
+        at_risk = Subject.query.filter(*base, ~Subject.meets_target).order_by(Subject.id).all()
+        metrics = metrics_for(at_risk)
+
+        counts = {row.category: int(row.subjects) for row in category_rows}
+        total_subjects = sum(counts.values())
+        total_classes = sum(int(row.total) for row in category_rows)
+        total_attended = sum(int(row.attended) for row in category_rows)
+        total_credits = sum(int(row.credits or 0) for row in category_rows)
+        weighted = sum(float(row.weighted or 0) for row in category_rows)
+
+        type_stats = {}
+        by_type = {row.type: row for row in type_rows}
+        for subject_type in SUBJECT_TYPES:
+            row = by_type.get(subject_type)
+            if row is None:
+                continue
+            total, attended = int(row.total), int(row.attended)
+            type_stats[subject_type] = {
+                "count": int(row.subjects),
+                "total_classes": total,
+                "attended_classes": attended,
+                "percentage": round(attended / total * 100, 2) if total else 0,
+                "below_target": int(row.below_target or 0)
+            }
+
+        return {
+            "summary": {
+                "total_subjects": total_subjects,
+                "total_classes": total_classes,
+                "total_attended": total_attended,
+                "overall_percentage": round(total_attended / total_classes * 100, 2) if total_classes else 0,
+                "weighted_percentage": round(weighted / total_credits, 2) if total_credits else 0,
+                "subjects_below_target": len(at_risk),
+                "critical_subjects": counts.get("critical", 0),
+                "classes_needed_for_targets": sum(metrics[s.id].classes_needed or 0 for s in at_risk)
+            },
+            "performance_categories": {
+                name: {"count": counts.get(name, 0), "subjects": members[name]}
+                for name in PERFORMANCE_CATEGORIES
+            },
+            "type_breakdown": type_stats,
+            "action_items": {
+                "immediate_attention": [
+                    {
+                        "id": s.id,
+                        "name": s.name,
+                        "percentage": metrics[s.id].percentage,
+                        "classes_needed": metrics[s.id].classes_needed,
+                        "can_afford_to_miss": metrics[s.id].can_afford_to_miss
+                    } for s in at_risk
+                ]
+            }
+        }
@@ -0,0 +1,106 @@
+from models import db, Subject, AttendanceLog, Task, Reminder, SyncTombstone
+from datetime import datetime, timedelta
+from sqlalchemy import event, insert
+from sqlalchemy.orm import Session
+
+# Response key for each synced model; also the ``entity`` stored on tombstones
+SYNC_ENTITIES = {
+    Subject: "subjects",
+    AttendanceLog: "attendance_logs",
+    Task: "tasks",
+    Reminder: "reminders",
+}
+
+# ``updated_at`` is stamped at flush time but only visible once the transaction
+# commits, so each cursor reaches back this far to catch slow commits. Clients
+# upsert by id, so the overlap only repeats rows, never loses them.
+SYNC_OVERLAP = timedelta(seconds=60)
+DEFAULT_TOMBSTONE_RETENTION_DAYS = 90
+
+
+class SyncService:
+    """Delta sync for offline-first clients.
+
+    A sync returns every subject, attendance log, task and reminder of the
+    user whose ``updated_at`` is at or after the cursor (each an index range
+    scan on ``(user_id|subject_id, updated_at)``) plus the ids deleted since
+    then, taken from ``SyncTombstone``. Without a cursor, or with one older
+    than the tombstone retention window, the full data set is returned and
+    the client replaces its copy.
+    """
+
+    @staticmethod
+    def changes(user_id, since=None, retention_days=DEFAULT_TOMBSTONE_RETENTION_DAYS, now=None):
+        """Return (changes, next cursor timestamp) for rows changed since ``since``"""
+        now = now or datetime.utcnow()
+        full = since is None or since < now - timedelta(days=retention_days)
+
+        queries = {
+            Subject: Subject.query.filter(Subject.user_id == user_id),
+            AttendanceLog: AttendanceLog.query.join(Subject).filter(Subject.user_id == user_id),
+            Task: Task.query.filter(Task.user_id == user_id),
+            Reminder: Reminder.query.filter(Reminder.user_id == user_id),
+        }
+
+        result = {"full": full}
+        for model, key in SYNC_ENTITIES.items():
+            query = queries[model]
+            if not full:
+                query = query.filter(model.updated_at >= since)
+            result[key] = [item.to_dict() for item in query.order_by(model.id)]
+
+        deleted = {key: [] for key in SYNC_ENTITIES.values()}
+        if not full:
+            rows = db.session.query(SyncTombstone.entity, SyncTombstone.entity_id).filter(
+                SyncTombstone.user_id == user_id,
+                SyncTombstone.deleted_at >= since
+            ).order_by(SyncTombstone.id)
+            for row in rows:
+                if row.entity in deleted:
+                    deleted[row.entity].append(row.entity_id)
+        result["deleted"] = deleted
+
+        return result, now - SYNC_OVERLAP
+
+    @staticmethod
+    def record_deleted(user_id, entity, entity_ids):
+        """Add tombstones for rows removed with bulk DELETE statements (which skip the ORM hook)"""
+        if not entity_ids:
+            return
+        now = datetime.utcnow()
+        db.session.execute(insert(SyncTombstone), [
+            {"user_id": user_id, "entity": entity, "entity_id": entity_id, "deleted_at": now}
+            for entity_id in entity_ids
+        ])
+
+    @staticmethod
+    def purge_tombstones(retention_days=DEFAULT_TOMBSTONE_RETENTION_DAYS, now=None):
+        """Delete tombstones older than the retention window; returns how many were removed"""
+        cutoff = (now or datetime.utcnow()) - timedelta(days=retention_days)
+        removed = SyncTombstone.query.filter(SyncTombstone.deleted_at < cutoff).delete(synchronize_session=False)
+        db.session.commit()
+        return removed
+
+
+def init_tombstone_tracking():
+    """Hook the ORM so every deleted subject, log, task or reminder leaves a tombstone"""
+    if event.contains(Session, "before_flush", _record_tombstones):
+        return
+    event.listen(Session, "before_flush", _record_tombstones)
+
+
+def _record_tombstones(session, flush_context, instances):
+    # Cascaded deletes (a subject's logs) are already in session.deleted here
+    now = datetime.utcnow()
+    with session.no_autoflush:
+        for obj in list(session.deleted):
+            entity = SYNC_ENTITIES.get(type(obj))
+            if entity is None:
+                continue
+            if isinstance(obj, AttendanceLog):
+                subject = session.get(Subject, obj.subject_id)
+                user_id = subject.user_id if subject is not None else None
+            else:
+                user_id = obj.user_id
+            if user_id is not None:
+                session.add(SyncTombstone(user_id=user_id, entity=entity, entity_id=obj.id, deleted_at=now))
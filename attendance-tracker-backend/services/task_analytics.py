@@ -0,0 +1,155 @@
+from models import db, Task
+from datetime import datetime, timedelta
+from sqlalchemy import func, case
+from bisect import bisect_right
+from services.aggregation import AttendanceAggregator, day_of, seconds_between
+from services.timeseries import DEFAULT_MAX_POINTS, TimeSeriesEngine, bucket_starts, merged_buckets
+
+
+class TaskAnalyticsEngine:
+    """Task throughput, lead time, on-time rate and burn-down per period bucket.
+
+    Everything is computed from four GROUP BY-per-day queries plus the
+    shared task counters query, so the cost is fixed no matter how many
+    tasks a user has; the per-day rows are then folded into buckets.
+    """
+
+    @staticmethod
+    def analytics(user_id, period, start_date, end_date, max_points=DEFAULT_MAX_POINTS):
+        range_start = datetime.combine(start_date, datetime.min.time())
+        range_end = datetime.combine(end_date + timedelta(days=1), datetime.min.time())
+
+        starts = bucket_starts(start_date, end_date, period)
+        n = len(starts)
+
+        def index(day):
+            return max(bisect_right(starts, day) - 1, 0)
+
+        # Completions per day: throughput, on-time and lead time
+        completed_day = day_of(Task.completed_at)
+        completed_rows = db.session.query(
+            completed_day.label("day"),
+            func.count(Task.id).label("completed"),
+            func.sum(case((Task.due_date.isnot(None), 1), else_=0)).label("with_due"),
+            func.sum(case((Task.completed_at <= Task.due_date, 1), else_=0)).label("on_time"),
+            func.sum(seconds_between(Task.completed_at, Task.created_at)).label("lead_seconds"),
+            func.sum(func.coalesce(Task.estimated_hours, 0)).label("hours")
+        ).filter(
+            Task.user_id == user_id,
+            Task.completed == True,
+            Task.completed_at >= range_start,
+            Task.completed_at < range_end
+        ).group_by(completed_day).all()
+
+        # Tasks created per day
+        created_day = day_of(Task.created_at)
+        created_rows = db.session.query(
+            created_day.label("day"),
+            func.count(Task.id).label("created")
+        ).filter(
+            Task.user_id == user_id,
+            Task.created_at >= range_start,
+            Task.created_at < range_end
+        ).group_by(created_day).all()
+
+        # Burn-down scope: estimated hours of tasks due in the range, by due day...
+        due_day = day_of(Task.due_date)
+        due_rows = db.session.query(
+            due_day.label("day"),
+            func.sum(func.coalesce(Task.estimated_hours, 0)).label("hours")
+        ).filter(
+            Task.user_id == user_id,
+            Task.due_date >= range_start,
+            Task.due_date < range_end
+        ).group_by(due_day).all()
+
+        # ...and the same tasks by completion day (completions before the range count as day one)
+        burned_rows = db.session.query(
+            completed_day.label("day"),
+            func.sum(func.coalesce(Task.estimated_hours, 0)).label("hours")
+        ).filter(
+            Task.user_id == user_id,
+            Task.due_date >= range_start,
+            Task.due_date < range_end,
+            Task.completed == True,
+            Task.completed_at.isnot(None),
+            Task.completed_at < range_end
+        ).group_by(completed_day).all()
+
+        completed = [0] * n
+        with_due = [0] * n
+        on_time = [0] * n
+        lead_seconds = [0.0] * n
+        completed_hours = [0.0] * n
+        for row in completed_rows:
+            i = index(row.day)
+            completed[i] += int(row.completed)
+            with_due[i] += int(row.with_due or 0)
+            on_time[i] += int(row.on_time or 0)
+            lead_seconds[i] += float(row.lead_seconds or 0)
+            completed_hours[i] += float(row.hours or 0)
+
+        created = [0] * n
+        for row in created_rows:
+            created[index(row.day)] += int(row.created)
+
+        due_hours = [0.0] * n
+        for row in due_rows:
+            due_hours[index(row.day)] += float(row.hours or 0)
+
+        burned_hours = [0.0] * n
+        for row in burned_rows:
+            burned_hours[index(row.day)] += float(row.hours or 0)
+
+        scope_hours = sum(due_hours)
+        group = TimeSeriesEngine.group_size(n, max_points)
+
+        throughput = []
+        burndown = []
+        planned_done = actual_done = 0.0
+        for window, point_start, point_end in merged_buckets(starts, group, start_date, end_date, period):
+            point = TaskAnalyticsEngine._rates(
+                sum(completed[window]), sum(with_due[window]), sum(on_time[window]), sum(lead_seconds[window])
+            )
+            point.update({
+                "start": point_start.isoformat(),
+                "end": point_end.isoformat(),
+                "created": sum(created[window]),
+                "completed_hours": round(sum(completed_hours[window]), 2)
+            })
+            throughput.append(point)
+
+            planned_done += sum(due_hours[window])
+            actual_done += sum(burned_hours[window])
+            burndown.append({
+                "start": point_start.isoformat(),
+                "end": point_end.isoformat(),
+                "planned_remaining_hours": round(scope_hours - planned_done, 2),
+                "actual_remaining_hours": round(scope_hours - actual_done, 2)
+            })
+
+        summary = TaskAnalyticsEngine._rates(sum(completed), sum(with_due), sum(on_time), sum(lead_seconds))
+        summary.update({
+            "created": sum(created),
+            "completed_hours": round(sum(completed_hours), 2),
+            "scope_hours": round(scope_hours, 2)
+        })
+        summary.update(AttendanceAggregator.task_counters(user_id))
+
+        return {
+            "period": period,
+            "start_date": start_date.isoformat(),
+            "end_date": end_date.isoformat(),
+            "buckets_per_point": group,
+            "throughput": throughput,
+            "burndown": burndown,
+            "summary": summary
+        }
+
+    @staticmethod
+    def _rates(completed, with_due, on_time, lead_seconds):
+        return {
+            "completed": completed,
+            "on_time_rate": round(on_time / with_due * 100, 2) if with_due else None,
+            "avg_lead_time_hours": round(lead_seconds / completed / 3600, 2) if completed else None
+        }
@@ -0,0 +1,195 @@
+from models import db, Subject, AttendanceDailyRollup
+from datetime import date, timedelta
+from sqlalchemy import func
+from bisect import bisect_right
+
+PERIODS = ("day", "week", "month", "semester")
+SEMESTER_START_MONTHS = (1, 7)  # half-year terms starting in January and July
+
+# Range covered when the caller gives no start date
+DEFAULT_SPANS = {
+    "day": timedelta(days=30),
+    "week": timedelta(weeks=12),
+    "month": timedelta(days=365),
+    "semester": timedelta(days=4 * 365)
+}
+
+MAX_RANGE = timedelta(days=10 * 366)  # longest range a single request may cover
+DEFAULT_MAX_POINTS = 60
+MAX_POINTS_LIMIT = 366
+
+
+def bucket_start(day, period):
+    """First day of the bucket containing ``day``"""
+    if period == "day":
+        return day
+    if period == "week":
+        return day - timedelta(days=day.weekday())  # weeks start on Monday
+    if period == "month":
+        return day.replace(day=1)
+    if period == "semester":
+        month = max(m for m in SEMESTER_START_MONTHS if m <= day.month)
+        return date(day.year, month, 1)
+    raise ValueError(f"Invalid period: {period}")
+
+
+def next_bucket(start, period):
+    """First day of the bucket after the one starting at ``start``"""
+    if period == "day":
+        return start + timedelta(days=1)
+    if period == "week":
+        return start + timedelta(weeks=1)
+    if period == "month":
+        return date(start.year + start.month // 12, start.month % 12 + 1, 1)
+    if period == "semester":
+        later = [m for m in SEMESTER_START_MONTHS if m > start.month]
+        return date(start.year, later[0], 1) if later else date(start.year + 1, SEMESTER_START_MONTHS[0], 1)
+    raise ValueError(f"Invalid period: {period}")
+
+
+def bucket_starts(start_date, end_date, period):
+    """Start of every bucket overlapping the (inclusive) date range, oldest first"""
+    starts = []
+    current = bucket_start(start_date, period)
+    while current <= end_date:
+        starts.append(current)
+        current = next_bucket(current, period)
+    return starts
+
+
+def merged_buckets(starts, group, start_date, end_date, period):
+    """Yield (slice, start, end) for each run of ``group`` consecutive buckets, clipped to the range"""
+    for i in range(0, len(starts), group):
+        last = min(i + group, len(starts)) - 1
+        point_end = min(next_bucket(starts[last], period) - timedelta(days=1), end_date)
+        yield slice(i, last + 1), max(starts[i], start_date), point_end
+
+
+def parse_series_args(args, today=None):
+    """Period, date range and point limit from request query parameters.
+
+    Raises ValueError with a client-facing message for invalid input.
+    """
+    period = args.get("period", "week")
+
+    def parse_date(name):
+        value = args.get(name)
+        if not value:
+            return None
+        try:
+            return date.fromisoformat(value)
+        except ValueError:
+            raise ValueError(f"Invalid {name}, expected YYYY-MM-DD")
+
+    start_date, end_date = TimeSeriesEngine.resolve_range(period, parse_date("start"), parse_date("end"), today)
+    try:
+        max_points = int(args.get("max_points", DEFAULT_MAX_POINTS))
+    except ValueError:
+        raise ValueError("max_points must be an integer")
+    return period, start_date, end_date, max_points
+
+
+class TimeSeriesEngine:
+    """Period-bucketed attendance series read from AttendanceDailyRollup.
+
+    One GROUP BY query returns per-day (optionally per-subject) counts for
+    the whole range; bucketing and downsampling then happen in memory over
+    at most one row per day and subject, so the cost does not depend on how
+    many individual logs the range contains.
+    """
+
+    @staticmethod
+    def resolve_range(period, start_date=None, end_date=None, today=None):
+        """Fill in a default range for the period and validate it"""
+        if period not in PERIODS:
+            raise ValueError(f"Period must be one of: {', '.join(PERIODS)}")
+        end_date = end_date or today or date.today()
+        start_date = start_date or (end_date - DEFAULT_SPANS[period])
+        if start_date > end_date:
+            raise ValueError("Start date must be on or before end date")
+        if end_date - start_date > MAX_RANGE:
+            raise ValueError("Date range may cover at most 10 years")
+        return start_date, end_date
+
+    @staticmethod
+    def attendance(user_id, period, start_date, end_date, subject_id=None, by_subject=False,
+                   max_points=DEFAULT_MAX_POINTS):
+        """Overall (and optionally per-subject) present/total per bucket"""
+        query = db.session.query(
+            AttendanceDailyRollup.subject_id,
+            AttendanceDailyRollup.date,
+            func.sum(AttendanceDailyRollup.present_count).label("present"),
+            func.sum(AttendanceDailyRollup.present_count + AttendanceDailyRollup.absent_count).label("total")
+        ).filter(
+            AttendanceDailyRollup.user_id == user_id,
+            AttendanceDailyRollup.date >= start_date,
+            AttendanceDailyRollup.date <= end_date
+        )
+        if subject_id is not None:
+            query = query.filter(AttendanceDailyRollup.subject_id == subject_id)
+        rows = query.group_by(AttendanceDailyRollup.subject_id, AttendanceDailyRollup.date).all()
+
+        starts = bucket_starts(start_date, end_date, period)
+        overall_present = [0] * len(starts)
+        overall_total = [0] * len(starts)
+        per_subject = {}
+        for row in rows:
+            i = bisect_right(starts, row.date) - 1
+            present, total = int(row.present), int(row.total)
+            overall_present[i] += present
+            overall_total[i] += total
+            if by_subject:
+                counts = per_subject.setdefault(row.subject_id, ([0] * len(starts), [0] * len(starts)))
+                counts[0][i] += present
+                counts[1][i] += total
+
+        group = TimeSeriesEngine.group_size(len(starts), max_points)
+        result = {
+            "period": period,
+            "start_date": start_date.isoformat(),
+            "end_date": end_date.isoformat(),
+            "buckets_per_point": group,
+            "series": TimeSeriesEngine._series(starts, overall_present, overall_total, group, start_date, end_date, period),
+            "summary": TimeSeriesEngine._point(sum(overall_present), sum(overall_total))
+        }
+
+        if by_subject:
+            names = dict(db.session.query(Subject.id, Subject.name).filter(
+                Subject.user_id == user_id,
+                Subject.id.in_(per_subject.keys())
+            ).all()) if per_subject else {}
+            result["subjects"] = [
+                {
+                    "subject_id": sid,
+                    "name": names.get(sid),
+                    "series": TimeSeriesEngine._series(starts, present, total, group, start_date, end_date, period),
+                    "summary": TimeSeriesEngine._point(sum(present), sum(total))
+                }
+                for sid, (present, total) in sorted(per_subject.items())
+            ]
+        return result
+
+    @staticmethod
+    def group_size(n_buckets, max_points):
+        """Consecutive buckets merged per point so at most ``max_points`` are returned"""
+        max_points = max(1, min(max_points, MAX_POINTS_LIMIT))
+        return max(1, -(-n_buckets // max_points))
+
+    @staticmethod
+    def _series(starts, present, total, group, start_date, end_date, period):
+        # Counts are additive, so downsampling sums whole buckets instead of
+        # sampling them and the merged percentages stay exact.
+        series = []
+        for window, point_start, point_end in merged_buckets(starts, group, start_date, end_date, period):
+            point = TimeSeriesEngine._point(sum(present[window]), sum(total[window]))
+            point.update({"start": point_start.isoformat(), "end": point_end.isoformat()})
+            series.append(point)
+        return series
+
+    @staticmethod
+    def _point(present, total):
+        return {
+            "present": present,
+            "total": total,
+            "percentage": round(present / total * 100, 2) if total else None
+        }
@@ -0,0 +1,50 @@
+import os
+import sys
+import tempfile
+import uuid
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+# A throwaway file database, so threads in the concurrency tests share it,
+# unless TEST_DATABASE_URL points at a scratch server database (needed for the
+# concurrency tests to race: SQLite runs one writer at a time).
+# Must be set before ``app`` is imported: Config reads it at import time.
+if os.environ.get("TEST_DATABASE_URL"):
+    os.environ["DATABASE_URL"] = os.environ["TEST_DATABASE_URL"]
+else:
+    _DB_DIR = tempfile.mkdtemp(prefix="attendance-tests-")
+    os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(_DB_DIR, "test.db")
+
+
+@pytest.fixture(scope="session")
+def app():
+    from app import app as flask_app
+    flask_app.config["TESTING"] = True
+    return flask_app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def auth_headers(client):
+    """Authorization header of a newly registered user"""
+    response = client.post("/api/auth/register", json={
+        "name": "Test Student",
+        "email": f"{uuid.uuid4().hex}@example.com",
+        "password": "password123"
+    })
+    assert response.status_code == 201, response.get_json()
+    return {"Authorization": f"Bearer {response.get_json()['token']}"}
+
+
+@pytest.fixture
+def subject_id(client, auth_headers):
+    response = client.post("/api/subjects/", headers=auth_headers, json={"name": "Mathematics", "type": "theory"})
+    assert response.status_code == 201, response.get_json()
+    return response.get_json()["subject"]["id"]
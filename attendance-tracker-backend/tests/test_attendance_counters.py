@@ -0,0 +1,57 @@
+"""Concurrent marking against the atomic counter and log writes.
+
+SQLite serializes writers, so on the default test database these only
+check that the counters come out exact under load. Run them with
+TEST_DATABASE_URL pointing at a PostgreSQL database to exercise the
+lost-update race that ``adjust_counters`` guards against.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+MARKS = 400
+WORKERS = 32
+
+
+def _mark(app, headers, subject_id, day, status):
+    response = app.test_client().post("/api/attendance/mark", headers=headers, json={
+        "subject_id": subject_id,
+        "status": status,
+        "date": (date(2024, 1, 1) + timedelta(days=day)).isoformat()
+    })
+    return response.status_code
+
+
+def test_parallel_marks_keep_exact_counters(app, client, auth_headers, subject_id):
+    statuses = ["Present" if i % 3 else "Absent" for i in range(MARKS)]
+    with ThreadPoolExecutor(WORKERS) as pool:
+        codes = list(pool.map(lambda i: _mark(app, auth_headers, subject_id, i, statuses[i]), range(MARKS)))
+    assert codes == [201] * MARKS
+
+    from models import db, Subject, AttendanceLog
+    with app.app_context():
+        db.session.expire_all()
+        subject = db.session.get(Subject, subject_id)
+        logged = AttendanceLog.query.filter_by(subject_id=subject_id).count()
+        present = AttendanceLog.query.filter_by(subject_id=subject_id, status="Present").count()
+        assert (logged, present) == (MARKS, statuses.count("Present"))
+        assert (subject.total_classes, subject.attended_classes) == (logged, present)
+
+
+def test_parallel_duplicate_marks_count_once(app, client, auth_headers, subject_id):
+    with ThreadPoolExecutor(WORKERS) as pool:
+        codes = list(pool.map(lambda _: _mark(app, auth_headers, subject_id, 0, "Present"), range(WORKERS)))
+    assert sorted(codes) == [201] + [400] * (WORKERS - 1)
+
+    response = client.get(f"/api/attendance/stats/{subject_id}", headers=auth_headers).get_json()
+    assert (response["statistics"]["total_classes"], response["statistics"]["present_count"]) == (1, 1)
+    assert response["recent_attendance"] == [{"date": "2024-01-01", "status": "Present"}]
+
+
+def test_dashboard_snapshot_sees_latest_counters(client, auth_headers, subject_id):
+    assert client.get("/api/analytics/dashboard", headers=auth_headers).status_code == 200
+    for day in range(2):
+        assert _mark(client.application, auth_headers, subject_id, day, "Present") == 201
+
+    dashboard = client.get("/api/analytics/dashboard", headers=auth_headers).get_json()["dashboard"]
+    assert dashboard["attendance_overview"]["total_classes"] == 2
+    assert dashboard["attendance_overview"]["total_attended"] == 2
@@ -0,0 +1,41 @@
+import io
+
+CSV = (
+    "date,subject,status\n"
+    "2024-02-01,Mathematics,Present\n"
+    "2024-02-02,Mathematics,Absent\n"
+    "2024-02-01,Physics,Present\n"
+    "2024-02-02,Physics,Present\n"
+    "2024-02-03,Physics,Absent\n"
+)
+
+
+def _import(client, headers, **form):
+    data = {"file": (io.BytesIO(CSV.encode()), "history.csv"), **form}
+    return client.post("/api/attendance/import", headers=headers, data=data, content_type="multipart/form-data")
+
+
+def test_import_updates_counters_and_dashboard(client, auth_headers, subject_id):
+    assert client.get("/api/analytics/dashboard", headers=auth_headers).status_code == 200
+
+    response = _import(client, auth_headers, create_subjects="true")
+    assert response.status_code == 201, response.get_json()
+    assert response.get_json()["report"]["imported"] == 5
+
+    subjects = {s["name"]: s for s in client.get("/api/subjects/", headers=auth_headers).get_json()["subjects"]}
+    assert (subjects["Mathematics"]["total_classes"], subjects["Mathematics"]["attended_classes"]) == (2, 1)
+    assert (subjects["Physics"]["total_classes"], subjects["Physics"]["attended_classes"]) == (3, 2)
+
+    dashboard = client.get("/api/analytics/dashboard", headers=auth_headers).get_json()["dashboard"]
+    assert dashboard["attendance_overview"]["total_classes"] == 5
+    assert dashboard["attendance_overview"]["total_attended"] == 3
+
+
+def test_import_dry_run_changes_nothing(client, auth_headers, subject_id):
+    response = _import(client, auth_headers, dry_run="true")
+    assert response.status_code == 200
+    report = response.get_json()["report"]
+    assert report["imported"] == 2 and report["invalid"] == 3
+
+    stats = client.get(f"/api/attendance/stats/{subject_id}", headers=auth_headers).get_json()["statistics"]
+    assert stats["total_classes"] == 0
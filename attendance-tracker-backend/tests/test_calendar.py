@@ -0,0 +1,28 @@
+from datetime import date, timedelta
+
+
+def test_weekly_overview_counts_match_entries(client, auth_headers, subject_id):
+    monday = date.today() - timedelta(days=date.today().weekday())
+    for offset, status in ((0, "Present"), (1, "Absent"), (2, "Present")):
+        client.post("/api/attendance/mark", headers=auth_headers, json={
+            "subject_id": subject_id, "status": status, "date": (monday + timedelta(days=offset)).isoformat()
+        })
+
+    overview = client.get("/api/calendar/weekly-overview", headers=auth_headers).get_json()["week_overview"]
+    for day in overview["days"].values():
+        assert day["summary"]["classes"] == len(day["attendance"])
+        assert day["summary"]["present"] == sum(1 for entry in day["attendance"] if entry["status"] == "Present")
+    assert overview["weekly_summary"]["total_classes"] == 3
+    assert overview["weekly_summary"]["total_present"] == 2
+
+
+def test_month_calendar_status_follows_entries(client, auth_headers, subject_id):
+    for day, status in ((5, "Present"), (6, "Absent")):
+        client.post("/api/attendance/mark", headers=auth_headers, json={
+            "subject_id": subject_id, "status": status, "date": date(2024, 5, day).isoformat()
+        })
+
+    weeks = client.get("/api/calendar/calendar/2024/5", headers=auth_headers).get_json()["calendar"]["weeks"]
+    days = {d["day"]: d for week in weeks for d in week if d}
+    assert (days[5]["status"], days[6]["status"], days[7]["status"]) == ("perfect", "absent", "no-classes")
+    assert days[5]["attendance_percentage"] == 100 and len(days[6]["attendance"]) == 1
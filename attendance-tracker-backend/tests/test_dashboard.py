@@ -0,0 +1,73 @@
+from datetime import date, timedelta
+
+from services.dashboard import DashboardService, ATTENDANCE_SECTION
+
+
+def _user_id(client, headers):
+    return client.get("/api/auth/profile", headers=headers).get_json()["id"]
+
+
+def _mark(client, headers, subject_id, days_ago, status, notes=None):
+    response = client.post("/api/attendance/mark", headers=headers, json={
+        "subject_id": subject_id,
+        "status": status,
+        "date": (date.today() - timedelta(days=days_ago)).isoformat(),
+        "notes": notes
+    })
+    assert response.status_code == 201, response.get_json()
+    return response.get_json()["attendance_log"]["id"]
+
+
+def _assert_matches_rebuild(app, client, headers, user_id):
+    """The stored section equals a full rebuild (served without rebuilding on read)"""
+    stored = client.get("/api/analytics/dashboard", headers=headers).get_json()["dashboard"]
+    with app.app_context():
+        snapshot = DashboardService.get_snapshot(user_id)[ATTENDANCE_SECTION]
+        assert snapshot == DashboardService.build_attendance_section(user_id, date.today())
+    assert stored["attendance_overview"] == snapshot["overview"]
+
+
+def test_writes_patch_the_snapshot_without_rebuilding(app, client, auth_headers, subject_id, monkeypatch):
+    user_id = _user_id(client, auth_headers)
+    other_id = client.post("/api/subjects/", headers=auth_headers, json={
+        "name": "Physics", "type": "lab"
+    }).get_json()["subject"]["id"]
+    assert client.get("/api/analytics/dashboard", headers=auth_headers).status_code == 200
+
+    builds = []
+    build = DashboardService.build_attendance_section
+    monkeypatch.setattr(DashboardService, "build_attendance_section",
+                        staticmethod(lambda *args: builds.append(args) or build(*args)))
+
+    log_ids = [
+        _mark(client, auth_headers, subject_id if i % 2 else other_id, i, "Present" if i % 3 else "Absent", f"n{i}")
+        for i in range(14)
+    ]
+    _mark(client, auth_headers, subject_id, 40, "Present")  # outside the trend window
+
+    response = client.put(f"/api/attendance/update/{log_ids[1]}", headers=auth_headers, json={
+        "status": "Absent", "date": (date.today() - timedelta(days=20)).isoformat()
+    })
+    assert response.status_code == 200, response.get_json()
+    assert client.delete(f"/api/attendance/{log_ids[0]}", headers=auth_headers).status_code == 200
+    assert client.put(f"/api/subjects/{subject_id}", headers=auth_headers, json={
+        "name": "Algebra", "target_percentage": 90
+    }).status_code == 200
+    assert client.put(f"/api/subjects/{other_id}", headers=auth_headers, json={"is_archived": True}).status_code == 200
+
+    assert builds == []
+    monkeypatch.undo()
+    _assert_matches_rebuild(app, client, auth_headers, user_id)
+
+
+def test_bulk_marks_rebuild_the_snapshot(app, client, auth_headers, subject_id):
+    user_id = _user_id(client, auth_headers)
+    _mark(client, auth_headers, subject_id, 3, "Present")
+    assert client.get("/api/analytics/dashboard", headers=auth_headers).status_code == 200
+
+    response = client.post("/api/attendance/mark/bulk", headers=auth_headers, json={"entries": [
+        {"subject_id": subject_id, "status": "Absent", "date": (date.today() - timedelta(days=i)).isoformat()}
+        for i in range(4, 9)
+    ]})
+    assert response.status_code == 201, response.get_json()
+    _assert_matches_rebuild(app, client, auth_headers, user_id)
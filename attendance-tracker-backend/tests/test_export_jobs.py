@@ -0,0 +1,94 @@
+import os
+from datetime import datetime, timedelta
+
+
+def _user_id(client, headers):
+    return client.get("/api/auth/profile", headers=headers).get_json()["id"]
+
+
+def test_stale_queued_job_is_failed_and_resubmitted(app, client, auth_headers, subject_id):
+    from models import db, ExportJob
+    from services.export_jobs import ExportJobService, PDF_REPORT
+
+    user_id = _user_id(client, auth_headers)
+    with app.app_context():
+        fingerprint = ExportJobService.fingerprint(ExportJobService.collect_report_data(user_id))
+        db.session.add(ExportJob(
+            id="orphaned-job", user_id=user_id, kind=PDF_REPORT, status="queued", fingerprint=fingerprint,
+            created_at=datetime.utcnow() - timedelta(hours=1)
+        ))
+        db.session.commit()
+
+    status = client.get("/api/analytics/export/jobs/orphaned-job", headers=auth_headers).get_json()["job"]
+    assert status["status"] == "failed"
+
+    response = client.post("/api/analytics/export/pdf/jobs", headers=auth_headers)
+    assert response.status_code == 202
+    assert response.get_json()["job"]["id"] != "orphaned-job"
+
+
+def test_recent_queued_job_is_reused(app, client, auth_headers, subject_id):
+    from models import db, ExportJob
+    from services.export_jobs import ExportJobService, PDF_REPORT
+
+    user_id = _user_id(client, auth_headers)
+    with app.app_context():
+        fingerprint = ExportJobService.fingerprint(ExportJobService.collect_report_data(user_id))
+        db.session.add(ExportJob(id="running-job", user_id=user_id, kind=PDF_REPORT, status="queued", fingerprint=fingerprint))
+        db.session.commit()
+
+    response = client.post("/api/analytics/export/pdf/jobs", headers=auth_headers)
+    assert response.status_code == 200
+    assert response.get_json()["job"]["id"] == "running-job"
+
+
+def test_pdf_download_is_queued_as_a_job(app, client, auth_headers, subject_id):
+    from models import db, ExportJob
+    from services.export_jobs import ExportJobService, PDF_REPORT
+
+    user_id = _user_id(client, auth_headers)
+    with app.app_context():
+        fingerprint = ExportJobService.fingerprint(ExportJobService.collect_report_data(user_id))
+        db.session.add(ExportJob(id="pdf-job", user_id=user_id, kind=PDF_REPORT, status="queued", fingerprint=fingerprint))
+        db.session.commit()
+
+    response = client.get("/api/attendance/export?format=pdf", headers=auth_headers)
+    assert response.status_code == 202
+    assert response.get_json()["job"]["id"] == "pdf-job"
+    assert response.headers["Location"].endswith("/api/analytics/export/jobs/pdf-job")
+
+    with app.app_context():
+        job = db.session.get(ExportJob, "pdf-job")
+        job.file_path = os.path.join(ExportJobService.export_folder(), "pdf-job.pdf")
+        job.filename = "report.pdf"
+        job.status = "completed"
+        with open(job.file_path, "wb") as f:
+            f.write(b"%PDF-1.4 rendered")
+        db.session.commit()
+
+    response = client.get("/api/attendance/export?format=pdf", headers=auth_headers)
+    assert response.status_code == 200
+    assert response.data == b"%PDF-1.4 rendered"
+
+
+def test_expired_jobs_are_gone_then_purged(app, client, auth_headers, subject_id):
+    from models import db, ExportJob
+    from services.export_jobs import ExportJobService, PDF_REPORT
+
+    user_id = _user_id(client, auth_headers)
+    with app.app_context():
+        file_path = os.path.join(ExportJobService.export_folder(), "expired-job.pdf")
+        with open(file_path, "wb") as f:
+            f.write(b"%PDF-1.4 old")
+        db.session.add(ExportJob(
+            id="expired-job", user_id=user_id, kind=PDF_REPORT, status="completed", fingerprint="old",
+            file_path=file_path, filename="report.pdf", created_at=datetime.utcnow() - timedelta(days=2)
+        ))
+        db.session.commit()
+
+    assert client.get("/api/analytics/export/jobs/expired-job/download", headers=auth_headers).status_code == 410
+
+    result = app.test_cli_runner().invoke(args=["purge-export-jobs"])
+    assert "Removed" in result.output
+    assert not os.path.exists(file_path)
+    assert client.get("/api/analytics/export/jobs/expired-job", headers=auth_headers).status_code == 404
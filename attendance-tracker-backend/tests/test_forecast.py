@@ -0,0 +1,13 @@
+import pytest
+
+
+@pytest.mark.parametrize("samples", ["0", "-5", "abc"])
+def test_invalid_sample_counts_are_rejected(client, auth_headers, samples):
+    response = client.get(f"/api/subjects/predictions?samples={samples}", headers=auth_headers)
+    assert response.status_code == 400
+
+
+def test_sample_count_is_echoed(client, auth_headers, subject_id):
+    response = client.get("/api/subjects/predictions?samples=200", headers=auth_headers)
+    assert response.status_code == 200
+    assert response.get_json()["samples"] == 200
@@ -0,0 +1,54 @@
+import uuid
+
+
+def _mark(client, headers, subject_id, key, status="Present", day="2024-04-01"):
+    return client.post("/api/attendance/mark", headers={**headers, "Idempotency-Key": key}, json={
+        "subject_id": subject_id, "status": status, "date": day
+    })
+
+
+def _total(client, headers, subject_id):
+    return client.get(f"/api/attendance/stats/{subject_id}", headers=headers).get_json()["statistics"]["total_classes"]
+
+
+def test_retry_replays_stored_response(app, client, auth_headers, subject_id):
+    key = uuid.uuid4().hex
+    first = _mark(client, auth_headers, subject_id, key)
+    assert first.status_code == 201
+
+    # A fresh client and session stand in for another worker process
+    from models import db, IdempotencyKey
+    with app.app_context():
+        db.session.remove()
+        assert db.session.query(IdempotencyKey).filter_by(key=key).one().status_code == 201
+    retry = _mark(app.test_client(), auth_headers, subject_id, key)
+
+    assert retry.status_code == 201
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert retry.get_json() == first.get_json()
+    assert _total(client, auth_headers, subject_id) == 1
+
+
+def test_key_reused_for_different_request_is_rejected(client, auth_headers, subject_id):
+    key = uuid.uuid4().hex
+    assert _mark(client, auth_headers, subject_id, key).status_code == 201
+    assert _mark(client, auth_headers, subject_id, key, status="Absent").status_code == 422
+    assert _total(client, auth_headers, subject_id) == 1
+
+
+def test_error_responses_are_stored_without_committing_the_write(client, auth_headers, subject_id):
+    key = uuid.uuid4().hex
+    first = _mark(client, auth_headers, subject_id, key, day="not-a-date")
+    assert first.status_code == 400
+    retry = _mark(client, auth_headers, subject_id, key, day="not-a-date")
+    assert retry.status_code == 400 and retry.headers["Idempotent-Replayed"] == "true"
+    assert _total(client, auth_headers, subject_id) == 0
+
+
+def test_expired_key_runs_the_request_again(app, client, auth_headers, subject_id, monkeypatch):
+    key = uuid.uuid4().hex
+    assert _mark(client, auth_headers, subject_id, key).status_code == 201
+    monkeypatch.setitem(app.config, "IDEMPOTENCY_TTL", -1)
+    retry = _mark(client, auth_headers, subject_id, key)
+    assert retry.status_code == 400
+    assert "Idempotent-Replayed" not in retry.headers
@@ -0,0 +1,30 @@
+import json
+import os
+import subprocess
+import sys
+
+from conftest import BACKEND_DIR
+
+# Export backends are imported only when an export actually runs
+HEAVY_MODULES = ("reportlab", "openpyxl", "pyarrow", "pandas")
+IMPORT_BUDGET_SECONDS = 3.0  # about 1s on a laptop; generous so slow CI machines don't flake
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import app
+elapsed = time.perf_counter() - start
+print(json.dumps({"elapsed": elapsed, "loaded": [name for name in %r if name in sys.modules]}))
+""" % (HEAVY_MODULES,)
+
+
+def test_app_import_is_lean(tmp_path):
+    env = {**os.environ, "DATABASE_URL": "sqlite:///" + str(tmp_path / "import.db")}
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE], cwd=BACKEND_DIR, env=env, capture_output=True, text=True, timeout=60
+    )
+    assert result.returncode == 0, result.stderr
+    probe = json.loads(result.stdout.strip().splitlines()[-1])
+
+    assert probe["loaded"] == []
+    assert probe["elapsed"] < IMPORT_BUDGET_SECONDS
@@ -0,0 +1,12 @@
+from datetime import date, timedelta
+
+
+def test_streak_insight_counts_at_most_the_last_20_classes(client, auth_headers, subject_id):
+    for i in range(22):
+        assert client.post("/api/attendance/mark", headers=auth_headers, json={
+            "subject_id": subject_id, "status": "Present", "date": (date(2024, 7, 1) + timedelta(days=i)).isoformat()
+        }).status_code == 201
+
+    insights = client.get("/api/analytics/insights", headers=auth_headers).get_json()["insights"]
+    streaks = [i["message"] for i in insights if i["type"] == "achievement" and "streak" in i["message"]]
+    assert streaks == ["Great job! You have a 20-class attendance streak in Mathematics"]
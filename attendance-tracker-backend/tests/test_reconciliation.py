@@ -0,0 +1,49 @@
+from datetime import date, timedelta
+
+
+def test_incremental_pass_repairs_drift_in_chunks(app, client, auth_headers, subject_id):
+    from models import db, Subject
+    from services.reconciliation import CounterReconciliation
+
+    with app.app_context():
+        CounterReconciliation.run(full=True)  # baseline: later passes only look at changes
+
+    other = client.post("/api/subjects/", headers=auth_headers, json={"name": "Physics", "type": "lab"}).get_json()["subject"]["id"]
+    for i, sid in enumerate((subject_id, other)):
+        client.post("/api/attendance/mark", headers=auth_headers, json={
+            "subject_id": sid, "status": "Present", "date": (date(2024, 6, 3) + timedelta(days=i)).isoformat()
+        })
+
+    with app.app_context():
+        db.session.execute(db.text("UPDATE subject SET total_classes = 9 WHERE id IN (:a, :b)"), {"a": subject_id, "b": other})
+        db.session.commit()
+
+        report = CounterReconciliation.run(chunk_size=1)
+        assert report["completed"] and report["chunks"] == report["subjects_checked"]
+        assert report["subjects_fixed"] == 2
+
+        counters = {s.id: (s.total_classes, s.attended_classes) for s in Subject.query.filter(Subject.id.in_((subject_id, other)))}
+        assert counters == {subject_id: (1, 1), other: (1, 1)}
+
+
+def test_concurrently_changed_subjects_are_reported_as_skipped(app, client, auth_headers, subject_id, monkeypatch):
+    from models import db
+    from services.reconciliation import CounterReconciliation
+
+    client.post("/api/attendance/mark", headers=auth_headers, json={
+        "subject_id": subject_id, "status": "Present", "date": "2024-06-03"
+    })
+    with app.app_context():
+        db.session.execute(db.text("UPDATE subject SET total_classes = 9 WHERE id = :id"), {"id": subject_id})
+        db.session.commit()
+
+    # Compared against counters that a concurrent write has since changed
+    drift = CounterReconciliation.drift
+    monkeypatch.setattr(CounterReconciliation, "drift", staticmethod(
+        lambda ids: [(row[0], row[1], row[2] + 1) + tuple(row[3:]) if row[0] == subject_id else row for row in drift(ids)]
+    ))
+    with app.app_context():
+        report = CounterReconciliation.run(full=True)
+        assert report["subjects_drifted"] >= 1
+        assert report["subjects_skipped"] == 1
+        assert report["subjects_fixed"] == report["subjects_drifted"] - 1
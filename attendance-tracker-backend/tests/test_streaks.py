@@ -0,0 +1,43 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+START = date(2024, 3, 1)
+
+
+def _mark(app, headers, subject_id, day, status):
+    return app.test_client().post("/api/attendance/mark", headers=headers, json={
+        "subject_id": subject_id,
+        "status": status,
+        "date": (START + timedelta(days=day)).isoformat()
+    }).status_code
+
+
+def _expected(statuses):
+    """(current count, current type, longest Present run) for statuses oldest first"""
+    current, longest, run = 0, 0, 0
+    for i, status in enumerate(statuses):
+        current = current + 1 if i and statuses[i - 1] == status else 1
+        run = run + 1 if status == "Present" else 0
+        longest = max(longest, run)
+    return current, statuses[-1], longest
+
+
+def _streaks(client, headers, subject_id):
+    stats = client.get(f"/api/attendance/stats/{subject_id}", headers=headers).get_json()["statistics"]
+    return stats["current_streak"]["count"], stats["current_streak"]["type"], stats["longest_streak"]
+
+
+def test_streaks_follow_appended_and_backdated_marks(app, client, auth_headers, subject_id):
+    statuses = ["Present"] * 4 + ["Absent"] * 2 + ["Present"] * 3
+    order = [0, 1, 2, 3, 4, 5, 8, 7, 6]  # the last three arrive back-dated
+    for day in order:
+        assert _mark(app, auth_headers, subject_id, day, statuses[day]) == 201
+    assert _streaks(client, auth_headers, subject_id) == _expected(statuses)
+
+
+def test_parallel_marks_keep_streaks_consistent(app, client, auth_headers, subject_id):
+    statuses = ["Absent" if i % 7 == 3 else "Present" for i in range(60)]
+    with ThreadPoolExecutor(16) as pool:
+        codes = list(pool.map(lambda i: _mark(app, auth_headers, subject_id, i, statuses[i]), range(len(statuses))))
+    assert codes == [201] * len(statuses)
+    assert _streaks(client, auth_headers, subject_id) == _expected(statuses)
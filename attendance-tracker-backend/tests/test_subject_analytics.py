@@ -0,0 +1,28 @@
+import pytest
+
+
+@pytest.mark.parametrize("target, attended, total", [
+    (100 / 3, 5, 15),  # 100/3 * 15 is 500.00000000000006 in floats
+    (200 / 3, 10, 15),
+    (800 / 11, 8, 11),
+    (33.33, 3333, 10000),
+])
+def test_card_and_at_risk_list_agree_at_exact_target(app, client, auth_headers, subject_id, target, attended, total):
+    from models import db
+
+    assert client.put(f"/api/subjects/{subject_id}", headers=auth_headers, json={
+        "target_percentage": target
+    }).status_code == 200
+    with app.app_context():
+        db.session.execute(db.text("UPDATE subject SET total_classes = :total, attended_classes = :attended WHERE id = :id"), {
+            "total": total, "attended": attended, "id": subject_id
+        })
+        db.session.commit()
+
+    card = client.get(f"/api/subjects/{subject_id}", headers=auth_headers).get_json()["subject"]
+    analytics = client.get("/api/subjects/analytics", headers=auth_headers).get_json()["analytics"]
+    at_risk = [item["id"] for item in analytics["action_items"]["immediate_attention"]]
+
+    assert card["status"] == "good"
+    assert subject_id not in at_risk
+    assert analytics["summary"]["subjects_below_target"] == 0
@@ -0,0 +1,59 @@
+import math
+from typing import NamedTuple, Optional
+
+DEFAULT_TARGET = 75.0
+EPSILON = 1e-9  # absorbs float error so exact boundaries round the right way
+
+
+class SubjectMetrics(NamedTuple):
+    """Derived attendance figures for one subject"""
+    percentage: float  # rounded to 2 decimals
+    classes_needed: Optional[int]  # consecutive classes to attend to reach the target; None if unreachable
+    can_afford_to_miss: Optional[int]  # classes that can be missed while staying on target; None if unlimited
+    meets_target: bool
+
+    @property
+    def status(self):
+        return "good" if self.meets_target else "warning"
+
+
+def attendance_metrics(total, attended, target):
+    """Percentage, classes needed and safe-to-miss count from closed-form formulas.
+
+    Attending x more classes reaches the target T when
+    (attended + x) / (total + x) >= T/100, i.e. x >= (T*total - 100*attended) / (100 - T);
+    missing m classes keeps it when attended / (total + m) >= T/100, i.e.
+    m <= 100*attended/T - total.
+    """
+    total = total or 0
+    attended = attended or 0
+    target = DEFAULT_TARGET if target is None else target
+
+    percentage = round(attended / total * 100, 2) if total else 0.0
+    # Compared exactly rather than on the rounded percentage, so a subject shown
+    # as 75.0% with a 75% target but actually 74.996% still counts as below it
+    meets_target = attended * 100 >= target * total - EPSILON if total else target <= 0
+
+    if meets_target:
+        classes_needed = 0
+    elif target >= 100:
+        classes_needed = None if total else 1  # a missed class can never be made up
+    else:
+        classes_needed = max(1, math.ceil((target * total - 100 * attended) / (100 - target) - EPSILON))
+
+    if not total or not meets_target:
+        can_afford_to_miss = 0
+    elif target <= 0:
+        can_afford_to_miss = None
+    else:
+        can_afford_to_miss = max(0, math.floor(100 * attended / target - total + EPSILON))
+
+    return SubjectMetrics(percentage, classes_needed, can_afford_to_miss, meets_target)
+
+
+def metrics_for(subjects):
+    """Map of subject id -> SubjectMetrics, evaluated once per subject"""
+    return {
+        subject.id: attendance_metrics(subject.total_classes, subject.attended_classes, subject.target_percentage)
+        for subject in subjects
+    }
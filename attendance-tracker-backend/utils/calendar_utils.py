@@ -157,7 +157,7 @@ class CalendarUtils:
     @staticmethod
     def get_attendance_calendar(user_id: int, year: int = None, month: int = None) -> Dict[str, Any]:
         """Generate attendance calendar for a user"""
-        from models import AttendanceLog, Subject
+        from services.aggregation import AttendanceAggregator
         
         if year is None:
             year = datetime.now().year
@@ -168,25 +168,9 @@ class CalendarUtils:
         first_day = date(year, month, 1)
         last_day = date(year, month, calendar.monthrange(year, month)[1])
         
-        # Get all attendance logs for the month
-        logs = AttendanceLog.query.join(Subject).filter(
-            Subject.user_id == user_id,
-            AttendanceLog.date >= first_day,
-            AttendanceLog.date <= last_day
-        ).all()
-        
-        # Group logs by date
-        daily_attendance = {}
-        for log in logs:
-            date_str = log.date.isoformat()
-            if date_str not in daily_attendance:
-                daily_attendance[date_str] = []
-            
-            daily_attendance[date_str].append({
-                "subject": log.subject.name,
-                "status": log.status,
-                "notes": log.notes
-            })
+        # One column query for the detail lists; per-day totals are counted from it
+        daily_entries = AttendanceAggregator.daily_entries(user_id, first_day, last_day)
+        daily_totals = AttendanceAggregator.entry_totals(daily_entries)
         
         # Generate calendar grid
         cal = calendar.monthcalendar(year, month)
@@ -206,14 +190,13 @@ class CalendarUtils:
                         "date": date_str,
                         "is_weekend": day_date.weekday() >= 5,
                         "is_holiday": not CalendarUtils.is_academic_day(day_date, exclude_weekends=False, exclude_holidays=True),
-                        "attendance": daily_attendance.get(date_str, []),
-                        "has_classes": len(daily_attendance.get(date_str, [])) > 0
+                        "attendance": daily_entries.get(day_date, []),
+                        "has_classes": day_date in daily_totals
                     }
                     
                     # Calculate day status
-                    if day_data["attendance"]:
-                        present_count = len([a for a in day_data["attendance"] if a["status"] == "Present"])
-                        total_count = len(day_data["attendance"])
+                    if day_date in daily_totals:
+                        present_count, total_count = daily_totals[day_date]
                         day_data["attendance_percentage"] = (present_count / total_count) * 100
                         
                         if present_count == total_count:
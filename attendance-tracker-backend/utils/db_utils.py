@@ -0,0 +1,53 @@
+from sqlalchemy import inspect, text
+from sqlalchemy.dialects import postgresql, sqlite
+
+
+def supports_upsert(bind) -> bool:
+    """Whether INSERT ... ON CONFLICT is available on this connection"""
+    return bind.dialect.name in ("postgresql", "sqlite")
+
+
+def upsert_insert(model, bind):
+    """Return a dialect-specific INSERT construct that supports ON CONFLICT clauses"""
+    if bind.dialect.name == "postgresql":
+        return postgresql.insert(model)
+    if bind.dialect.name == "sqlite":
+        return sqlite.insert(model)
+    raise NotImplementedError(f"Upserts are not supported on '{bind.dialect.name}'")
+
+
+def add_missing_columns(bind, table):
+    """ALTER TABLE ADD COLUMN for model columns the existing table lacks; returns their names.
+
+    ``db.create_all()`` never alters existing tables, so new columns need
+    this (with a server default when they are NOT NULL).
+    """
+    existing = {column["name"] for column in inspect(bind).get_columns(table.name)}
+    preparer = bind.dialect.identifier_preparer
+    added = []
+    with bind.begin() as conn:
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            ddl = f"ALTER TABLE {preparer.format_table(table)} ADD COLUMN {preparer.format_column(column)} " \
+                  f"{column.type.compile(dialect=bind.dialect)}"
+            if column.server_default is not None:
+                ddl += f" DEFAULT {column.server_default.arg}"
+            if not column.nullable and column.server_default is not None:
+                ddl += " NOT NULL"
+            conn.execute(text(ddl))
+            added.append(column.name)
+    return added
+
+
+def expire_loaded(session, model, ids, attributes):
+    """Expire ``attributes`` on the instances of ``model`` with these ids already in the session.
+
+    Bulk UPDATE statements run with ``synchronize_session=False`` leave
+    loaded objects holding the old values; expiring them makes the next
+    access (e.g. the dashboard refresh at commit) reload from the row.
+    """
+    for pk in ids:
+        instance = session.identity_map.get(session.identity_key(model, pk))
+        if instance is not None:
+            session.expire(instance, attributes)
@@ -0,0 +1,159 @@
+import hashlib
+from datetime import datetime, timedelta
+from functools import wraps
+from flask import current_app, jsonify, make_response, request
+from flask_jwt_extended import get_jwt_identity
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+from models import db, IdempotencyKey
+from utils.db_utils import supports_upsert, upsert_insert
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+MAX_KEY_LENGTH = 255
+REPLAYED_HEADERS = ("Content-Type", "Location")  # response headers stored with the body
+DEFAULT_TTL = 24 * 3600
+
+
+class IdempotencyStore:
+    """Idempotency keys and their stored responses, kept in the ``IdempotencyKey`` table.
+
+    A key is claimed with an INSERT in the same transaction as the write it
+    guards, so the claim commits or rolls back together with that write and
+    is visible to every worker process, including after a restart. The
+    response is stored as soon as the view returns. Rows older than the TTL
+    count as unclaimed and are deleted by ``flask purge-idempotency-keys``.
+    """
+
+    @staticmethod
+    def claim(user_id, key, fingerprint, ttl):
+        """Claim ``key`` in the current transaction.
+
+        Returns None when the caller now owns the key, otherwise the live
+        ``IdempotencyKey`` row of the earlier request (``status_code`` is
+        None while that request is still running).
+        """
+        now = datetime.utcnow()
+        IdempotencyKey.query.filter(
+            IdempotencyKey.user_id == user_id,
+            IdempotencyKey.key == key,
+            IdempotencyKey.created_at < now - timedelta(seconds=ttl)
+        ).delete(synchronize_session=False)
+
+        values = {"user_id": user_id, "key": key, "fingerprint": fingerprint, "created_at": now}
+        bind = db.session.get_bind()
+        if supports_upsert(bind):
+            stmt = upsert_insert(IdempotencyKey, bind).values(**values).on_conflict_do_nothing(
+                index_elements=["user_id", "key"]
+            ).returning(IdempotencyKey.user_id)
+            claimed = db.session.execute(stmt).first() is not None
+        else:
+            try:
+                with db.session.begin_nested():
+                    db.session.execute(insert(IdempotencyKey).values(**values))
+                claimed = True
+            except IntegrityError:
+                claimed = False
+        return None if claimed else db.session.get(IdempotencyKey, (user_id, key))
+
+    @staticmethod
+    def complete(user_id, key, fingerprint, status_code, headers, body):
+        """Store the response for a claimed key and commit.
+
+        Anything the view left uncommitted (typically an error response
+        after a rollback) is discarded first, as the end of the request
+        would have done; the claim is then re-created if it went with it.
+        """
+        db.session.rollback()
+        record = db.session.get(IdempotencyKey, (user_id, key))
+        if record is None:
+            record = IdempotencyKey(user_id=user_id, key=key, fingerprint=fingerprint, created_at=datetime.utcnow())
+            db.session.add(record)
+        elif record.fingerprint != fingerprint or record.status_code is not None:
+            return  # claimed by another request after ours rolled back
+        record.status_code = status_code
+        record.headers = [list(header) for header in headers]
+        record.body = body
+        try:
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+
+    @staticmethod
+    def release(user_id, key):
+        """Drop an unfinished claim so the request can be retried (used when it failed)"""
+        db.session.rollback()
+        IdempotencyKey.query.filter_by(user_id=user_id, key=key, status_code=None).delete(synchronize_session=False)
+        db.session.commit()
+
+    @staticmethod
+    def purge(ttl=DEFAULT_TTL, now=None):
+        """Delete keys older than ``ttl`` seconds; returns how many were removed"""
+        cutoff = (now or datetime.utcnow()) - timedelta(seconds=ttl)
+        removed = IdempotencyKey.query.filter(IdempotencyKey.created_at < cutoff).delete(synchronize_session=False)
+        db.session.commit()
+        return removed
+
+
+def request_fingerprint():
+    """Hash of the method, path, query string and body identifying one logical request"""
+    digest = hashlib.sha256()
+    digest.update(f"{request.method} {request.path}?{request.query_string.decode()}\n".encode())
+    if request.mimetype == "multipart/form-data":
+        for name, value in sorted(request.form.items(multi=True)):
+            digest.update(f"{name}={value}\n".encode())
+        for name, upload in sorted(request.files.items(multi=True), key=lambda item: item[0]):
+            digest.update(f"{name}:{upload.filename}\n".encode())
+            for block in iter(lambda: upload.stream.read(64 * 1024), b""):
+                digest.update(block)
+            upload.stream.seek(0)
+    else:
+        digest.update(request.get_data(cache=True))
+    return digest.hexdigest()
+
+
+def idempotent(view):
+    """Replay the stored response when a request repeats an ``Idempotency-Key``.
+
+    Must be applied below ``@jwt_required()``. Requests without the header
+    run as usual. Reusing a key with a different request is rejected with
+    422, and a retry that arrives while the original is still running gets
+    409. Responses with a 5xx status are not stored, so those can be retried.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if key is None:
+            return view(*args, **kwargs)
+        if not key or len(key) > MAX_KEY_LENGTH:
+            return jsonify({"error": f"{IDEMPOTENCY_HEADER} must be 1-{MAX_KEY_LENGTH} characters"}), 400
+
+        user_id = int(get_jwt_identity())
+        fingerprint = request_fingerprint()
+
+        existing = IdempotencyStore.claim(user_id, key, fingerprint, current_app.config.get("IDEMPOTENCY_TTL", DEFAULT_TTL))
+        if existing is not None:
+            if existing.fingerprint != fingerprint:
+                db.session.rollback()
+                return jsonify({"error": f"{IDEMPOTENCY_HEADER} was already used for a different request"}), 422
+            if existing.status_code is None:
+                db.session.rollback()
+                return jsonify({"error": "A request with this idempotency key is still being processed"}), 409
+            response = current_app.response_class(existing.body, status=existing.status_code, headers=existing.headers)
+            db.session.rollback()
+            response.headers[REPLAYED_HEADER] = "true"
+            return response
+
+        try:
+            response = make_response(view(*args, **kwargs))
+        except Exception:
+            IdempotencyStore.release(user_id, key)
+            raise
+
+        if response.status_code >= 500 or response.is_streamed:
+            IdempotencyStore.release(user_id, key)
+        else:
+            headers = [(name, response.headers[name]) for name in REPLAYED_HEADERS if name in response.headers]
+            IdempotencyStore.complete(user_id, key, fingerprint, response.status_code, headers, response.get_data())
+        return response
+    return wrapper
@@ -0,0 +1,35 @@
+import base64
+import json
+from datetime import date, datetime
+
+
+def encode_cursor(log_date, log_id):
+    """Opaque keyset cursor for a (date, id) position"""
+    payload = json.dumps({"d": log_date.isoformat(), "i": log_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """Return the (date, id) position of a cursor; raises ValueError if it is malformed"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+        return date.fromisoformat(payload["d"]), int(payload["i"])
+    except (ValueError, KeyError, TypeError):
+        raise ValueError("Invalid cursor")
+
+
+def encode_sync_cursor(timestamp):
+    """Opaque delta sync cursor for a server (UTC) timestamp"""
+    payload = json.dumps({"t": timestamp.isoformat()}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_sync_cursor(cursor):
+    """Return the timestamp of a sync cursor; raises ValueError if it is malformed"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+        return datetime.fromisoformat(payload["t"])
+    except (ValueError, KeyError, TypeError):
+        raise ValueError("Invalid cursor")
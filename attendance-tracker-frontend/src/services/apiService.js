@@ -95,7 +95,26 @@ export const apiService = {
     const response = await api.get(`/attendance/export?${params}`, {
       responseType: 'blob'
     })
-    return response
+    if (response.status !== 202) {
+      return response
+    }
+    // PDF reports are rendered in the background: wait for the job, then download its file
+    const { job } = JSON.parse(await response.data.text())
+    return this.downloadExportJob(job.id)
+  },
+
+  async downloadExportJob(jobId, { interval = 1000, timeout = 120000 } = {}) {
+    const deadline = Date.now() + timeout
+    for (;;) {
+      const { data } = await api.get(`/analytics/export/jobs/${jobId}`)
+      if (data.job.status === 'completed') break
+      if (data.job.status === 'failed') throw new Error(data.job.error || 'Export failed')
+      if (Date.now() > deadline) throw new Error('Export is taking longer than expected, try again later')
+      await new Promise(resolve => setTimeout(resolve, interval))
+    }
+    return api.get(`/analytics/export/jobs/${jobId}/download`, {
+      responseType: 'blob'
+    })
   },
 
   // Tasks